@@ -0,0 +1,110 @@
+"""
+Startup time of the `bilingual` CLI on events that need no work.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --budget-ms 40 --runs 30
+
+Each case runs the CLI in a fresh interpreter against a sample webhook
+payload. The time reported is the median wall time minus the median time of
+a bare `python -c pass`, so it measures our code rather than the machine's
+interpreter start-up. Fails (exit 1) when a case is over budget, or when it
+imports one of HEAVY_MODULES before deciding there is nothing to do.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+CLI = os.path.abspath(os.path.join(bench_dir, '..', 'src', 'bilingual_cli.py'))
+
+DEFAULT_BUDGET_MS = 30
+DEFAULT_RUNS = 20
+HEAVY_MODULES = ("github", "requests", "yaml", "dotenv", "utils.translation")
+
+NOT_LABELED = {"action": "opened", "issue": {"number": 1, "labels": [{"name": "bug"}], "body": "Hello"}}
+PR_NOT_LABELED = {"action": "synchronize", "pull_request": {"number": 2, "labels": [], "body": "Hello"}}
+OWN_EDIT = {
+    "action": "edited",
+    "issue": {"number": 3, "labels": [{"name": "need translation"}]},
+    "comment": {"id": 4, "body": "<details>\n<summary><b>English</b></summary>\n\nHello\n</details><br>\n\n"
+                                 "<b>Original Content:</b>\nこんにちは"},
+    "changes": {"body": {"from": "こんにちは"}},
+}
+
+# name -> (CLI arguments, event payload)
+CASES = {
+    "issues/not labeled": (["issues"], NOT_LABELED),
+    "prs/not labeled": (["prs"], PR_NOT_LABELED),
+    "comments/own edit": (["comments"], OWN_EDIT),
+}
+
+# Imports the CLI in-process and reports which heavy modules a no-op run pulled in
+IMPORT_CHECK = """
+import sys, runpy
+sys.argv = [{cli!r}] + {args!r}
+try:
+    runpy.run_path({cli!r}, run_name="__main__")
+except SystemExit:
+    pass
+print("HEAVY:" + ",".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def median_ms(command, env, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def heavy_imports(args, env):
+    code = IMPORT_CHECK.format(cli=CLI, args=args, heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True).stdout
+    line = [l for l in output.splitlines() if l.startswith("HEAVY:")]
+    return [m for m in line[-1][len("HEAVY:"):].split(",") if m] if line else ["<run failed>"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure CLI startup on no-op events')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS, help='Allowed time above bare interpreter start-up')
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS, help='Runs per case; the median is used')
+    args = parser.parse_args()
+
+    baseline = median_ms([sys.executable, '-c', 'pass'], os.environ.copy(), args.runs)
+    print(f"{'python -c pass':24} {baseline:8.1f} ms")
+
+    failures = []
+    with tempfile.TemporaryDirectory(prefix="bilingual-startup-") as tmp_dir:
+        for name, (cli_args, event) in CASES.items():
+            event_path = os.path.join(tmp_dir, "event.json")
+            with open(event_path, 'w', encoding='utf-8') as f:
+                json.dump(event, f)
+            env = dict(os.environ, GITHUB_EVENT_PATH=event_path)
+
+            total = median_ms([sys.executable, CLI] + cli_args, env, args.runs)
+            overhead = total - baseline
+            heavy = heavy_imports(cli_args, env)
+            print(f"{name:24} {total:8.1f} ms  (+{overhead:.1f} ms over bare start-up)"
+                  + (f"  imported {', '.join(heavy)}" if heavy else ""))
+            if overhead > args.budget_ms:
+                failures.append(f"{name}: {overhead:.1f} ms over bare start-up (budget {args.budget_ms:.0f} ms)")
+            if heavy:
+                failures.append(f"{name}: imported {', '.join(heavy)} before exiting")
+
+    if failures:
+        print("\nOver budget:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print(f"\nAll no-op events within {args.budget_ms:.0f} ms of bare start-up")
+
+
+if __name__ == "__main__":
+    main()
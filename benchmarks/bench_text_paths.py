@@ -0,0 +1,230 @@
+"""
+Throughput benchmarks for the pure-Python text functions that run on every comment and file.
+
+    python benchmarks/bench_text_paths.py                  # 1 KB .. 10 MB
+    python benchmarks/bench_text_paths.py --max-size 1MB   # quicker
+    python benchmarks/bench_text_paths.py --save-baseline  # record this machine's numbers
+
+Fails (exit 1) when a function's time per byte grows too much between the
+smallest and largest input (a sign of quadratic behaviour), or when its
+throughput falls too far below the saved baseline.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import contextlib
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.abspath(os.path.join(bench_dir, '..', 'src'))
+sys.path.insert(0, src_dir)
+sys.path.insert(0, os.path.join(src_dir, 'hooks'))
+
+from utils.translation import _preprocess_for_detection, _detect_language_unicode
+from actions.translate_prs import split_quoted_and_reply_content
+from utils.original_content import get_original_content
+import post_commit
+
+BASELINE_FILE = os.path.join(bench_dir, "baseline.json")
+SIZES = [1 << 10, 10 << 10, 100 << 10, 1 << 20, 10 << 20]
+MIN_SECONDS = 0.2
+MAX_REPEATS = 1000
+# Time per byte at the largest size may be at most this many times the time per byte at SCALING_REFERENCE_SIZE
+DEFAULT_MAX_SCALING = 4.0
+SCALING_REFERENCE_SIZE = 10 << 10
+DEFAULT_MAX_REGRESSION = 0.5
+
+IGNORE_PATTERNS = [
+    "node_modules/**", "vendor/**", "docs/archive/**", "*.draft.md", "CHANGELOG.md", "build/*",
+    "**/generated/*.md", "third_party/**", "tmp/**", "docs/internal/*.md", "legacy/**", "*.tmp.md",
+]
+
+EN_WORDS = ("the translation pipeline handles markdown files and comments for every pull request "
+            "while keeping code blocks links and formatting intact").split()
+JA_WORDS = ["翻訳", "処理", "を", "確認", "しました", "ファイル", "の", "変更", "が", "あります", "。", "レビュー", "お願いします"]
+
+
+def _sentence(rng, words, length):
+    return " ".join(rng.choice(words) for _ in range(length))
+
+
+def _fill(make_block, size, seed):
+    rng = random.Random(seed)
+    parts, total = [], 0
+    while total < size:
+        block = make_block(rng)
+        parts.append(block)
+        total += len(block.encode("utf-8"))
+    return "".join(parts)
+
+
+def prose_markdown(size):
+    def block(rng):
+        words = JA_WORDS if rng.random() < 0.3 else EN_WORDS
+        return f"## {_sentence(rng, words, 4)}\n\n{_sentence(rng, words, 40)}  \n{_sentence(rng, words, 20)}   \n\n\n\n"
+    return _fill(block, size, 1)
+
+
+def code_heavy_markdown(size):
+    def block(rng):
+        code = "\n".join(f"    value_{i} = compute(`{rng.randint(0, 999)}`)  # https://example.com/{i}" for i in range(20))
+        return f"{_sentence(rng, EN_WORDS, 12)} `inline_code()` see https://example.com/docs\n\n```python\n{code}\n```\n\n"
+    return _fill(block, size, 2)
+
+
+def quote_chain_comment(size):
+    def block(rng):
+        depth = rng.randint(1, 6)
+        return "".join(f"{'> ' * depth}{_sentence(rng, EN_WORDS, 10)}\n" for _ in range(10)) + "\n"
+    return _fill(block, size, 3) + "\n\n\n" + "Thanks, I will fix this.\n"
+
+
+def formatted_comment(size):
+    original = prose_markdown(size // 2)
+    return (f"<details>\n<summary><b>日本語</b></summary>\n\n{original}\n</details><br>\n\n"
+            f"<b>Original Content:</b>\n\n<br>\n<br>\n{original}")
+
+
+def ignore_paths(size):
+    def block(rng):
+        directory = rng.choice(["docs", "docs/archive", "src/pkg", "vendor/lib", "guides/setup", "a/b/generated"])
+        return f"{directory}/file_{rng.randint(0, 10 ** 6)}.{rng.choice(['en.md', 'ja.md', 'draft.md', 'md'])}\n"
+    return _fill(block, size, 4).splitlines()
+
+
+def _should_ignore_all(paths):
+    for path in paths:
+        post_commit.should_ignore_file(path, IGNORE_PATTERNS)
+
+
+def _apply_formatting(path_and_content):
+    path, content = path_and_content
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    post_commit.apply_formatting_fixes(path)
+
+
+# name -> (function, input generator, description)
+BENCHMARKS = {
+    "preprocess_for_detection/code": (_preprocess_for_detection, code_heavy_markdown, "code-heavy markdown"),
+    "preprocess_for_detection/quotes": (_preprocess_for_detection, quote_chain_comment, "long quote chain"),
+    "detect_language_unicode/prose": (_detect_language_unicode, prose_markdown, "mixed en/ja prose"),
+    "split_quoted_and_reply/quotes": (split_quoted_and_reply_content, quote_chain_comment, "long quote chain"),
+    "split_quoted_and_reply/plain": (split_quoted_and_reply_content, prose_markdown, "reply without quotes"),
+    "get_original_content/formatted": (get_original_content, formatted_comment, "translated comment body"),
+    "format_markdown/prose": (post_commit.format_markdown, prose_markdown, "prose with trailing spaces"),
+    "format_markdown/code": (post_commit.format_markdown, code_heavy_markdown, "code-heavy markdown"),
+    "apply_formatting_fixes/prose": (_apply_formatting, None, "file round trip"),
+    "should_ignore_file/paths": (_should_ignore_all, ignore_paths, f"{len(IGNORE_PATTERNS)} patterns"),
+}
+
+
+def parse_size(value):
+    units = {"KB": 1 << 10, "MB": 1 << 20}
+    for unit, factor in units.items():
+        if value.upper().endswith(unit):
+            return int(float(value[:-len(unit)]) * factor)
+    return int(value)
+
+
+def format_size(size):
+    return f"{size >> 20}MB" if size >= 1 << 20 else f"{size >> 10}KB"
+
+
+def time_call(function, argument):
+    """Seconds per call, repeating small inputs until MIN_SECONDS have passed"""
+    repeats, elapsed = 0, 0.0
+    while elapsed < MIN_SECONDS and repeats < MAX_REPEATS:
+        started = time.perf_counter()
+        function(argument)
+        elapsed += time.perf_counter() - started
+        repeats += 1
+    return elapsed / repeats
+
+
+def run_benchmarks(sizes, only=None):
+    results = {}
+    tmp_dir = tempfile.mkdtemp(prefix="bilingual-bench-")
+    with open(os.devnull, 'w') as devnull:
+        for name, (function, generator, description) in BENCHMARKS.items():
+            if only and only not in name:
+                continue
+            results[name] = {}
+            for size in sizes:
+                if generator is None:
+                    argument = (os.path.join(tmp_dir, "doc.md"), prose_markdown(size))
+                else:
+                    argument = generator(size)
+                # The functions under test log with print; keep that out of the numbers
+                with contextlib.redirect_stdout(devnull):
+                    seconds = time_call(function, argument)
+                results[name][size] = seconds
+                print(f"{name:34} {format_size(size):>6} {seconds * 1000:10.3f} ms {size / seconds / (1 << 20):9.1f} MB/s  ({description})")
+    return results
+
+
+def check(results, baseline, max_scaling, max_regression):
+    failures = []
+    for name, timings in results.items():
+        sizes = sorted(timings)
+        reference = SCALING_REFERENCE_SIZE if SCALING_REFERENCE_SIZE in timings else sizes[0]
+        largest = sizes[-1]
+        if largest > reference:
+            scaling = (timings[largest] / largest) / (timings[reference] / reference)
+            if scaling > max_scaling:
+                failures.append(f"{name}: time per byte grows {scaling:.1f}x from {format_size(reference)} "
+                                f"to {format_size(largest)} (limit {max_scaling}x)")
+        for size, seconds in timings.items():
+            expected = baseline.get(name, {}).get(str(size))
+            if expected and seconds > expected / (1 - max_regression):
+                failures.append(f"{name} at {format_size(size)}: {seconds * 1000:.2f} ms, "
+                                f"baseline {expected * 1000:.2f} ms (allowed regression {max_regression:.0%})")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the text-processing hot paths')
+    parser.add_argument('--max-size', type=parse_size, default=SIZES[-1], help='Largest input size, e.g. 1MB (default 10MB)')
+    parser.add_argument('--only', type=str, help='Run only benchmarks whose name contains this string')
+    parser.add_argument('--max-scaling', type=float, default=DEFAULT_MAX_SCALING, help='Allowed growth of time per byte across sizes')
+    parser.add_argument('--max-regression', type=float, default=DEFAULT_MAX_REGRESSION, help='Allowed slowdown against the baseline, as a fraction')
+    parser.add_argument('--baseline', type=str, default=BASELINE_FILE, help='Baseline file to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='Write these results as the new baseline')
+    parser.add_argument('--json', type=str, help='Write the results to this JSON file')
+    args = parser.parse_args()
+
+    sizes = [size for size in SIZES if size <= args.max_size]
+    results = run_benchmarks(sizes, args.only)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({name: {str(size): seconds for size, seconds in timings.items()} for name, timings in results.items()}, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({name: {str(size): round(seconds, 6) for size, seconds in timings.items()}
+                       for name, timings in results.items()}, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    else:
+        print(f"\nNo baseline at {args.baseline}, only checking how time per byte scales")
+
+    failures = check(results, baseline, args.max_scaling, args.max_regression)
+    if failures:
+        print("\nRegressions:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import sys
+import os
+import argparse
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from actions import translate_issues, translate_prs
+from utils.github_writes import GitHubWriteQueue
+from utils.translation import coalesced_requests
+from utils.config import env
+from utils.local_state import state_path
+
+DEFAULT_WORKERS = 4
+
+
+class BackfillJournal:
+    """Append-only record of finished threads so an interrupted backfill can resume.
+
+    Each line is a JSON object with the thread kind, number and outcome.
+    Only threads recorded as done are skipped on the next run; failed ones
+    are attempted again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A torn final line from an interrupted run
+                        continue
+                    key = (entry.get("kind"), entry.get("number"))
+                    if entry.get("status") == "done":
+                        self.done.add(key)
+                    else:
+                        self.done.discard(key)
+
+    def is_done(self, kind, number):
+        return (kind, number) in self.done
+
+    def record(self, kind, number, status):
+        line = json.dumps({"kind": kind, "number": number, "status": status})
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            if status == "done":
+                self.done.add((kind, number))
+
+
+def list_threads(repo, state, labels, kind):
+    """List (kind, number) for every issue and PR matching the filters."""
+    kwargs = {"state": state}
+    if labels:
+        kwargs["labels"] = labels
+
+    threads = []
+    for issue in repo.get_issues(**kwargs):
+        thread_kind = "pr" if issue.pull_request is not None else "issue"
+        if kind != "all" and kind != f"{thread_kind}s":
+            continue
+        threads.append((thread_kind, issue.number))
+    return threads
+
+
+def backfill_thread(repo, kind, number):
+    """Translate one issue or PR thread. Returns True if any edit landed."""
+    write_queue = GitHubWriteQueue()
+    if kind == "pr":
+        pr = repo.get_pull(number=number)
+        translated = translate_prs.translate_pr_thread(pr, write_queue)
+    else:
+        issue = repo.get_issue(number=number)
+        translated = translate_issues.translate_issue_thread(issue, write_queue)
+    if write_queue.failed:
+        raise RuntimeError(f"{len(write_queue.failed)} write(s) failed")
+    return translated
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Translate every matching issue and PR in a repository')
+    parser.add_argument('--repo', type=str, default=None, help='Repository in owner/name form')
+    parser.add_argument('--state', choices=['open', 'closed', 'all'], default='open', help='Thread state to include')
+    parser.add_argument('--label', action='append', default=[], help='Only include threads with this label (repeatable)')
+    parser.add_argument('--kind', choices=['issues', 'prs', 'all'], default='all', help='Which thread kinds to translate')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Number of threads translated concurrently')
+    parser.add_argument('--journal', type=str, help='Checkpoint journal path (default: .git/bilingual/backfill-<owner>-<name>.jsonl)')
+    args = parser.parse_args(argv)
+
+    github_token = env("GITHUB_TOKEN")
+    args.repo = args.repo or env("GITHUB_REPOSITORY")
+    if not all([github_token, args.repo]):
+        print("Missing required environment variables (GITHUB_TOKEN) or --repo")
+        return 1
+
+    journal_path = args.journal or state_path(f"backfill-{args.repo.replace('/', '-')}.jsonl")
+    journal = BackfillJournal(journal_path)
+    print(f"Using checkpoint journal {journal_path} ({len(journal.done)} threads already done)")
+
+    from github import Github
+    g = Github(github_token)
+    repo = g.get_repo(args.repo)
+
+    threads = list_threads(repo, args.state, args.label, args.kind)
+    pending = [(kind, number) for kind, number in threads if not journal.is_done(kind, number)]
+    print(f"Found {len(threads)} threads, {len(pending)} left to translate")
+
+    translated_count = 0
+    failed_count = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = {executor.submit(backfill_thread, repo, kind, number): (kind, number) for kind, number in pending}
+        for future in as_completed(futures):
+            kind, number = futures[future]
+            try:
+                if future.result():
+                    translated_count += 1
+                journal.record(kind, number, "done")
+                print(f"Finished {kind} #{number}")
+            except Exception as e:
+                failed_count += 1
+                journal.record(kind, number, "failed")
+                print(f"Error translating {kind} #{number}: {e}")
+
+    print(f"\n{'='*60}")
+    print(f"📊 Backfill Summary:")
+    print(f"   ✅ Translated: {translated_count} threads")
+    print(f"   ⏭️  Skipped (already done): {len(threads) - len(pending)} threads")
+    print(f"   ❌ Failed: {failed_count} threads")
+    print(f"   🔗 Requests merged with identical ones in flight: {coalesced_requests()}")
+    print(f"{'='*60}")
+    return 1 if failed_count else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,32 +1,19 @@
-import sys
-import os
-from github import Github
-
-script_dir = os.path.dirname(__file__)
-src_dir = os.path.abspath(os.path.join(script_dir, '..', '..', 'src'))
-sys.path.append(src_dir)
-
 from utils.translation import translate_text, detect_language
+from utils.github_writes import GitHubWriteQueue
+from utils.segments import extract_previous_translations, translate_with_reuse
+from utils.trivial_comments import classify_comment
+from utils.tracing import span, traced, enable as enable_tracing
+from utils.config import env
+from utils.original_content import ORIGINAL_CONTENT_MARKER, get_original_content
 
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN", "").strip()
-REPO_NAME = os.getenv("GITHUB_REPOSITORY", "").strip()
 TRANSLATED_LABEL = "translated"
 NEEDS_TRANSLATION_LABEL = "need translation"  
-ISSUE_NUMBER = os.getenv("ISSUE_NUMBER", "").strip()
-COMMENT_ID = os.getenv("COMMENT_ID", "").strip()
-ORIGINAL_CONTENT_MARKER = "Original Content:"
 
 LANGUAGE_NAMES = {
     "ja": "日本語",
     "en": "English"
 }
 
-def get_original_content(content):
-    if ORIGINAL_CONTENT_MARKER in content:
-        parts = content.split(ORIGINAL_CONTENT_MARKER)
-        return parts[1].strip()
-    return content.strip()
-
 def get_target_languages(original_language):
     if original_language == "en":
         return ["ja"]
@@ -49,93 +36,109 @@ def format_translations(translations, original_content, original_language):
     
     return "\n\n".join(formatted_parts)
 
-def translate_content(content, original_language):
+@traced("translation")
+def translate_content(content, original_language, reuse_from=None):
+    """
+    Translate content into the other languages.
+    When `reuse_from` is a previously formatted body, paragraphs it already translated are reused.
+    """
     translations = {original_language: content}
     
     target_languages = get_target_languages(original_language)
+    previous = extract_previous_translations(reuse_from, LANGUAGE_NAMES)
     
     for language in target_languages:
-        translation = translate_text(content, language)
+        if reuse_from is None:
+            translation = translate_text(content, language)
+        else:
+            translation = translate_with_reuse(content, language, previous.get(language))
         if translation:
             translations[language] = translation
     
     return translations
 
-def extract_original_content(content):
-    if ORIGINAL_CONTENT_MARKER in content:
-        parts = content.split(ORIGINAL_CONTENT_MARKER)
-        return parts[1].strip()
-    return content.strip()
-
 def should_translate_issue(issue):
     return any(label.name.lower() == NEEDS_TRANSLATION_LABEL.lower() for label in issue.labels)
 
-def translate_comment(comment):
+def translate_comment(comment, write_queue):
     if not comment.body:
         return False
         
     current_content = comment.body.strip()
     
-    original_content = extract_original_content(current_content)
+    original_content = get_original_content(current_content)
     
-    original_language = detect_language(original_content)
-    translations = translate_content(original_content, original_language)
+    # Emoji, links, code and stock review phrases are handled without the API
+    trivial = classify_comment(original_content)
+    if trivial and trivial["kind"] == "untranslatable":
+        print(f"Comment #{comment.id} has nothing to translate, skipping")
+        return False
+    if trivial:
+        original_language = trivial["language"]
+        translations = dict(trivial["translations"], **{original_language: original_content})
+    else:
+        with span("detection"):
+            original_language = detect_language(original_content)
+        translations = translate_content(original_content, original_language, reuse_from=current_content)
     
     if translations:
         updated_body = format_translations(translations, original_content, original_language)
-        if updated_body != comment.body:
-            comment.edit(body=updated_body)
-            return True
+        return write_queue.enqueue_edit(comment, updated_body, f"comment #{comment.id}")
     
     return False
 
 def main():
+    enable_tracing()
+    github_token, repo_name = env("GITHUB_TOKEN"), env("GITHUB_REPOSITORY")
     # COMMENT_ID is optional - if not provided, translate all comments on the issue
-    if not all([GITHUB_TOKEN, REPO_NAME, ISSUE_NUMBER]):
+    issue_number, comment_id = env("ISSUE_NUMBER"), env("COMMENT_ID")
+    if not all([github_token, repo_name, issue_number]):
         print("Missing required environment variables (GITHUB_TOKEN, REPO_NAME, or ISSUE_NUMBER)")
         return
 
     try:
-        issue_number = int(ISSUE_NUMBER)
+        issue_number = int(issue_number)
 
-        g = Github(GITHUB_TOKEN)
-        repo = g.get_repo(REPO_NAME)
-        issue = repo.get_issue(number=issue_number)
+        from github import Github
+        g = Github(github_token)
+        with span("github.read", "github", issue=issue_number):
+            repo = g.get_repo(repo_name)
+            issue = repo.get_issue(number=issue_number)
 
         if not should_translate_issue(issue):
             print(f"Issue #{issue_number} does not have the '{NEEDS_TRANSLATION_LABEL}' label. Skipping comment translation.")
             return
 
-        comments_translated = False
+        write_queue = GitHubWriteQueue()
 
-        if COMMENT_ID:
+        if comment_id:
             # Translate a specific comment (triggered by issue_comment event)
-            comment_id = int(COMMENT_ID)
+            comment_id = int(comment_id)
             print(f"Translating single comment #{comment_id} on issue #{issue_number}")
-            comment = issue.get_comment(comment_id)
-            if translate_comment(comment):
-                comments_translated = True
+            with span("github.read", "github", comment=comment_id):
+                comment = issue.get_comment(comment_id)
+            if translate_comment(comment, write_queue):
                 print(f"Successfully translated comment #{comment_id}")
         else:
             # Translate all comments on the issue (triggered by label event)
             print(f"Translating all comments on issue #{issue_number}")
-            comments = issue.get_comments()
+            with span("github.read", "github", issue=issue_number) as read_span:
+                comments = list(issue.get_comments())
+                read_span.set(comments=len(comments))
             comment_count = 0
             for comment in comments:
                 comment_count += 1
                 print(f"Processing comment #{comment.id} ({comment_count})...")
-                if translate_comment(comment):
-                    comments_translated = True
+                if translate_comment(comment, write_queue):
                     print(f"Successfully translated comment #{comment.id}")
                 else:
                     print(f"Comment #{comment.id} was already translated or empty")
             print(f"Processed {comment_count} comments on issue #{issue_number}")
 
-        if comments_translated:
-            labels = [label.name for label in issue.labels]
-            if TRANSLATED_LABEL not in labels:
-                issue.add_to_labels(TRANSLATED_LABEL)
-                print(f"Added '{TRANSLATED_LABEL}' label to issue #{issue_number}")
+        if write_queue.flush():
+            if write_queue.enqueue_label(issue, TRANSLATED_LABEL, f"'{TRANSLATED_LABEL}' label on issue #{issue_number}"):
+                if write_queue.flush():
+                    print(f"Added '{TRANSLATED_LABEL}' label to issue #{issue_number}")
 
     except ValueError as ve:
         print(f"Invalid number format: {ve}")
@@ -1,31 +1,19 @@
-import sys
-import os
-from github import Github
+from utils.translation import translate_text, detect_language, detect_languages
+from utils.github_writes import GitHubWriteQueue
+from utils.segments import extract_previous_translations, translate_with_reuse
+from utils.trivial_comments import classify_comment
+from utils.tracing import span, traced, enable as enable_tracing
+from utils.config import env
+from utils.original_content import ORIGINAL_CONTENT_MARKER, get_original_content
 
-script_dir = os.path.dirname(__file__)
-src_dir = os.path.abspath(os.path.join(script_dir, '..', '..', 'src'))
-sys.path.append(src_dir)
-
-from utils.translation import translate_text, detect_language
-
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN", "").strip()
-REPO_NAME = os.getenv("GITHUB_REPOSITORY", "").strip()
 TRANSLATED_LABEL = "translated"
 NEEDS_TRANSLATION_LABEL = "need translation"
-ISSUE_NUMBER = os.getenv("ISSUE_NUMBER", "").strip()
-ORIGINAL_CONTENT_MARKER = "Original Content:"
 
 LANGUAGE_NAMES = {
     "ja": "日本語",
     "en": "English"
 }
 
-def get_original_content(content):
-    if ORIGINAL_CONTENT_MARKER in content:
-        parts = content.split(ORIGINAL_CONTENT_MARKER)
-        return parts[1].strip()
-    return content.strip()
-
 def get_target_languages(original_language):
     if original_language == "en":
         return ["ja"]
@@ -51,27 +39,32 @@ def format_translations(title_translations, body_translations, original_content,
     
     return "\n\n".join(formatted_parts)
 
-def translate_content(content, original_language):
+@traced("translation")
+def translate_content(content, original_language, reuse_from=None):
+    """
+    Translate content into the other languages.
+    When `reuse_from` is a previously formatted body, paragraphs it already translated are reused.
+    """
     translations = {original_language: content}
     target_languages = get_target_languages(original_language)
+    previous = extract_previous_translations(reuse_from, LANGUAGE_NAMES)
     
     for language in target_languages:
-        translation = translate_text(content, language)
+        if reuse_from is None:
+            translation = translate_text(content, language)
+        else:
+            translation = translate_with_reuse(content, language, previous.get(language))
         if translation:
             translations[language] = translation
     
     return translations
 
-def translate_issue(issue, original_content, original_language, issue_title, issue_body):
+def translate_issue(issue, original_content, original_language, issue_title, issue_body, write_queue):
     title_translations = translate_content(issue_title, original_language)
-    body_translations = translate_content(issue_body, original_language)
+    body_translations = translate_content(issue_body, original_language, reuse_from=issue.body or "")
     updated_body = format_translations(title_translations, body_translations, original_content, original_language)
 
-    if updated_body != issue.body:
-        issue.edit(body=updated_body)
-        return True
-
-    return False
+    return write_queue.enqueue_edit(issue, updated_body, f"issue #{issue.number}")
 
 
 def format_comment_translations(translations, original_content, original_language):
@@ -90,25 +83,84 @@ def format_comment_translations(translations, original_content, original_languag
     return "\n\n".join(formatted_parts)
 
 
-def translate_comment(comment):
-    """Translate a single comment. Returns True if translation was performed."""
+def translate_comment(comment, write_queue, original_language=None):
+    """Translate a single comment. Returns True if an edit was queued.
+    Pass `original_language` when it has already been detected."""
     if not comment.body:
         return False
 
     current_content = comment.body.strip()
     original_content = get_original_content(current_content)
 
-    original_language = detect_language(original_content)
-    translations = translate_content(original_content, original_language)
+    # Emoji, links, code and stock review phrases are handled without the API
+    trivial = classify_comment(original_content)
+    if trivial and trivial["kind"] == "untranslatable":
+        print(f"Comment #{comment.id} has nothing to translate, skipping")
+        return False
+    if trivial:
+        original_language = trivial["language"]
+        translations = dict(trivial["translations"], **{original_language: original_content})
+    else:
+        if original_language is None:
+            with span("detection"):
+                original_language = detect_language(original_content)
+        translations = translate_content(original_content, original_language, reuse_from=current_content)
 
     if translations:
         updated_body = format_comment_translations(translations, original_content, original_language)
-        if updated_body != comment.body:
-            comment.edit(body=updated_body)
-            return True
+        return write_queue.enqueue_edit(comment, updated_body, f"comment #{comment.id}")
 
     return False
 
+def translate_issue_thread(issue, write_queue):
+    """Translate an issue body and all of its comments. Returns True if any edit landed."""
+    with span("github.read", "github", issue=issue.number) as read_span:
+        comments = list(issue.get_comments())
+        read_span.set(comments=len(comments))
+
+    # Detect the language of the body and every comment in one round trip;
+    # trivial comments are left out since they never reach the model
+    original_content = get_original_content(issue.body or "")
+    originals = [get_original_content(comment.body) if comment.body else "" for comment in comments]
+    with span("detection.batch", texts=len(originals) + 1):
+        languages = detect_languages(
+            [original_content] + ["" if classify_comment(original) else original for original in originals]
+        )
+
+    # Translate the issue body
+    print(f"Translating issue #{issue.number}...")
+    original_language = languages[0]
+    issue_title = issue.title
+    issue_body = get_original_content(issue.body or "")
+
+    issue_translated = translate_issue(issue, original_content, original_language, issue_title, issue_body, write_queue)
+    if issue_translated:
+        print(f"Successfully translated issue #{issue.number}")
+    else:
+        print(f"Issue #{issue.number} was already translated or unchanged")
+
+    # Translate all comments on the issue
+    print(f"Translating comments on issue #{issue.number}...")
+    comment_count = 0
+
+    for comment, comment_language in zip(comments, languages[1:]):
+        comment_count += 1
+        print(f"Processing comment #{comment.id} ({comment_count})...")
+        if translate_comment(comment, write_queue, comment_language):
+            print(f"Successfully translated comment #{comment.id}")
+        else:
+            print(f"Comment #{comment.id} was already translated or empty")
+
+    print(f"Processed {comment_count} comments on issue #{issue.number}")
+
+    # Add translated label once the edits have landed
+    written = write_queue.flush()
+    if written:
+        if write_queue.enqueue_label(issue, TRANSLATED_LABEL, f"'{TRANSLATED_LABEL}' label on issue #{issue.number}"):
+            if write_queue.flush():
+                print(f"Added '{TRANSLATED_LABEL}' label to issue #{issue.number}")
+    return written > 0
+
 def should_translate(issue):
     labels = [label.name.lower() for label in issue.labels]
     
@@ -121,56 +173,25 @@ def should_translate(issue):
     return False
 
 def main():
-    if not all([GITHUB_TOKEN, REPO_NAME, ISSUE_NUMBER]):
+    enable_tracing()
+    github_token, repo_name, issue_number = env("GITHUB_TOKEN"), env("GITHUB_REPOSITORY"), env("ISSUE_NUMBER")
+    if not all([github_token, repo_name, issue_number]):
         print("Missing required environment variables")
         return
 
     try:
-        issue_number = int(ISSUE_NUMBER)
-        g = Github(GITHUB_TOKEN)
-        repo = g.get_repo(REPO_NAME)
-        issue = repo.get_issue(number=issue_number)
+        issue_number = int(issue_number)
+        from github import Github
+        g = Github(github_token)
+        with span("github.read", "github", issue=issue_number):
+            repo = g.get_repo(repo_name)
+            issue = repo.get_issue(number=issue_number)
 
         if not should_translate(issue):
             print(f"Issue #{issue_number} does not require translation at this time.")
             return
 
-        # Translate the issue body
-        print(f"Translating issue #{issue_number}...")
-        original_content = get_original_content(issue.body)
-        original_language = detect_language(original_content)
-        issue_title = issue.title
-        issue_body = get_original_content(issue.body)
-
-        issue_translated = translate_issue(issue, original_content, original_language, issue_title, issue_body)
-        if issue_translated:
-            print(f"Successfully translated issue #{issue_number}")
-        else:
-            print(f"Issue #{issue_number} was already translated or unchanged")
-
-        # Translate all comments on the issue
-        print(f"Translating comments on issue #{issue_number}...")
-        comments = issue.get_comments()
-        comments_translated = False
-        comment_count = 0
-
-        for comment in comments:
-            comment_count += 1
-            print(f"Processing comment #{comment.id} ({comment_count})...")
-            if translate_comment(comment):
-                comments_translated = True
-                print(f"Successfully translated comment #{comment.id}")
-            else:
-                print(f"Comment #{comment.id} was already translated or empty")
-
-        print(f"Processed {comment_count} comments on issue #{issue_number}")
-
-        # Add translated label if any translation was performed
-        if issue_translated or comments_translated:
-            labels = [label.name.lower() for label in issue.labels]
-            if TRANSLATED_LABEL.lower() not in labels:
-                issue.add_to_labels(TRANSLATED_LABEL)
-                print(f"Added '{TRANSLATED_LABEL}' label to issue #{issue_number}")
+        translate_issue_thread(issue, GitHubWriteQueue())
 
     except ValueError as ve:
         print(f"Invalid number format: {ve}")
@@ -1,36 +1,19 @@
-import sys
-import os
-from github import Github
-import re
+from utils.translation import translate_text, detect_language, detect_languages
+from utils.github_writes import GitHubWriteQueue
+from utils.segments import extract_previous_translations, translate_with_reuse
+from utils.trivial_comments import classify_comment
+from utils.tracing import span, traced, enable as enable_tracing
+from utils.config import env
+from utils.original_content import ORIGINAL_CONTENT_MARKER, get_original_content
 
-script_dir = os.path.dirname(__file__)
-src_dir = os.path.abspath(os.path.join(script_dir, '..', '..', 'src'))
-sys.path.append(src_dir)
-
-from utils.translation import translate_text, detect_language
-
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN", "").strip()
-REPO_NAME = os.getenv("GITHUB_REPOSITORY", "").strip()
 TRANSLATED_LABEL = "translated"
 NEEDS_TRANSLATION_LABEL = "need translation"
-PR_NUMBER = os.getenv("PR_NUMBER", "").strip()
-COMMENT_ID = os.getenv("COMMENT_ID", "").strip()
-ORIGINAL_CONTENT_MARKER = "Original Content:"
-EVENT_NAME = os.getenv("GITHUB_EVENT_NAME", "").strip()
 
 LANGUAGE_NAMES = {
     "ja": "日本語",
     "en": "English"
 }
 
-def get_original_content(content):
-    if ORIGINAL_CONTENT_MARKER in content:
-        parts = content.split(ORIGINAL_CONTENT_MARKER, 1)
-        original = parts[1].lstrip()
-        original = re.sub(r'^(<br>\s*)+', '', original)
-        return original.strip()
-    return content.strip()
-
 def get_target_languages(original_language):
     if original_language == "en":
         return ["ja"]
@@ -57,12 +40,21 @@ def format_translations(title_translations, body_translations, original_content,
 
     return "\n\n".join(formatted_parts).strip()
 
-def translate_content(content, original_language):
+@traced("translation")
+def translate_content(content, original_language, reuse_from=None):
+    """
+    Translate content into the other languages.
+    When `reuse_from` is a previously formatted body, paragraphs it already translated are reused.
+    """
     translations = {original_language: content}
     target_languages = get_target_languages(original_language)
+    previous = extract_previous_translations(reuse_from, LANGUAGE_NAMES)
     
     for language in target_languages:
-        translation = translate_text(content, language)
+        if reuse_from is None:
+            translation = translate_text(content, language)
+        else:
+            translation = translate_with_reuse(content, language, previous.get(language))
         if translation:
             translations[language] = translation
     
@@ -74,51 +66,45 @@ def split_quoted_and_reply_content(comment_body):
     Preserves the original structure including empty lines between quoted and reply sections.
     Returns (quoted_content, reply_content) as strings.
     """
+    # Most comments quote nothing; skip splitting them into lines
+    if '>' not in comment_body:
+        return "", comment_body.strip()
     lines = comment_body.splitlines()
     
     # Find the last quoted line to determine where quoted content ends
     last_quoted_index = -1
-    for i, line in enumerate(lines):
-        if line.strip().startswith('>'):
+    for i in range(len(lines) - 1, -1, -1):
+        if lines[i].lstrip().startswith('>'):
             last_quoted_index = i
+            break
     
     if last_quoted_index == -1:
         # No quoted content found
         return "", comment_body.strip()
     
     # Extract quoted content (including any empty lines within the quoted block)
-    quoted_lines = []
-    for i in range(last_quoted_index + 1):
-        quoted_lines.append(lines[i])
+    quoted_lines = lines[:last_quoted_index + 1]
     
     # Extract reply content (everything after the quoted block, excluding leading empty lines)
-    reply_lines = lines[last_quoted_index + 1:]
-    # Remove leading empty lines from reply
-    while reply_lines and not reply_lines[0].strip():
-        reply_lines.pop(0)
+    reply_start = last_quoted_index + 1
+    while reply_start < len(lines) and not lines[reply_start].strip():
+        reply_start += 1
+    reply_lines = lines[reply_start:]
     
     quoted_content = '\n'.join(quoted_lines).strip()
     reply_content = '\n'.join(reply_lines).strip()
     
     return quoted_content, reply_content
 
-def translate_pr(pr, original_content, original_language, pr_title, pr_body):
+def translate_pr(pr, original_content, original_language, pr_title, pr_body, write_queue):
     title_translations = translate_content(pr_title, original_language)
-    body_translations = translate_content(pr_body, original_language)
+    body_translations = translate_content(pr_body, original_language, reuse_from=pr.body or "")
     updated_body = format_translations(title_translations, body_translations, original_content, original_language)
     
-    if updated_body != pr.body:
-        pr.edit(body=updated_body)
-        return True
-    
-    return False
+    return write_queue.enqueue_edit(pr, updated_body, f"PR #{pr.number}")
 
-def translate_pr_comment(comment):
-    if not comment.body:
-        return False
-    
-    current_content = comment.body.strip()
-    
+def split_pr_comment(current_content):
+    """Return (quoted_content, reply_content) for a fresh or already translated comment body."""
     # Check if this is already a translated comment
     if ORIGINAL_CONTENT_MARKER in current_content:
         # Extract the original content which includes quoted content with formatting
@@ -129,9 +115,28 @@ def translate_pr_comment(comment):
         quoted_content, reply_content = split_quoted_and_reply_content(current_content)
         if not reply_content:
             reply_content = current_content
+    return quoted_content, reply_content
+
+def translate_pr_comment(comment, write_queue, original_language=None):
+    if not comment.body:
+        return False
     
-    original_language = detect_language(reply_content)
-    translations = translate_content(reply_content, original_language)
+    current_content = comment.body.strip()
+    quoted_content, reply_content = split_pr_comment(current_content)
+    
+    # Emoji, links, code and stock review phrases are handled without the API
+    trivial = classify_comment(reply_content)
+    if trivial and trivial["kind"] == "untranslatable":
+        print(f"Comment #{comment.id} has nothing to translate, skipping")
+        return False
+    if trivial:
+        original_language = trivial["language"]
+        translations = dict(trivial["translations"], **{original_language: reply_content})
+    else:
+        if original_language is None:
+            with span("detection"):
+                original_language = detect_language(reply_content)
+        translations = translate_content(reply_content, original_language, reuse_from=current_content)
     
     if translations:
         # When there's quoted content, we need to include it in the original content too
@@ -145,9 +150,7 @@ def translate_pr_comment(comment):
             updated_body = f"{quoted_content}\n\n{translated_reply}"
         else:
             updated_body = translated_reply
-        if updated_body != comment.body:
-            comment.edit(body=updated_body)
-            return True
+        return write_queue.enqueue_edit(comment, updated_body, f"comment #{comment.id}")
     
     return False
 
@@ -162,59 +165,77 @@ def should_translate(pr):
         
     return False
 
+def add_translated_label(pr, write_queue):
+    """Apply the queued edits, then label the PR if any of them landed. Returns True if any edit landed."""
+    written = write_queue.flush()
+    if written:
+        if write_queue.enqueue_label(pr, TRANSLATED_LABEL, f"'{TRANSLATED_LABEL}' label on PR #{pr.number}"):
+            write_queue.flush()
+    return written > 0
+
+def translate_pr_thread(pr, write_queue):
+    """Translate a PR body, its comments and its review comments. Returns True if any edit landed."""
+    with span("github.read", "github", pr=pr.number) as read_span:
+        comments = list(pr.get_issue_comments()) + list(pr.get_review_comments())
+        read_span.set(comments=len(comments))
+
+    # Detect the language of the body and every comment in one round trip;
+    # trivial comments are left out since they never reach the model
+    original_content = get_original_content(pr.body or "")
+    replies = [split_pr_comment(comment.body.strip())[1] if comment.body else "" for comment in comments]
+    with span("detection.batch", texts=len(replies) + 1):
+        languages = detect_languages(
+            [original_content] + ["" if classify_comment(reply) else reply for reply in replies]
+        )
+
+    original_language = languages[0]
+    pr_title = pr.title
+    pr_body = get_original_content(pr.body or "")
+
+    translate_pr(pr, original_content, original_language, pr_title, pr_body, write_queue)
+
+    # Translate all comments and review comments on the PR
+    for comment, comment_language in zip(comments, languages[1:]):
+        translate_pr_comment(comment, write_queue, comment_language)
+
+    return add_translated_label(pr, write_queue)
+
 def main():
-    if not all([GITHUB_TOKEN, REPO_NAME, PR_NUMBER]):
+    enable_tracing()
+    github_token, repo_name, pr_number = env("GITHUB_TOKEN"), env("GITHUB_REPOSITORY"), env("PR_NUMBER")
+    comment_id, event_name = env("COMMENT_ID"), env("GITHUB_EVENT_NAME")
+    if not all([github_token, repo_name, pr_number]):
         print("Missing required environment variables")
         return
     
     try:
-        pr_number = int(PR_NUMBER)
-        g = Github(GITHUB_TOKEN)
-        repo = g.get_repo(REPO_NAME)
-        pr = repo.get_pull(number=pr_number)
+        pr_number = int(pr_number)
+        from github import Github
+        g = Github(github_token)
+        with span("github.read", "github", pr=pr_number):
+            repo = g.get_repo(repo_name)
+            pr = repo.get_pull(number=pr_number)
         
         if not should_translate(pr):
             print(f"PR #{pr_number} does not require translation at this time.")
             return
         
-        if COMMENT_ID:
-            comment_id = int(COMMENT_ID)
+        write_queue = GitHubWriteQueue()
+
+        if comment_id:
+            comment_id = int(comment_id)
             # Check if it's a review comment or an issue comment
-            if EVENT_NAME == 'pull_request_review_comment':
-                comment = pr.get_review_comment(comment_id)
-            else:
-                comment = pr.get_issue_comment(comment_id)
-            if translate_pr_comment(comment):
-                labels = [label.name.lower() for label in pr.labels]
-                if TRANSLATED_LABEL.lower() not in labels:
-                    pr.add_to_labels(TRANSLATED_LABEL)
+            with span("github.read", "github", comment=comment_id):
+                if event_name == 'pull_request_review_comment':
+                    comment = pr.get_review_comment(comment_id)
+                else:
+                    comment = pr.get_issue_comment(comment_id)
+            translate_pr_comment(comment, write_queue)
+            add_translated_label(pr, write_queue)
             return
         
         # Otherwise translate the PR body
-        original_content = get_original_content(pr.body)
-        original_language = detect_language(original_content)
-        pr_title = pr.title
-        pr_body = get_original_content(pr.body)
-        
-        pr_translated = translate_pr(pr, original_content, original_language, pr_title, pr_body)
-
-        # Translate all comments on the PR
-        comments = pr.get_issue_comments()
-        comments_translated = False
-        for comment in comments:
-            if translate_pr_comment(comment):
-                comments_translated = True
-
-        # Translate all review comments on the PR
-        review_comments = pr.get_review_comments()
-        for comment in review_comments:
-            if translate_pr_comment(comment):
-                comments_translated = True
-
-        if pr_translated or comments_translated:
-            labels = [label.name.lower() for label in pr.labels]
-            if TRANSLATED_LABEL.lower() not in labels:
-                pr.add_to_labels(TRANSLATED_LABEL)
+        translate_pr_thread(pr, write_queue)
     
     except ValueError as ve:
         print(f"Invalid number format: {ve}")
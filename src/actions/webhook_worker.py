@@ -0,0 +1,338 @@
+import sys
+import os
+import argparse
+import hmac
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from actions import translate_comments, translate_issues, translate_prs
+from bilingual_cli import skip_reason
+from utils.github_writes import GitHubWriteQueue
+from utils.config import env
+
+TRANSLATED_LABEL = "translated"
+
+DEFAULT_PORT = 8080
+DEFAULT_COALESCE_SECONDS = 3.0
+DEFAULT_WORKERS = 2
+
+ISSUE_ACTIONS = ("opened", "edited", "labeled", "reopened")
+# Not "synchronize": pushing commits does not change the PR's text
+PR_ACTIONS = ("opened", "edited", "labeled", "reopened")
+COMMENT_ACTIONS = ("created", "edited")
+
+# Webhook event -> bilingual_cli command whose payload checks apply to it
+EVENT_COMMANDS = {
+    "issues": "issues",
+    "issue_comment": "comments",
+    "pull_request": "prs",
+    "pull_request_review": "prs",
+    "pull_request_review_comment": "prs",
+}
+
+
+def verify_signature(secret, body, signature_header):
+    """Check the X-Hub-Signature-256 header GitHub sends with every webhook delivery. Without a secret nothing verifies."""
+    if not secret:
+        return False
+    if not signature_header or not signature_header.startswith("sha256="):
+        return False
+    expected = "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature_header)
+
+
+def job_for_event(event_name, payload):
+    """
+    Turn a webhook payload into ((repo, number), job), or None if the event needs no work.
+
+    A job is {"kind": "issue"|"pr", "full": bool, "comments": set}; full jobs
+    translate the whole thread, otherwise only the listed comments.
+    """
+    action = payload.get("action")
+    repo_name = (payload.get("repository") or {}).get("full_name")
+    if not repo_name:
+        return None
+
+    if event_name == "issues" and action in ISSUE_ACTIONS:
+        number = payload["issue"]["number"]
+        return (repo_name, number), {"kind": "issue", "full": True, "comments": set()}
+
+    if event_name in ("pull_request", "pull_request_review") and action in PR_ACTIONS + ("submitted",):
+        number = payload["pull_request"]["number"]
+        return (repo_name, number), {"kind": "pr", "full": True, "comments": set()}
+
+    if event_name == "issue_comment" and action in COMMENT_ACTIONS:
+        number = payload["issue"]["number"]
+        kind = "pr" if payload["issue"].get("pull_request") else "issue"
+        comment = ("issue_comment", payload["comment"]["id"])
+        return (repo_name, number), {"kind": kind, "full": False, "comments": {comment}}
+
+    if event_name == "pull_request_review_comment" and action in COMMENT_ACTIONS:
+        number = payload["pull_request"]["number"]
+        comment = ("review_comment", payload["comment"]["id"])
+        return (repo_name, number), {"kind": "pr", "full": False, "comments": {comment}}
+
+    return None
+
+
+def merge_jobs(existing, job):
+    """Combine two jobs for the same thread; a full-thread job absorbs comment jobs."""
+    if existing["full"] or job["full"]:
+        return {"kind": existing["kind"], "full": True, "comments": set()}
+    return {"kind": existing["kind"], "full": False, "comments": existing["comments"] | job["comments"]}
+
+
+class CoalescingQueue:
+    """
+    In-process queue of thread jobs keyed by (repo, number).
+
+    Events for a thread that is already waiting are merged into the waiting
+    job, and a job only becomes ready once its thread has been quiet for
+    `delay` seconds, so a burst of edits turns into one translation pass.
+    A thread is never processed by two workers at once.
+    """
+
+    def __init__(self, delay):
+        self.delay = delay
+        self._cond = threading.Condition()
+        self._pending = OrderedDict()
+        self._ready_at = {}
+        self._in_progress = set()
+
+    def put(self, key, job):
+        with self._cond:
+            existing = self._pending.get(key)
+            self._pending[key] = merge_jobs(existing, job) if existing else job
+            self._ready_at[key] = time.monotonic() + self.delay
+            self._cond.notify_all()
+
+    def get(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                next_ready = None
+                for key in self._pending:
+                    if key in self._in_progress:
+                        continue
+                    if self._ready_at[key] <= now:
+                        job = self._pending.pop(key)
+                        del self._ready_at[key]
+                        self._in_progress.add(key)
+                        return key, job
+                    if next_ready is None or self._ready_at[key] < next_ready:
+                        next_ready = self._ready_at[key]
+                self._cond.wait(timeout=None if next_ready is None else next_ready - now)
+
+    def done(self, key):
+        with self._cond:
+            self._in_progress.discard(key)
+            self._cond.notify_all()
+
+    def size(self):
+        with self._cond:
+            return len(self._pending) + len(self._in_progress)
+
+
+class TranslationWorker:
+    """Holds the warm GitHub client and repository cache and runs queued jobs."""
+
+    def __init__(self, github, coalesce_seconds=DEFAULT_COALESCE_SECONDS, bot_login=""):
+        self.github = github
+        self.bot_login = bot_login
+        self.queue = CoalescingQueue(coalesce_seconds)
+        self._repos = {}
+        self._repos_lock = threading.Lock()
+
+    def get_repo(self, name):
+        with self._repos_lock:
+            if name not in self._repos:
+                self._repos[name] = self.github.get_repo(name)
+            return self._repos[name]
+
+    def submit(self, event_name, payload):
+        """Queue the work for one delivery. Returns True if anything was queued."""
+        sender = (payload.get("sender") or {}).get("login", "")
+        if self.bot_login and sender == self.bot_login:
+            # Our own edits come back as webhooks; translating them again would loop
+            print(f"Ignoring {event_name} event sent by {sender}")
+            return False
+        # Also catches our own edits when WORKER_BOT_LOGIN is not set: they leave the original text unchanged
+        reason = skip_reason(EVENT_COMMANDS.get(event_name), payload) if event_name in EVENT_COMMANDS else None
+        if reason:
+            print(f"Ignoring {event_name} event: {reason}")
+            return False
+
+        result = job_for_event(event_name, payload)
+        if result is None:
+            print(f"Ignoring {event_name} event (action: {payload.get('action')})")
+            return False
+        key, job = result
+        self.queue.put(key, job)
+        scope = "full thread" if job["full"] else f"{len(job['comments'])} comment(s)"
+        print(f"Queued {job['kind']} {key[0]}#{key[1]} ({scope})")
+        return True
+
+    def process(self, key, job):
+        repo_name, number = key
+        repo = self.get_repo(repo_name)
+        write_queue = GitHubWriteQueue()
+
+        if job["kind"] == "pr":
+            pr = repo.get_pull(number=number)
+            if not translate_prs.should_translate(pr):
+                print(f"PR {repo_name}#{number} does not require translation at this time.")
+                return
+            if job["full"]:
+                translate_prs.translate_pr_thread(pr, write_queue)
+                return
+            for comment_type, comment_id in sorted(job["comments"]):
+                if comment_type == "review_comment":
+                    comment = pr.get_review_comment(comment_id)
+                else:
+                    comment = pr.get_issue_comment(comment_id)
+                translate_prs.translate_pr_comment(comment, write_queue)
+            translate_prs.add_translated_label(pr, write_queue)
+            return
+
+        issue = repo.get_issue(number=number)
+        if job["full"]:
+            if not translate_issues.should_translate(issue):
+                print(f"Issue {repo_name}#{number} does not require translation at this time.")
+                return
+            translate_issues.translate_issue_thread(issue, write_queue)
+            return
+
+        if not translate_comments.should_translate_issue(issue):
+            print(f"Issue {repo_name}#{number} does not have the '{translate_comments.NEEDS_TRANSLATION_LABEL}' label.")
+            return
+        for _, comment_id in sorted(job["comments"]):
+            translate_comments.translate_comment(issue.get_comment(comment_id), write_queue)
+        if write_queue.flush():
+            if write_queue.enqueue_label(issue, TRANSLATED_LABEL, f"'{TRANSLATED_LABEL}' label on issue #{number}"):
+                write_queue.flush()
+
+    def run_forever(self):
+        while True:
+            key, job = self.queue.get()
+            try:
+                self.process(key, job)
+            except Exception as e:
+                print(f"Error processing {key[0]}#{key[1]}: {e}")
+            finally:
+                self.queue.done(key)
+
+    def drain(self):
+        """Process everything queued so far on the calling thread (used for replays)."""
+        while self.queue.size():
+            key, job = self.queue.get()
+            try:
+                self.process(key, job)
+            except Exception as e:
+                print(f"Error processing {key[0]}#{key[1]}: {e}")
+            finally:
+                self.queue.done(key)
+
+
+def make_handler(worker, secret):
+    class WebhookHandler(BaseHTTPRequestHandler):
+        def _respond(self, status, message):
+            body = json.dumps({"message": message}).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/healthz":
+                self._respond(200, f"ok, {worker.queue.size()} thread(s) queued")
+            else:
+                self._respond(404, "not found")
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length)
+            if not verify_signature(secret, body, self.headers.get("X-Hub-Signature-256")):
+                self._respond(401, "invalid signature")
+                return
+
+            event_name = self.headers.get("X-GitHub-Event", "")
+            if event_name == "ping":
+                self._respond(200, "pong")
+                return
+            try:
+                payload = json.loads(body.decode("utf-8"))
+            except ValueError:
+                self._respond(400, "invalid JSON payload")
+                return
+
+            queued = worker.submit(event_name, payload)
+            self._respond(202, "queued" if queued else "ignored")
+
+        def log_message(self, format, *args):
+            print(f"[Webhook] {self.address_string()} {format % args}")
+
+    return WebhookHandler
+
+
+def load_recorded_delivery(path, event_name):
+    """Read a recorded webhook, either a bare payload or {"event": ..., "payload": ...}."""
+    with open(path, 'r', encoding='utf-8') as f:
+        recorded = json.load(f)
+    if "payload" in recorded and "event" in recorded:
+        return recorded["event"], recorded["payload"]
+    if not event_name:
+        raise ValueError(f"{path} is a bare payload; pass --event to say which event it is")
+    return event_name, recorded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Receive GitHub webhooks and translate issues, PRs and comments')
+    parser.add_argument('--host', type=str, default='0.0.0.0', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=int(env("PORT") or DEFAULT_PORT), help='Port to listen on')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Number of threads translating concurrently')
+    parser.add_argument('--coalesce-seconds', type=float, default=DEFAULT_COALESCE_SECONDS, help='Quiet period before a thread is processed')
+    parser.add_argument('--replay', type=str, nargs='+', help='Process recorded webhook payload files and exit')
+    parser.add_argument('--event', type=str, help='Event name for bare payloads passed to --replay')
+    args = parser.parse_args(argv)
+
+    github_token, webhook_secret, bot_login = env("GITHUB_TOKEN"), env("WEBHOOK_SECRET"), env("WORKER_BOT_LOGIN")
+    if not github_token:
+        print("Missing required environment variable GITHUB_TOKEN")
+        return 1
+    from github import Github
+    github = Github(github_token)
+
+    if args.replay:
+        worker = TranslationWorker(github, coalesce_seconds=0, bot_login=bot_login)
+        for path in args.replay:
+            event_name, payload = load_recorded_delivery(path, args.event)
+            worker.submit(event_name, payload)
+        worker.drain()
+        return 0
+
+    if not webhook_secret:
+        # Anyone who can reach the port could otherwise queue paid translations
+        print("Missing required environment variable WEBHOOK_SECRET (use --replay to process recorded payloads without one)")
+        return 1
+
+    worker = TranslationWorker(github, coalesce_seconds=args.coalesce_seconds, bot_login=bot_login)
+    for _ in range(max(1, args.workers)):
+        threading.Thread(target=worker.run_forever, daemon=True).start()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(worker, webhook_secret))
+    print(f"Listening for GitHub webhooks on {args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
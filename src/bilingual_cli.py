@@ -0,0 +1,112 @@
+"""
+One entry point for every translation job:
+
+    bilingual issues | prs | comments       # GitHub issue, PR and comment events
+    bilingual markdown [post_commit options]
+    bilingual hook enqueue | run | status
+    bilingual backfill | worker [options]   # whole-repository backfill, webhook worker
+
+Only the standard library is imported until a command knows it has work to
+do. Events that need nothing, judged from the webhook payload in
+GITHUB_EVENT_PATH, exit before PyGithub, requests or any configuration is
+loaded.
+"""
+import os
+import sys
+import json
+import argparse
+import importlib
+
+src_dir = os.path.dirname(os.path.abspath(__file__))
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from utils.original_content import get_original_content
+
+NEEDS_TRANSLATION_LABEL = "need translation"
+
+# command -> (module with a main(), help)
+EVENT_COMMANDS = {
+    "issues": ("actions.translate_issues", "Translate an issue and its comments (ISSUE_NUMBER)"),
+    "prs": ("actions.translate_prs", "Translate a pull request, or one of its comments (PR_NUMBER, COMMENT_ID)"),
+    "comments": ("actions.translate_comments", "Translate issue comments (ISSUE_NUMBER, COMMENT_ID)"),
+}
+PASSTHROUGH_COMMANDS = {
+    "markdown": ("hooks.post_commit", "Translate markdown files; takes the options of src/hooks/post_commit.py"),
+    "hook": ("hooks.background", "Background translation for the local post-commit hook: enqueue, run or status"),
+    "backfill": ("actions.backfill", "Translate every matching issue and PR in a repository; takes the options of src/actions/backfill.py"),
+    "worker": ("actions.webhook_worker", "Receive GitHub webhooks and translate as they arrive; takes the options of src/actions/webhook_worker.py"),
+}
+
+
+def read_event():
+    """The webhook payload of the running GitHub Actions event, or None"""
+    path = os.getenv("GITHUB_EVENT_PATH", "").strip()
+    if not path:
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            event = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return event if isinstance(event, dict) else None
+
+
+def skip_reason(command, event):
+    """Why an event needs no work, judged from its payload alone; None when it may need some"""
+    if not event:
+        return None
+    item = event.get("pull_request") if command == "prs" else None
+    item = item or event.get("issue") or {}
+    number = item.get("number", "?")
+
+    if "labels" in item:
+        labels = [(label or {}).get("name", "").lower() for label in item["labels"]]
+        if NEEDS_TRANSLATION_LABEL not in labels:
+            return f"#{number} does not have the '{NEEDS_TRANSLATION_LABEL}' label"
+
+    comment = event.get("comment")
+    if comment and event.get("action") == "deleted":
+        return f"comment #{comment.get('id')} was deleted"
+
+    # Our own edit fires another 'edited' event; it changes the translations but not the original text
+    edited = comment or (None if "review" in event else item)
+    changes = event.get("changes") or {}
+    if edited and event.get("action") == "edited" and set(changes) == {"body"}:
+        previous = (changes["body"] or {}).get("from")
+        if previous is not None and get_original_content(previous) == get_original_content(edited.get("body") or ""):
+            what = f"comment #{comment.get('id')}" if comment else f"#{number}"
+            return f"the original text of {what} did not change"
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='bilingual', description='Translate GitHub issues, pull requests, comments and markdown files')
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    for name, (_, help_text) in EVENT_COMMANDS.items():
+        commands.add_parser(name, help=help_text)
+    for name, (_, help_text) in PASSTHROUGH_COMMANDS.items():
+        # Options are handed to the underlying script, which prints its own --help
+        commands.add_parser(name, help=help_text, add_help=False)
+    args, rest = parser.parse_known_args(argv)
+
+    if args.command in PASSTHROUGH_COMMANDS:
+        module = importlib.import_module(PASSTHROUGH_COMMANDS[args.command][0])
+        return module.main(rest)
+
+    if args.command not in EVENT_COMMANDS:
+        parser.print_help()
+        return 2
+    if rest:
+        parser.error(f"unrecognized arguments: {' '.join(rest)}")
+
+    reason = skip_reason(args.command, read_event())
+    if reason:
+        print(f"Nothing to translate: {reason}")
+        return 0
+    importlib.import_module(EVENT_COMMANDS[args.command][0]).main()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
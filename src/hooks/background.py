@@ -0,0 +1,259 @@
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+script_dir = os.path.dirname(__file__)
+src_dir = os.path.abspath(os.path.join(script_dir, '..', '..', 'src'))
+sys.path.insert(0, src_dir)
+
+from utils.local_state import state_path
+
+POST_COMMIT_SCRIPT = os.path.join(os.path.abspath(script_dir), 'post_commit.py')
+
+QUEUE_FILE = "hook-queue.jsonl"
+LOCK_FILE = "hook.lock"
+STATUS_FILE = "hook-status.json"
+LOG_FILE = "hook.log"
+
+
+def git(*args):
+    result = subprocess.run(['git'] + list(args), capture_output=True, text=True, encoding='utf-8')
+    return result.stdout if result.returncode == 0 else None
+
+
+def committed_markdown_changes(commit='HEAD'):
+    """Markdown paths changed and deleted by one commit, read from git itself"""
+    output = git('diff-tree', '-z', '-r', '-M', '--root', '--no-commit-id', '--name-status', commit)
+    changed, deleted = [], []
+    if not output:
+        return changed, deleted
+    fields = output.split('\0')
+    i = 0
+    while i < len(fields) - 1:
+        status = fields[i]
+        if status[:1] in ('R', 'C'):
+            old_path, new_path = fields[i + 1], fields[i + 2]
+            i += 3
+        else:
+            old_path = new_path = fields[i + 1]
+            i += 2
+        if status[:1] == 'D':
+            if old_path.endswith('.md'):
+                deleted.append(old_path)
+        elif new_path.endswith('.md'):
+            changed.append(new_path)
+    return changed, deleted
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+def read_lock():
+    try:
+        with open(state_path(LOCK_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def acquire_lock():
+    """Take the runner lock, clearing it first if its holder died"""
+    path = state_path(LOCK_FILE)
+    holder = read_lock()
+    if holder and not _pid_alive(holder.get("pid", -1)):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump({"pid": os.getpid(), "started": time.time()}, f)
+    return True
+
+
+def release_lock():
+    try:
+        os.remove(state_path(LOCK_FILE))
+    except OSError:
+        pass
+
+
+def write_status(status):
+    path = state_path(STATUS_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(status, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def read_status():
+    try:
+        with open(state_path(STATUS_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def queued_jobs():
+    try:
+        with open(state_path(QUEUE_FILE), 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except OSError:
+        return []
+
+
+def take_queue():
+    """Claim every queued job; commits made from now on start a new queue file"""
+    path = state_path(QUEUE_FILE)
+    taken = path + ".taken"
+    try:
+        os.replace(path, taken)
+    except OSError:
+        return []
+    with open(taken, 'r', encoding='utf-8') as f:
+        jobs = [json.loads(line) for line in f if line.strip()]
+    os.remove(taken)
+    return jobs
+
+
+def merge_jobs(jobs):
+    """Fold several commits into one run: the latest state of each path wins"""
+    state = {}
+    base_ref = None
+    for job in jobs:
+        if base_ref is None:
+            base_ref = job.get("base_ref")
+        for path in job["deleted"]:
+            state[path] = "deleted"
+        for path in job["changed"]:
+            state[path] = "changed"
+    changed = sorted(p for p, s in state.items() if s == "changed")
+    deleted = sorted(p for p, s in state.items() if s == "deleted")
+    return changed, deleted, base_ref
+
+
+def spawn_runner():
+    """Start the runner fully detached from the committing terminal"""
+    log = open(state_path(LOG_FILE), 'a', encoding='utf-8')
+    kwargs = {}
+    if os.name == 'nt':
+        kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
+    subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), 'run'],
+        stdin=subprocess.DEVNULL,
+        stdout=log,
+        stderr=subprocess.STDOUT,
+        close_fds=True,
+        **kwargs
+    )
+    log.close()
+
+
+def enqueue(commit='HEAD'):
+    """Called by the post-commit hook: queue the commit's markdown changes and make sure a runner is going"""
+    changed, deleted = committed_markdown_changes(commit)
+    if not changed and not deleted:
+        return
+    sha = (git('rev-parse', commit) or '').strip()
+    parent = (git('rev-parse', '--verify', '--quiet', f'{commit}^') or '').strip()
+    job = {"commit": sha, "changed": changed, "deleted": deleted, "base_ref": parent or None, "queued": time.time()}
+    with open(state_path(QUEUE_FILE), 'a', encoding='utf-8') as f:
+        f.write(json.dumps(job) + "\n")
+
+    holder = read_lock()
+    if holder and _pid_alive(holder.get("pid", -1)):
+        print(f"[bilingual] Queued translation of {len(changed) + len(deleted)} markdown files (runner already active)")
+        return
+    spawn_runner()
+    print(f"[bilingual] Translating {len(changed) + len(deleted)} markdown files in the background "
+          f"(python {os.path.abspath(__file__)} status)")
+
+
+def run():
+    """Drain the queue, one post_commit run per batch of queued commits"""
+    if not acquire_lock():
+        return
+    try:
+        while True:
+            jobs = take_queue()
+            if not jobs:
+                release_lock()
+                # A commit may have queued a job while the lock was still held
+                if queued_jobs() and acquire_lock():
+                    continue
+                return
+
+            changed, deleted, base_ref = merge_jobs(jobs)
+            commits = [job["commit"][:10] for job in jobs]
+            print(f"\n=== {time.strftime('%Y-%m-%d %H:%M:%S')} translating commits {', '.join(commits)} ===", flush=True)
+            status = read_status()
+            status.update({"state": "running", "pid": os.getpid(), "commits": commits,
+                           "files": changed, "deleted": deleted, "started": time.time()})
+            write_status(status)
+
+            command = [sys.executable, POST_COMMIT_SCRIPT, '--files', ",".join(changed), '--deleted-files', ",".join(deleted)]
+            if base_ref:
+                command += ['--base-ref', base_ref]
+            returncode = subprocess.call(command, stdin=subprocess.DEVNULL, stdout=sys.stdout, stderr=subprocess.STDOUT)
+
+            status.update({"state": "finished", "finished": time.time(), "returncode": returncode})
+            write_status(status)
+            print(f"=== finished with exit code {returncode} ===", flush=True)
+    except BaseException:
+        release_lock()
+        raise
+
+
+def show_status():
+    holder = read_lock()
+    running = bool(holder and _pid_alive(holder.get("pid", -1)))
+    status = read_status()
+    queued = queued_jobs()
+
+    if running:
+        started = time.strftime('%H:%M:%S', time.localtime(status.get("started", holder.get("started", 0))))
+        print(f"Running (pid {holder['pid']}) since {started}: {', '.join(status.get('files', [])) or 'deletions only'}")
+    elif status.get("state") == "finished":
+        finished = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(status["finished"]))
+        result = "succeeded" if status.get("returncode") == 0 else f"failed (exit code {status.get('returncode')})"
+        print(f"Idle. Last run {result} at {finished} for commits {', '.join(status.get('commits', []))}")
+    elif status.get("state") == "running":
+        print("Idle. The last run stopped before finishing")
+    else:
+        print("No background translations have run yet")
+
+    if queued:
+        print(f"Pending: {len(queued)} commits waiting ({', '.join(job['commit'][:10] for job in queued)})")
+    print(f"Log: {state_path(LOG_FILE)}")
+    return 1 if queued or running else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run markdown translation for local commits in the background')
+    parser.add_argument('command', choices=['enqueue', 'run', 'status'],
+                        help='enqueue: queue HEAD (used by the post-commit hook); run: drain the queue; status: show progress')
+    args = parser.parse_args(argv)
+
+    if args.command == 'enqueue':
+        enqueue()
+    elif args.command == 'run':
+        run()
+    else:
+        sys.exit(show_status())
+
+
+if __name__ == "__main__":
+    main()
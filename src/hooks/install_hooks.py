@@ -1,15 +1,20 @@
 import os
+import sys
 
-HOOK_SCRIPT = """#!/bin/bash
-python3 src/hooks/post_commit.py
+BACKGROUND_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "background.py")
+
+# Queues the commit's markdown changes and returns at once; translation runs detached
+HOOK_SCRIPT = """#!/bin/sh
+"{python}" "{script}" enqueue
 """
 
 def install_hooks():
     hook_path = ".git/hooks/post-commit"
     with open(hook_path, "w") as hook_file:
-        hook_file.write(HOOK_SCRIPT)
+        hook_file.write(HOOK_SCRIPT.format(python=sys.executable, script=BACKGROUND_SCRIPT))
     os.chmod(hook_path, 0o775)
     print("Post-commit hook installed.")
+    print(f"Check background translations with: python {BACKGROUND_SCRIPT} status")
 
 if __name__ == "__main__":
     install_hooks()
@@ -2,26 +2,67 @@ import os
 import sys
 import argparse
 import fnmatch
+import functools
 from pathlib import Path
 from difflib import unified_diff
 import re
+import json
+import shutil
 import subprocess
+import tempfile
+import time
 
 script_dir = os.path.dirname(__file__)
 src_dir = os.path.abspath(os.path.join(script_dir, '..', '..', 'src'))
 sys.path.insert(0, src_dir)
  
-from utils.translation import translate_text, translate_incremental, detect_language
+from utils.translation import (translate_text, translate_incremental, detect_language, detect_languages,
+                               summarize_calls, set_deadline, TRANSLATION_MODEL, INCREMENTAL_MODEL, CALL_STATS)
+from utils.config import env
+from utils.run_report import RunReport
+from utils.cost_model import get_cost_model, estimate_tokens, FULL_PROMPT_OVERHEAD
+from utils.translation_lock import TranslationLock, LOCK_FILE, read_blob, blob_at, blob_hash
+from utils.scheduler import RunScheduler
+from utils.segments import split_paragraphs, paragraph_hash, translate_with_reuse
+from utils.sharding import parse_shard, select_shard
+from utils.progress_journal import ProgressJournal
+from utils.structure_check import repair_translation
+from utils.file_watch import create_watcher
+from utils.tracing import span, traced, enable as enable_tracing
 
 TARGET_LANGUAGES = ["en", "ja"]
 TRANSLATION_IGNORE_FILE = ".md_ignore"
 
-# Incremental translation thresholds
-DIFF_THRESHOLD_PERCENT = 50  # If diff > 30%, use full translation
-LINE_COUNT_THRESHOLD = 100   # If lines <= 100, use full translation
-
 DEFAULT_IGNORE_PATTERNS = []
 
+# Everything this run changes on disk, so the commit step can stage exactly those paths
+REPORT = RunReport()
+
+# Which source version each translation was produced from; loaded by start_run()
+LOCK = None
+
+# Run budget, priority order and work carried over between runs; loaded by start_run()
+SCHEDULER = None
+
+# Translations finished by this run or an interrupted earlier one; loaded by start_run()
+JOURNAL = None
+
+# Languages detected up front, in one batch, for files whose name does not say
+DETECTED_LANGUAGES = {}
+
+def start_run(read_only=False):
+    """
+    Load the lockfile and the work carried over from earlier runs, from the
+    current checkout. `read_only` runs (--check) only need the lockfile and
+    must not create the local state directory.
+    """
+    global LOCK, SCHEDULER, JOURNAL
+    LOCK = TranslationLock()
+    if read_only:
+        return
+    SCHEDULER = RunScheduler()
+    JOURNAL = ProgressJournal()
+
 def load_ignore_patterns(repo_root='.'):
     """Load .ignore_md_translation patterns from client repo"""
     ignore_file = Path(repo_root) / TRANSLATION_IGNORE_FILE
@@ -45,73 +86,106 @@ def load_ignore_patterns(repo_root='.'):
     
     return patterns
 
+@functools.lru_cache(maxsize=32)
+def _compile_ignore_patterns(ignore_patterns):
+    """(pattern, regex match, directory prefix for /** patterns) per pattern, compiled once per pattern list"""
+    compiled = []
+    for pattern in ignore_patterns:
+        # Normalize pattern separators
+        pattern = pattern.replace('\\', '/')
+        match = re.compile(fnmatch.translate(os.path.normcase(pattern))).match
+        dir_pattern = pattern[:-3] if pattern.endswith('/**') else None
+        compiled.append((pattern, match, dir_pattern))
+    return compiled
+
 def should_ignore_file(file_path, ignore_patterns):
     """Check if file should be ignored based on patterns"""
     file_path_str = str(file_path).replace('\\', '/')  # Normalize path separators
+    normalized = os.path.normcase(file_path_str)
     
-    for pattern in ignore_patterns:
-        # Normalize pattern separators
-        pattern = pattern.replace('\\', '/')
-        
-        # Direct match
-        if fnmatch.fnmatch(file_path_str, pattern):
+    for pattern, match, dir_pattern in _compile_ignore_patterns(tuple(ignore_patterns)):
+        # Direct match (same rules as fnmatch.fnmatch)
+        if match(normalized):
             print(f"Ignoring {file_path_str} (matches pattern: {pattern})")
             return True
         
         # Handle directory patterns ending with /**
-        if pattern.endswith('/**'):
-            dir_pattern = pattern[:-3]  # Remove /**
+        if dir_pattern is not None:
             if file_path_str.startswith(dir_pattern + '/') or file_path_str == dir_pattern:
                 print(f"Ignoring {file_path_str} (in directory: {dir_pattern})")
                 return True
-        
-        # Handle patterns with path separators
-        if '/' in pattern and fnmatch.fnmatch(file_path_str, pattern):
-            print(f"Ignoring {file_path_str} (matches path pattern: {pattern})")
-            return True
     
     return False
 
+@traced("formatting")
+def format_markdown(content):
+    """Apply formatting fixes to markdown text (preserves markdown two-space line breaks)"""
+    # Fix 1: Remove trailing whitespace from lines (preserve markdown two-space line breaks)
+    lines = content.splitlines()
+    fixed_lines = []
+    for line in lines:
+        # Preserve markdown two-space line breaks: exactly 2 spaces at end of non-blank line
+        if line.endswith('  ') and not line.endswith('   ') and line.strip():
+            # Line ends with exactly 2 spaces - preserve them
+            fixed_lines.append(line[:-2].rstrip() + '  ')
+        else:
+            # Remove all trailing whitespace
+            fixed_lines.append(line.rstrip())
+    
+    content = '\n'.join(fixed_lines)
+    
+    # Fix 2: Ensure single newline at end of file
+    if content and not content.endswith('\n'):
+        content += '\n'
+    elif content.endswith('\n\n'):
+        # Remove extra newlines, keep only one
+        content = content.rstrip('\n') + '\n'
+    
+    # Fix 3: Remove excessive blank lines (more than 2 consecutive)
+    content = re.sub(r'\n{3,}', '\n\n', content)
+    
+    return content
+
+def write_if_changed(file_path, content):
+    """Atomically write content to a file, skipping the write if the file already holds it"""
+    with span("write", file=str(file_path)):
+        path = Path(file_path)
+        if path.exists():
+            try:
+                with open(path, 'r', encoding='utf-8', newline='') as f:
+                    if f.read() == content:
+                        print(f"✓ Unchanged: {file_path}")
+                        REPORT.record_write(file_path, False)
+                        return False
+            except UnicodeDecodeError:
+                pass
+    
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+                f.write(content)
+            if path.exists():
+                os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+            else:
+                os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+    
+        print(f"✍️  Wrote: {file_path}")
+        REPORT.record_write(file_path, True)
+        return True
+
 def apply_formatting_fixes(file_path):
     """Apply formatting fixes to a markdown file (preserves markdown two-space line breaks)"""
     if not os.path.exists(file_path):
         return False
     
     try:
-        # Read file
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        original_content = content
-        
-        # Fix 1: Remove trailing whitespace from lines (preserve markdown two-space line breaks)
-        lines = content.splitlines()
-        fixed_lines = []
-        for line in lines:
-            # Preserve markdown two-space line breaks: exactly 2 spaces at end of non-blank line
-            if line.endswith('  ') and not line.endswith('   ') and line.strip():
-                # Line ends with exactly 2 spaces - preserve them
-                fixed_lines.append(line[:-2].rstrip() + '  ')
-            else:
-                # Remove all trailing whitespace
-                fixed_lines.append(line.rstrip())
-        
-        content = '\n'.join(fixed_lines)
-        
-        # Fix 2: Ensure single newline at end of file
-        if content and not content.endswith('\n'):
-            content += '\n'
-        elif content.endswith('\n\n'):
-            # Remove extra newlines, keep only one
-            content = content.rstrip('\n') + '\n'
-        
-        # Fix 3: Remove excessive blank lines (more than 2 consecutive)
-        content = re.sub(r'\n{3,}', '\n\n', content)
-        
-        # Write back if changed
-        if content != original_content:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+        content = read_file(file_path)
+        if write_if_changed(file_path, format_markdown(content)):
             print(f"✨ Applied formatting fixes to: {file_path}")
             return True
         else:
@@ -122,23 +196,40 @@ def apply_formatting_fixes(file_path):
         print(f"Error formatting {file_path}: {e}")
         return False
 
-def calculate_diff_percentage(file_path, current_commit_hash):
+def get_base_content(file_path):
     """
-    Calculate the percentage of lines changed in a file.
+    Get the source version the existing translation was produced from.
+    Uses the blob recorded in the lockfile, falling back to HEAD^ for files
+    translated before the lockfile existed. Returns (content, base description).
     """
-    try:
-        # Get base version using git
+    blob = LOCK.base_blob(file_path)
+    if blob:
+        base_content = read_blob(blob)
+        if base_content is not None:
+            return base_content, f"recorded blob {blob[:10]}"
+        print(f"  Recorded base {blob[:10]} for {file_path} is not available, falling back to HEAD^")
+    
+    with span("git.show", "git", file=file_path):
         result = subprocess.run(
             ['git', 'show', f'HEAD^:{file_path}'],
             capture_output=True,
             text=True,
             encoding='utf-8'
         )
-        
-        if result.returncode != 0:
+    if result.returncode != 0:
+        return None, None
+    return result.stdout, "HEAD^"
+
+def calculate_diff_percentage(file_path):
+    """
+    Calculate the percentage of lines changed in a file since it was last translated.
+    """
+    try:
+        base_content, base_ref = get_base_content(file_path)
+        if base_content is None:
             return None, None, None, None
+        print(f"  Diffing {file_path} against {base_ref}")
         
-        base_content = result.stdout
         current_content = read_file(file_path)
         
         # Calculate diff
@@ -165,6 +256,39 @@ def calculate_diff_percentage(file_path, current_commit_hash):
         print(f"Error calculating diff: {e}")
         return None, None, None, None
 
+def needs_content_detection(file_path):
+    """Whether a file's language can only be found by reading it"""
+    name = Path(file_path).name
+    return name.endswith('.md') and not name.endswith('.en.md') and not name.endswith('.ja.md')
+
+@traced("detection.batch")
+def detect_file_languages(files):
+    """Detect the language of every file that needs it with one batched request"""
+    ambiguous = [f for f in files if needs_content_detection(f) and os.path.exists(f)
+                 and os.path.normpath(f) not in DETECTED_LANGUAGES]
+    if not ambiguous:
+        return
+    print(f"Detecting language of {len(ambiguous)} files in one batch")
+    languages = detect_languages([read_file(f) for f in ambiguous])
+    for file_path, language in zip(ambiguous, languages):
+        DETECTED_LANGUAGES[os.path.normpath(file_path)] = language
+
+def detect_content_language(file_path):
+    """Language of a file's content, using the batch results when available"""
+    cached = DETECTED_LANGUAGES.get(os.path.normpath(file_path))
+    if cached:
+        return cached
+    return detect_language(read_file(file_path))
+
+def language_from_name(file_path):
+    """Language a file name states explicitly, or None"""
+    name = Path(file_path).name
+    if name.endswith('.ja.md'):
+        return "ja"
+    if name.endswith('.en.md'):
+        return "en"
+    return None
+
 def get_file_language(file_path):
     """Determine language based on file extension convention"""
     path = Path(file_path)
@@ -172,8 +296,7 @@ def get_file_language(file_path):
     # Special case for README.md - detect language from content
     if path.name == "README.md":
         if path.exists():
-            content = read_file(file_path)
-            return detect_language(content)
+            return detect_content_language(file_path)
         return "en"  # Default README to English
     
     # Check for explicit language extensions
@@ -184,9 +307,7 @@ def get_file_language(file_path):
     elif path.name.endswith('.md'):
         # For other .md files, detect language and rename
         if path.exists():
-            content = read_file(file_path)
-            detected_lang = detect_language(content)
-            return detected_lang
+            return detect_content_language(file_path)
         return "en"  # Default to English
     else:
         return None
@@ -233,8 +354,7 @@ def rename_ambiguous_md_file(file_path):
         return file_path
     
     if path.name.endswith('.md'):
-        content = read_file(file_path)
-        detected_lang = detect_language(content)
+        detected_lang = detect_content_language(file_path)
         
         # Create new name with explicit language
         stem = path.stem
@@ -244,6 +364,7 @@ def rename_ambiguous_md_file(file_path):
         # Rename the file
         print(f"Renaming {file_path} to {new_path} (detected: {detected_lang})")
         os.rename(file_path, new_path)
+        REPORT.record_rename(file_path, new_path)
         return str(new_path)
     
     return file_path
@@ -253,12 +374,13 @@ BOT_AUTHORS = ['rimo-translation-bot[bot]', 'github-actions[bot]']
 def was_edited_by_bot(file_path):
     """Check if the last commit to a file was made by the translation bot"""
     try:
-        result = subprocess.run(
-            ['git', 'log', '-1', '--pretty=%an', '--', str(file_path)],
-            capture_output=True,
-            text=True,
-            encoding='utf-8'
-        )
+        with span("git.log", "git", file=str(file_path)):
+            result = subprocess.run(
+                ['git', 'log', '-1', '--pretty=%an', '--', str(file_path)],
+                capture_output=True,
+                text=True,
+                encoding='utf-8'
+            )
         if result.returncode == 0:
             last_author = result.stdout.strip()
             is_bot = last_author in BOT_AUTHORS
@@ -367,77 +489,174 @@ def sync_translations(original_file, ignore_patterns):
         return False
     
     # Check if file should be ignored
-    if should_ignore_file(original_file, ignore_patterns):
+    with span("ignore", file=original_file):
+        ignored = should_ignore_file(original_file, ignore_patterns)
+    if ignored:
         print(f"⏭️  Skipping translation for {original_file} (matched ignore pattern)")
         return False
     
     # First, handle .md file renaming if needed
-    processed_file = rename_ambiguous_md_file(original_file)
-    
-    source_lang = get_file_language(processed_file)
+    with span("detection", file=original_file):
+        processed_file = rename_ambiguous_md_file(original_file)
+        source_lang = get_file_language(processed_file)
     if not source_lang:
         print(f"Cannot determine language for {processed_file}, skipping")
         return False
     
     content = read_file(processed_file)
+    source_blob = blob_hash(processed_file)
     target_langs = [lang for lang in TARGET_LANGUAGES if lang != source_lang]
     
     # Calculate diff percentage for incremental translation decision
-    diff_pct, line_count, changed_lines, base_content = calculate_diff_percentage(processed_file, 'HEAD')
+    with span("diff", file=processed_file):
+        diff_pct, line_count, changed_lines, base_content = calculate_diff_percentage(processed_file)
     
     
     translated = False
+    translated_targets = {}
     for lang in target_langs:
         translated_file = get_translated_path(original_file, lang)
         translated_file.parent.mkdir(parents=True, exist_ok=True)
         
-        # Determine if incremental mode should be used
-        use_incremental = False
+        # An interrupted earlier run already translated this version of the source
+        journaled = JOURNAL.finished(processed_file, source_blob, translated_file)
+        if journaled is not None:
+            print(f"↻ Reusing the journaled translation of {processed_file} ({lang})")
+            write_if_changed(translated_file, journaled)
+            JOURNAL.resumed += 1
+            translated_targets[lang] = translated_file
+            translated = True
+            continue
         
+        # Let the cost model pick between incremental and full translation
+        existing_translation = read_file(str(translated_file)) if translated_file.exists() else None
+        decision = get_cost_model().choose_strategy(
+            content, base_content, existing_translation, line_count, changed_lines,
+            TRANSLATION_MODEL, INCREMENTAL_MODEL
+        )
+        REPORT.record_decision(processed_file, lang, decision)
+        if not SCHEDULER.admit(processed_file, decision["options"][decision["strategy"]], CALL_STATS, get_cost_model()):
+            break
+        use_incremental = decision["strategy"] == "incremental"
         
-        if (diff_pct is not None and 
-            diff_pct < DIFF_THRESHOLD_PERCENT and
-            changed_lines is not None and
-            line_count < LINE_COUNT_THRESHOLD and
-            translated_file.exists()):
-            use_incremental = True
+        if use_incremental:
             print(f"  ✓ Decision: USE INCREMENTAL MODE")
         else:
             print(f"  ✗ Decision: USE FULL TRANSLATION MODE")
-            if diff_pct is None:
-                print(f"    Reason: diff_pct is None (git diff failed or first commit)")
-            elif diff_pct >= DIFF_THRESHOLD_PERCENT:
-                print(f"    Reason: diff_pct ({diff_pct:.1f}%) >= threshold ({DIFF_THRESHOLD_PERCENT}%)")
-            elif line_count >= LINE_COUNT_THRESHOLD:
-                print(f"    Reason: line_count ({line_count}) >= threshold ({LINE_COUNT_THRESHOLD})")
-            elif not translated_file.exists():
-                print(f"    Reason: translated file does not exist")
+        print(f"    Reason: {decision['reason']}")
         
         # Translate based on mode
-        if use_incremental:
-            print(f"Using incremental translation for {original_file} (diff: {diff_pct:.1f}%, changed: {changed_lines} lines)")
-            existing_translation = read_file(str(translated_file))     
-            translated_content = translate_incremental(base_content, content, existing_translation, lang)
-            
-            # Fall back to full translation if incremental fails
-            if not translated_content:
-                print(f"Incremental translation failed, falling back to full translation")
+        with span("translation", file=processed_file, lang=lang, strategy=decision["strategy"]):
+            if use_incremental:
+                print(f"Using incremental translation for {original_file} (diff: {diff_pct:.1f}%, changed: {changed_lines} lines)")
+                translated_content = translate_incremental(base_content, content, existing_translation, lang)
+                
+                # Fall back to full translation if incremental fails
+                if not translated_content:
+                    print(f"Incremental translation failed, falling back to full translation")
+                    translated_content = translate_text(content, lang)
+            else:
+                print(f"Using full translation for {original_file}")
                 translated_content = translate_text(content, lang)
-        else:
-            print(f"Using full translation for {original_file}")
-            translated_content = translate_text(content, lang)
         
         if translated_content:
-            # Write translated content first
-            translated_file.write_text(translated_content, encoding='utf-8')
-            
-            # Apply formatting fixes to the newly written file
-            apply_formatting_fixes(str(translated_file))
+            # Retranslate just the parts whose structure no longer matches the source
+            with span("validation", file=processed_file, lang=lang):
+                translated_content = repair_translation(content, translated_content, lang)
+            # Format in memory and only touch the file if the result differs
+            formatted = format_markdown(translated_content)
+            write_if_changed(translated_file, formatted)
+            JOURNAL.record(processed_file, source_blob, translated_file, formatted)
+            translated_targets[lang] = translated_file
             
             translated = True
     
+    if translated_targets:
+        LOCK.record(processed_file, source_lang, translated_targets)
+    
     return translated
 
+def bulk_translate(markdown_files, ignore_patterns):
+    """Translate many files at once through the Batch API (full translation only)"""
+    jobs = []
+    targets = {}
+    translated_files = {}
+    for file in markdown_files:
+        if not os.path.exists(file) or should_ignore_file(file, ignore_patterns):
+            continue
+        # Skip files this run is already going to overwrite as a translation
+        if os.path.normpath(file) in targets:
+            print(f"Skipping {file} (it is the translation target of another file)")
+            continue
+
+        processed_file = rename_ambiguous_md_file(file)
+        source_lang = get_file_language(processed_file)
+        if not source_lang:
+            print(f"Cannot determine language for {processed_file}, skipping")
+            continue
+
+        content = read_file(processed_file)
+        source_blob = blob_hash(processed_file)
+        pending_langs = []
+        for lang in TARGET_LANGUAGES:
+            if lang == source_lang:
+                continue
+            translated_file = get_translated_path(file, lang)
+            journaled = JOURNAL.finished(processed_file, source_blob, translated_file)
+            if journaled is None:
+                pending_langs.append(lang)
+                continue
+            print(f"↻ Reusing the journaled translation of {processed_file} ({lang})")
+            write_if_changed(translated_file, journaled)
+            JOURNAL.resumed += 1
+            translated_files.setdefault((processed_file, source_lang), {})[lang] = os.path.normpath(str(translated_file))
+            targets[os.path.normpath(str(translated_file))] = None
+        if not pending_langs:
+            continue
+
+        content_tokens = estimate_tokens(content)
+        # Batch results arrive all at once, so only tokens and cost count against the budget here
+        estimate = dict(get_cost_model().estimate(TRANSLATION_MODEL, content_tokens + FULL_PROMPT_OVERHEAD, content_tokens),
+                        latency_seconds=0)
+        if not SCHEDULER.admit(processed_file, estimate, CALL_STATS, get_cost_model(), reserve=True):
+            continue
+        SCHEDULER.complete(file)
+        for lang in pending_langs:
+            translated_file = get_translated_path(file, lang)
+            custom_id = f"file-{len(jobs)}"
+            jobs.append((custom_id, content, lang))
+            targets[os.path.normpath(str(translated_file))] = (custom_id, processed_file, source_blob, source_lang, content, lang)
+
+    results = {}
+    if jobs:
+        print(f"Submitting {len(jobs)} translations as one batch")
+        # Only bulk runs need the Batch API client
+        from utils.batch_translation import translate_batch
+        with span("translation.batch", jobs=len(jobs)):
+            results = translate_batch(jobs)
+
+    for translated_path, job in targets.items():
+        if job is None:
+            continue
+        custom_id, file, source_blob, source_lang, content, lang = job
+        translated_content = results.get(custom_id)
+        if not translated_content:
+            print(f"No batch result for {file} ({lang}), falling back to synchronous translation")
+            translated_content = translate_text(content, lang)
+        if translated_content:
+            with span("validation", file=file, lang=lang):
+                translated_content = repair_translation(content, translated_content, lang)
+            formatted = format_markdown(translated_content)
+            write_if_changed(translated_path, formatted)
+            JOURNAL.record(file, source_blob, translated_path, formatted)
+            translated_files.setdefault((file, source_lang), {})[lang] = translated_path
+
+    for (file, source_lang), translated_targets in translated_files.items():
+        LOCK.record(file, source_lang, translated_targets)
+
+    return len(translated_files)
+
+@traced("discovery")
 def find_markdown_files(ignore_patterns):
     """Find all markdown files in project, respecting ignore patterns"""
     markdown_files = []
@@ -457,35 +676,175 @@ def find_markdown_files(ignore_patterns):
     
     return markdown_files
 
-def process_specific_files(file_list, ignore_patterns):
-    """Process specific files with simultaneous edit detection"""
-    if not file_list:
-        return []
-    
+def commit_progress(push=False):
+    """Commit (and optionally push) the translations written so far, so a cancelled run keeps them"""
+    if LOCK.dirty:
+        write_if_changed(LOCK_FILE, LOCK.dumps())
+    paths = REPORT.changed_paths()
+    existing = [p for p in paths if os.path.exists(p)]
+    removed = [p for p in paths if not os.path.exists(p)]
+    with span("git.commit", "git", paths=len(paths)):
+        if existing:
+            subprocess.run(['git', 'add', '-A', '--'] + existing, check=False)
+        if removed:
+            subprocess.run(['git', 'rm', '-q', '--cached', '--ignore-unmatch', '--'] + removed, check=False)
+        if subprocess.run(['git', 'diff', '--cached', '--quiet']).returncode == 0:
+            return False
+        result = subprocess.run(['git', 'commit', '-q', '-m', "Update markdown translations (partial)"], check=False)
+        if result.returncode != 0:
+            print("Could not commit translation progress, continuing")
+            return False
+        print(f"💾 Committed translation progress ({len(paths)} paths so far)")
+        if push:
+            branch = push_branch()
+            if not branch:
+                print("Not on a branch, will push translation progress at the end")
+                return True
+            if subprocess.run(['git', 'pull', '-q', '--rebase', 'origin', branch], check=False).returncode != 0:
+                subprocess.run(['git', 'rebase', '--abort'], check=False)
+                print("Could not rebase translation progress onto the remote, will push at the end")
+                return True
+            if subprocess.run(['git', 'push', '-q', 'origin', f'HEAD:{branch}'], check=False).returncode != 0:
+                print("Could not push translation progress, will push at the end")
+    return True
+
+def push_branch():
+    """The branch progress commits go to: the checked-out one, or on a detached checkout the one the workflow runs for"""
+    result = subprocess.run(['git', 'symbolic-ref', '-q', '--short', 'HEAD'], capture_output=True, text=True)
+    if result.returncode == 0 and result.stdout.strip():
+        return result.stdout.strip()
+    return env("GITHUB_HEAD_REF") or env("GITHUB_REF_NAME") or None
+
+def translate_in_priority_order(markdown_files, ignore_patterns, commit_every=None, push=False):
+    """
+    Translate files in scheduler order, deferring whatever the run's budget does not cover.
+    With `commit_every`, commit the progress after that many translated files.
+    """
+    processed_count = 0
+    for file in SCHEDULER.order(markdown_files, ignore_patterns):
+        if SCHEDULER.out_of_time():
+            SCHEDULER.defer(file, "time (run limit reached)")
+            continue
+        with span("file", file=file):
+            if sync_translations(file, ignore_patterns):
+                processed_count += 1
+                if commit_every and processed_count % commit_every == 0:
+                    commit_progress(push)
+        SCHEDULER.complete(file)
+    return processed_count
+
+def process_specific_files(file_list, ignore_patterns, settled=()):
+    """Process specific files with simultaneous edit detection.
+    `settled` are files whose translation was carried over by a pure rename."""
     files = [f.strip() for f in file_list.split(',') if f.strip().endswith('.md')]
+    if settled:
+        for file in files:
+            if os.path.normpath(file) in settled:
+                print(f"Skipping {file} (moved without changes, translation moved with it)")
+        files = [f for f in files if os.path.normpath(f) not in settled]
+    if not files and not SCHEDULER.pending:
+        return []
     
     # Check for simultaneous edits
-    skip_files = check_simultaneous_edits(files)
+    with span("simultaneous_edits", files=len(files)):
+        skip_files = check_simultaneous_edits(files)
     
     if skip_files:
         print(f"Skipping translation for simultaneously edited files: {skip_files}")
     
+    # Files deferred by an earlier run come first
+    ordered = SCHEDULER.order(files, ignore_patterns)
+    detect_file_languages([f for f in ordered if f not in skip_files])
+    
     # Process files that weren't simultaneously edited
     processed = []
-    for file in files:
+    for file in ordered:
         if file in skip_files:
             print(f"Skipping {file} due to simultaneous edit")
             continue
             
+        if SCHEDULER.out_of_time():
+            SCHEDULER.defer(file, "time (run limit reached)")
+            continue
+            
         if os.path.exists(file):
             print(f"Processing specific file: {file}")
-            if sync_translations(file, ignore_patterns):
-                processed.append(file)
+            with span("file", file=file):
+                if sync_translations(file, ignore_patterns):
+                    processed.append(file)
         else:
             print(f"File not found: {file}")
+        SCHEDULER.complete(file)
     
     return processed
 
+def find_renames(base_ref):
+    """Markdown renames and copies between base_ref and HEAD, as (kind, similarity, old path, new path)"""
+    with span("git.diff", "git", base_ref=base_ref):
+        result = subprocess.run(
+            ['git', 'diff', '-z', '--name-status', '-M', '-C', '--diff-filter=RC', f'{base_ref}...HEAD'],
+            capture_output=True,
+            text=True,
+            encoding='utf-8'
+        )
+    if result.returncode != 0:
+        print(f"Could not detect renames against {base_ref}: {result.stderr.strip()}")
+        return []
+    
+    fields = result.stdout.split('\0')
+    renames = []
+    for i in range(0, len(fields) - 2, 3):
+        status, old_path, new_path = fields[i:i + 3]
+        if old_path.endswith('.md') and new_path.endswith('.md'):
+            renames.append((status[0], int(status[1:] or 0), old_path, new_path))
+    return renames
+
+@traced("renames")
+def carry_translations_over(renames, base_ref, ignore_patterns):
+    """
+    Move (or, for copies, duplicate) existing translations along with renamed source documents.
+    Returns the normalized new paths that need no translation at all: pure
+    moves whose translation is now in place.
+    """
+    settled = set()
+    for kind, similarity, old_path, new_path in renames:
+        if not os.path.exists(new_path) or should_ignore_file(new_path, ignore_patterns):
+            continue
+        source_lang = get_file_language(new_path)
+        if not source_lang:
+            continue
+        
+        targets = {}
+        for lang in TARGET_LANGUAGES:
+            if lang == source_lang:
+                continue
+            old_translation = get_translated_path(old_path, lang)
+            new_translation = get_translated_path(new_path, lang)
+            if (old_translation.exists() and not new_translation.exists()
+                    and os.path.normpath(str(old_translation)) != os.path.normpath(new_path)):
+                new_translation.parent.mkdir(parents=True, exist_ok=True)
+                if kind == 'R':
+                    print(f"Moving translation {old_translation} -> {new_translation} ({old_path} was renamed)")
+                    os.replace(old_translation, new_translation)
+                    REPORT.record_rename(old_translation, new_translation)
+                else:
+                    print(f"Copying translation {old_translation} -> {new_translation} ({old_path} was copied)")
+                    shutil.copyfile(old_translation, new_translation)
+                    REPORT.record_write(new_translation, True)
+            if new_translation.exists():
+                targets[lang] = new_translation
+        
+        if not targets:
+            continue
+        LOCK.move(old_path, new_path, source_lang, targets,
+                  fallback_blob=blob_at(base_ref, old_path), keep_old=(kind == 'C'))
+        if similarity == 100 and len(targets) == len(TARGET_LANGUAGES) - 1:
+            settled.add(os.path.normpath(new_path))
+        else:
+            print(f"  {new_path} changed while moving ({similarity}% similar), it will be updated against the moved translation")
+    return settled
+
+@traced("deletions")
 def delete_translated_files(deleted_files):
     """Delete corresponding translated files"""
     if not deleted_files:
@@ -503,11 +862,13 @@ def delete_translated_files(deleted_files):
             if readme_ja.exists():
                 print(f"Deleting translated file: {readme_ja}")
                 os.remove(readme_ja)
+                REPORT.record_delete(readme_ja)
+            LOCK.remove(file)
             continue
         
-        source_lang = get_file_language(file)
-        if not source_lang:
-            continue
+        # The file is gone, so its language comes from the lockfile or its name
+        entry = LOCK.get(file)
+        source_lang = (entry or {}).get("source_lang") or language_from_name(file) or "en"
             
         # Delete corresponding translation
         target_lang = "ja" if source_lang == "en" else "en"
@@ -516,19 +877,285 @@ def delete_translated_files(deleted_files):
         if translated_path.exists():
             print(f"Deleting translated file: {translated_path}")
             os.remove(translated_path)
+            REPORT.record_delete(translated_path)
+        LOCK.remove(file)
+
+@traced("check")
+def check_translations(ignore_patterns, changed_files=None):
+    """
+    Compare translations against the lockfile without translating anything.
+    
+    Returns {"stale": [...], "missing": [...], "orphaned": [...], "unverified": [...]}:
+    - stale: the source changed since its translation was produced
+    - missing: a source document has no translation
+    - orphaned: a translation whose source no longer exists
+    - unverified: a pair with no lockfile entry, so freshness cannot be checked
+    `changed_files` (the files changed in a PR) lets pairs whose two sides were
+    both edited by hand count as updated together.
+    """
+    results = {"stale": [], "missing": [], "orphaned": [], "unverified": []}
+    files = {os.path.normpath(f) for f in find_markdown_files(ignore_patterns)}
+    edited_together = set()
+    if changed_files:
+        edited_together = {os.path.normpath(f) for f in check_simultaneous_edits(changed_files)}
+    covered = set()
+    
+    for source, entry in sorted(LOCK.documents.items()):
+        if should_ignore_file(source, ignore_patterns):
+            continue
+        covered.add(os.path.normpath(source))
+        source_exists = os.path.exists(source)
+        for lang, target in sorted(entry.get("targets", {}).items()):
+            covered.add(os.path.normpath(target))
+            if not source_exists:
+                if os.path.exists(target):
+                    results["orphaned"].append({"path": target, "source": source})
+            elif not os.path.exists(target):
+                results["missing"].append({"path": target, "source": source})
+            elif (blob_hash(source) != entry.get("source_blob")
+                    and os.path.normpath(source) not in edited_together):
+                results["stale"].append({"path": target, "source": source})
+    
+    for file_path in sorted(files - covered):
+        if file_path in covered:
+            continue
+        path = Path(file_path)
+        covered.add(file_path)
+        if path.name in ("README.ja.md", "README.en.md"):
+            source = path.parent / "README.md"
+            if not source.exists():
+                results["orphaned"].append({"path": file_path, "source": str(source)})
+            continue
+        
+        lang = language_from_name(file_path)
+        if lang:
+            candidates = [get_translated_path(file_path, "ja" if lang == "en" else "en")]
+        else:
+            # README.md or a plain .md file whose language is only known from its content
+            candidates = [get_translated_path(file_path, target) for target in TARGET_LANGUAGES]
+            candidates = [c for c in candidates if os.path.normpath(str(c)) != file_path]
+        existing = [c for c in candidates if c.exists()]
+        if existing:
+            covered.update(os.path.normpath(str(c)) for c in existing)
+            results["unverified"].append({"path": str(existing[0]), "source": file_path})
+        else:
+            results["missing"].append({"path": str(candidates[0]), "source": file_path})
+    
+    return results
+
+def print_check_results(results):
+    labels = [
+        ("stale", "❌ Stale (source changed since it was translated)"),
+        ("missing", "❌ Missing translation"),
+        ("orphaned", "❌ Orphaned (source no longer exists)"),
+        ("unverified", "⚠️  Not in lockfile, cannot verify")
+    ]
+    for key, label in labels:
+        if results[key]:
+            print(f"{label}:")
+            for item in results[key]:
+                print(f"   {item['path']} (source: {item['source']})")
+    failures = sum(len(results[key]) for key in ("stale", "missing", "orphaned"))
+    if failures:
+        print(f"\n{failures} translations need updating")
+    else:
+        print("✅ All translations are up to date")
+    return failures
+
+# Quiet period after the last save of a file before it is retranslated
+WATCH_DEBOUNCE_SECONDS = 0.3
 
-def main():
+@traced("translation")
+def translate_saved_changes(base_content, content, existing_translation, target_lang):
+    """Translate only what changed since base_content, reusing the rest of existing_translation"""
+    if base_content is None or not existing_translation:
+        return translate_text(content, target_lang)
+    
+    base_paragraphs = split_paragraphs(base_content)
+    translated_paragraphs = split_paragraphs(existing_translation)
+    if len(base_paragraphs) == len(translated_paragraphs):
+        previous = (translated_paragraphs, [paragraph_hash(p) for p in base_paragraphs])
+        return translate_with_reuse(content, target_lang, previous, attach_map=False)
+    
+    print(f"  Translation does not line up paragraph by paragraph, using incremental translation")
+    return translate_incremental(base_content, content, existing_translation, target_lang) or translate_text(content, target_lang)
+
+def retranslate_saved_file(file_path, ignore_patterns, last_versions):
+    """
+    Update the paired translation of a file that was just saved.
+    `last_versions` maps each file to the content last translated from or
+    written to it, which serves as the incremental base and lets the
+    watcher recognise its own writes.
+    """
+    key = os.path.normpath(file_path)
+    if not os.path.exists(file_path) or not file_path.endswith('.md') or should_ignore_file(file_path, ignore_patterns):
+        return
+    content = read_file(file_path)
+    if last_versions.get(key) == content:
+        return
+    
+    source_lang = get_file_language(file_path)
+    if not source_lang:
+        return
+    base_content = last_versions[key] if key in last_versions else get_base_content(file_path)[0]
+    
+    translated_targets = {}
+    for lang in TARGET_LANGUAGES:
+        if lang == source_lang:
+            continue
+        translated_file = get_translated_path(file_path, lang)
+        existing_translation = read_file(str(translated_file)) if translated_file.exists() else None
+        started = time.monotonic()
+        translated_content = translate_saved_changes(base_content, content, existing_translation, lang)
+        if not translated_content:
+            print(f"Translation of {file_path} failed, will retry on the next save")
+            return
+        formatted = format_markdown(translated_content)
+        write_if_changed(translated_file, formatted)
+        last_versions[os.path.normpath(str(translated_file))] = formatted
+        translated_targets[lang] = translated_file
+        print(f"🔁 {file_path} -> {translated_file} in {time.monotonic() - started:.1f}s")
+    
+    last_versions[key] = content
+    if translated_targets:
+        LOCK.record(file_path, source_lang, translated_targets)
+        write_if_changed(LOCK_FILE, LOCK.dumps())
+
+def watch(ignore_patterns):
+    """Retranslate markdown files as they are saved, until interrupted"""
+    def skip_dir(path):
+        return any(part.startswith('.') for part in Path(path).parts) or should_ignore_file(path, ignore_patterns)
+    
+    watcher = create_watcher('.', skip_dir)
+    last_versions = {}
+    saved = {}
+    print(f"👀 Watching markdown files for changes (Ctrl+C to stop)")
+    try:
+        while True:
+            for path in watcher.poll(WATCH_DEBOUNCE_SECONDS if saved else 1.0):
+                if path.endswith('.md') and not skip_dir(os.path.dirname(path)):
+                    saved[path] = time.monotonic()
+            now = time.monotonic()
+            for path in [p for p, t in saved.items() if now - t >= WATCH_DEBOUNCE_SECONDS]:
+                del saved[path]
+                try:
+                    retranslate_saved_file(path, ignore_patterns, last_versions)
+                except Exception as e:
+                    print(f"Error translating {path}: {e}")
+    except KeyboardInterrupt:
+        print("Stopped watching")
+    finally:
+        watcher.close()
+
+def merge_shard_reports(report_paths):
+    """
+    Combine the reports of a sharded run into this run's report and the lockfile.
+    The shards' translated files must already be in the working tree; sources
+    they renamed or deleted are removed here.
+    """
+    for path in report_paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                REPORT.absorb(json.load(f))
+            print(f"Merged shard report {path}")
+        except (OSError, ValueError) as e:
+            print(f"Could not read shard report {path}: {e}")
+
+    for old_path in [old for old, _ in REPORT.renamed] + REPORT.deleted:
+        if os.path.exists(old_path):
+            print(f"Removing {old_path} (renamed or deleted by a shard)")
+            os.remove(old_path)
+
+    LOCK.apply_updates(REPORT.lock_updates)
+    if LOCK.dirty:
+        write_if_changed(LOCK_FILE, LOCK.dumps())
+
+    usage = REPORT.usage
+    print(f"\n{'='*60}")
+    print(f"📊 Merged {len(report_paths)} shard reports:")
+    print(f"   ✍️  Written: {len(REPORT.written)} files ({len(REPORT.unchanged)} unchanged)")
+    print(f"   🗑️  Deleted: {len(REPORT.deleted)} files")
+    print(f"   ⏸️  Deferred: {len(REPORT.deferred)} files")
+    print(f"   🔢 API calls: {usage.get('calls', 0)} ({usage.get('prompt_tokens', 0)} prompt / {usage.get('completion_tokens', 0)} completion tokens)")
+    print(f"{'='*60}")
+
+def main(argv=None):
     parser = argparse.ArgumentParser(description='Translate markdown files for PR events')
     parser.add_argument('--initial-setup', action='store_true', help='Perform initial setup translation')
     parser.add_argument('--files', type=str, help='Comma-separated list of files to translate')
     parser.add_argument('--deleted-files', type=str, help='Comma-separated list of deleted files')
-    args = parser.parse_args()
+    parser.add_argument('--check', action='store_true', help='Report stale, missing and orphaned translations without translating; exits 1 if any')
+    parser.add_argument('--watch', action='store_true', help='Keep running and retranslate markdown files as they are saved')
+    parser.add_argument('--base-ref', type=str, help='Detect renamed and copied files against this ref and carry their translations over')
+    parser.add_argument('--bulk', action='store_true', help='Translate a full-repository run through the OpenAI Batch API')
+    parser.add_argument('--report', type=str, help='Write a JSON report of what this run changed to this path')
+    parser.add_argument('--changed-list', type=str, help='Write the paths this run changed, one per line, to this path')
+    parser.add_argument('--max-seconds', type=float, help='Stop starting new translations after this many seconds (env: TRANSLATION_MAX_SECONDS)')
+    parser.add_argument('--max-tokens', type=float, help='Token budget for this run (env: TRANSLATION_MAX_TOKENS)')
+    parser.add_argument('--max-cost', type=float, help='Budget for this run in USD (env: TRANSLATION_MAX_COST)')
+    parser.add_argument('--shard', type=str, help='Translate only shard INDEX/COUNT (e.g. 2/4) of a full-repository run; language pairs stay together')
+    parser.add_argument('--merge-reports', type=str, nargs='+', metavar='REPORT', help='Combine the --report files of a sharded run into the lockfile and one report')
+    parser.add_argument('--commit-every', type=int, metavar='N', help='Commit the translations written so far after every N translated files of a full-repository run')
+    parser.add_argument('--push', action='store_true', help='Push each --commit-every commit as well')
+    parser.add_argument('--trace', type=str, help='Write a Chrome trace of the run\'s phases to this path, for Perfetto (env: BILINGUAL_TRACE)')
+    args = parser.parse_args(argv)
+
+    enable_tracing(args.trace)
+
+    shard = None
+    if args.shard:
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(f"--shard: {e}")
+        if args.files is not None or args.deleted_files or args.base_ref or args.check or args.watch:
+            parser.error("--shard splits full-repository runs and cannot be combined with "
+                         "--files, --deleted-files, --base-ref, --check or --watch")
+    if args.commit_every is not None and args.commit_every < 1:
+        parser.error("--commit-every must be at least 1")
+    if args.commit_every and (shard or args.bulk):
+        parser.error("--commit-every cannot be combined with --shard or --bulk")
+
+    start_run(read_only=args.check)
+
+    if args.merge_reports:
+        merge_shard_reports(args.merge_reports)
+        if args.report:
+            REPORT.write_json(args.report)
+        if args.changed_list:
+            REPORT.write_changed_list(args.changed_list)
+        return
 
     # Load ignore patterns
     ignore_patterns = load_ignore_patterns()
     print(f"📋 Using {len(ignore_patterns)} ignore patterns")
     print(f"   Patterns: {', '.join(ignore_patterns[:5])}{'...' if len(ignore_patterns) > 5 else ''}")
 
+    if args.check:
+        changed = [f.strip() for f in (args.files or "").split(',') if f.strip().endswith('.md')]
+        results = check_translations(ignore_patterns, changed)
+        if args.report:
+            with open(args.report, 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+        sys.exit(1 if print_check_results(results) else 0)
+
+    SCHEDULER.set_limits(args.max_seconds, args.max_tokens, args.max_cost)
+    if SCHEDULER.max_seconds is not None:
+        # Requests still running when the time budget ends are cut off rather than waited for
+        set_deadline(SCHEDULER.max_seconds)
+
+    if args.watch:
+        watch(ignore_patterns)
+        return
+
+    # Move translations along with renamed files before anything is deleted or retranslated
+    settled = set()
+    if args.base_ref:
+        renames = find_renames(args.base_ref)
+        if renames:
+            print(f"Found {len(renames)} renamed or copied markdown files since {args.base_ref}")
+            settled = carry_translations_over(renames, args.base_ref, ignore_patterns)
+
     # Handle deleted files first
     if args.deleted_files:
         print(f"Deleting translated files for: {args.deleted_files}")
@@ -540,36 +1167,82 @@ def main():
     # Process translations
     if args.initial_setup:
         print("Performing initial setup translation")
-        markdown_files = find_markdown_files(ignore_patterns)
-        if not markdown_files:
+        markdown_files = [f for f in find_markdown_files(ignore_patterns) if os.path.normpath(f) not in settled]
+        if shard:
+            markdown_files = select_shard(markdown_files, *shard)
+            SCHEDULER.restrict(markdown_files)
+        elif not markdown_files:
             print("No markdown files found to translate")
             return
         
         print(f"Found {len(markdown_files)} markdown files to process (after filtering)")
-        for file in markdown_files:
-            if sync_translations(file, ignore_patterns):
-                processed_count += 1
+        detect_file_languages(markdown_files)
+        if not markdown_files:
+            processed_count = 0
+        elif args.bulk:
+            processed_count = bulk_translate(SCHEDULER.order(markdown_files, ignore_patterns), ignore_patterns)
+        else:
+            processed_count = translate_in_priority_order(markdown_files, ignore_patterns, args.commit_every, args.push)
             
-    elif args.files:
+    elif args.files is not None or args.deleted_files:
         print(f"Processing specific files: {args.files}")
-        processed = process_specific_files(args.files, ignore_patterns)
+        processed = process_specific_files(args.files or "", ignore_patterns, settled)
         processed_count = len(processed)
     else:
-        markdown_files = find_markdown_files(ignore_patterns)
-        if not markdown_files:
+        markdown_files = [f for f in find_markdown_files(ignore_patterns) if os.path.normpath(f) not in settled]
+        if shard:
+            markdown_files = select_shard(markdown_files, *shard)
+            SCHEDULER.restrict(markdown_files)
+        elif not markdown_files:
             print("No markdown files found to translate")
             return
             
         print(f"Found {len(markdown_files)} markdown files to process (after filtering)")
-        for file in markdown_files:
-            if sync_translations(file, ignore_patterns):
-                processed_count += 1
+        detect_file_languages(markdown_files)
+        processed_count = translate_in_priority_order(markdown_files, ignore_patterns, args.commit_every, args.push)
     
     # Print summary
     print(f"\n{'='*60}")
     print(f"📊 Translation Summary:")
     print(f"   ✅ Processed: {processed_count} files")
+    print(f"   ✍️  Written: {len(REPORT.written)} files ({len(REPORT.unchanged)} unchanged)")
+    print(f"   🗑️  Deleted: {len(REPORT.deleted)} files")
+    print(f"   ⏸️  Deferred: {len(SCHEDULER.deferred)} files")
+    if JOURNAL.resumed:
+        print(f"   ↻ Reused from the journal: {JOURNAL.resumed} translations")
+    usage = summarize_calls(CALL_STATS)
+    REPORT.record_usage(usage)
+    print(f"   🔢 API calls: {usage['calls']} ({usage['prompt_tokens']} prompt / {usage['completion_tokens']} completion tokens)")
+    print(f"   ♻️  Cached prompt tokens: {usage['cached_tokens']} ({usage['cache_hit_calls']} calls hit the prompt cache)")
+    if usage['avg_seconds_cache_hit'] is not None and usage['avg_seconds_cache_miss'] is not None:
+        print(f"      Average latency: {usage['avg_seconds_cache_hit']}s with cache hit, {usage['avg_seconds_cache_miss']}s without")
+    if usage['hedged_calls']:
+        print(f"   🏁 Hedged requests: {usage['hedged_calls']} (sent twice after a slow first response)")
     print(f"{'='*60}")
 
+    REPORT.record_lock_updates(LOCK.updates)
+    if LOCK.dirty:
+        if shard:
+            # Shards would overwrite each other's lockfile; the merge step applies these updates
+            print(f"Lockfile updates of shard {shard[0]}/{shard[1]} are in the report (apply them with --merge-reports)")
+        else:
+            write_if_changed(LOCK_FILE, LOCK.dumps())
+
+    cost_model = get_cost_model()
+    cost_model.learn_from_calls(CALL_STATS)
+    cost_model.save()
+
+    for file, reason in SCHEDULER.deferred:
+        REPORT.record_defer(file, reason)
+    SCHEDULER.save()
+    # A run that finished everything has nothing left to resume
+    if not SCHEDULER.deferred:
+        JOURNAL.clear()
+
+    if args.report:
+        REPORT.write_json(args.report)
+    if args.changed_list:
+        REPORT.write_changed_list(args.changed_list)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,175 @@
+import os
+import json
+import time
+import tempfile
+import requests
+
+from utils.config import env
+from utils.translation import openai_base_url, build_translation_payload, require_api_key, remaining_seconds, CONNECT_TIMEOUT_SECONDS
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_COMPLETION_WINDOW = "24h"
+# Read when a batch starts; the defaults suit the real API, a local stand-in can poll much faster
+BATCH_POLL_SECONDS_ENV = "BATCH_POLL_SECONDS"
+BATCH_TIMEOUT_SECONDS_ENV = "BATCH_TIMEOUT_SECONDS"
+DEFAULT_BATCH_POLL_SECONDS = 30
+DEFAULT_BATCH_TIMEOUT_SECONDS = 24 * 60 * 60
+BATCH_FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+def _headers():
+    return {"Authorization": f"Bearer {require_api_key()}"}
+
+
+def _seconds_setting(name, default):
+    value = env(name)
+    if not value:
+        return float(default)
+    try:
+        return float(value)
+    except ValueError:
+        print(f"[Batch] Ignoring {name}={value!r}: not a number")
+        return float(default)
+
+
+def write_batch_file(jobs, path):
+    """Write (custom_id, text, target_language) jobs as a Batch API JSONL input file."""
+    with open(path, 'w', encoding='utf-8') as f:
+        for custom_id, text, target_language in jobs:
+            line = {
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": build_translation_payload(text, target_language)
+            }
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+
+
+def submit_batch(path):
+    """Upload a batch input file and create the batch. Returns the batch id."""
+    with open(path, 'rb') as f:
+        response = requests.post(
+            f"{openai_base_url()}/files",
+            headers=_headers(),
+            data={"purpose": "batch"},
+            files={"file": (os.path.basename(path), f, "application/jsonl")},
+            timeout=(CONNECT_TIMEOUT_SECONDS, 300)
+        )
+    response.raise_for_status()
+    input_file_id = response.json()["id"]
+
+    response = requests.post(
+        f"{openai_base_url()}/batches",
+        headers=_headers(),
+        json={
+            "input_file_id": input_file_id,
+            "endpoint": BATCH_ENDPOINT,
+            "completion_window": BATCH_COMPLETION_WINDOW
+        },
+        timeout=(CONNECT_TIMEOUT_SECONDS, 60)
+    )
+    response.raise_for_status()
+    batch = response.json()
+    print(f"[Batch] Submitted batch {batch['id']} (input file {input_file_id})")
+    return batch["id"]
+
+
+def wait_for_batch(batch_id, poll_seconds=None, timeout_seconds=None):
+    """Poll a batch until it reaches a final status, giving up at the timeout or the run's deadline. Returns the batch object."""
+    if poll_seconds is None:
+        poll_seconds = _seconds_setting(BATCH_POLL_SECONDS_ENV, DEFAULT_BATCH_POLL_SECONDS)
+    if timeout_seconds is None:
+        timeout_seconds = _seconds_setting(BATCH_TIMEOUT_SECONDS_ENV, DEFAULT_BATCH_TIMEOUT_SECONDS)
+    started = time.monotonic()
+    remaining = remaining_seconds()
+    if remaining is not None and remaining < timeout_seconds:
+        timeout_seconds = max(0.0, remaining)
+    while True:
+        response = requests.get(f"{openai_base_url()}/batches/{batch_id}", headers=_headers(), timeout=(CONNECT_TIMEOUT_SECONDS, 60))
+        response.raise_for_status()
+        batch = response.json()
+        status = batch.get("status")
+        counts = batch.get("request_counts") or {}
+        print(f"[Batch] {batch_id}: {status} ({counts.get('completed', 0)}/{counts.get('total', 0)} done)")
+
+        if status in BATCH_FINAL_STATUSES:
+            return batch
+        if time.monotonic() - started > timeout_seconds:
+            print(f"[Batch] Gave up waiting for {batch_id} after {timeout_seconds:.0f}s")
+            return batch
+        time.sleep(max(0.0, min(poll_seconds, started + timeout_seconds - time.monotonic())))
+
+
+def cancel_batch(batch_id):
+    """Cancel an unfinished batch so its requests are not billed on top of a fallback"""
+    try:
+        response = requests.post(f"{openai_base_url()}/batches/{batch_id}/cancel", headers=_headers(),
+                                 timeout=(CONNECT_TIMEOUT_SECONDS, 60))
+        response.raise_for_status()
+        print(f"[Batch] Cancelled {batch_id}")
+        return True
+    except Exception as e:
+        print(f"[Batch] Could not cancel {batch_id}: {e}")
+        return False
+
+
+def _download_file(file_id):
+    response = requests.get(f"{openai_base_url()}/files/{file_id}/content", headers=_headers(), timeout=(CONNECT_TIMEOUT_SECONDS, 300))
+    response.raise_for_status()
+    return response.text
+
+
+def read_batch_results(batch):
+    """Map custom_id to translated text for every request in the batch that succeeded."""
+    results = {}
+    if batch.get("output_file_id"):
+        for line in _download_file(batch["output_file_id"]).splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            response = entry.get("response") or {}
+            if response.get("status_code") == 200:
+                results[entry["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+            else:
+                print(f"[Batch] Request {entry.get('custom_id')} failed with status {response.get('status_code')}")
+
+    if batch.get("error_file_id"):
+        for line in _download_file(batch["error_file_id"]).splitlines():
+            if line.strip():
+                entry = json.loads(line)
+                print(f"[Batch] Request {entry.get('custom_id')} failed: {entry.get('error') or entry.get('response')}")
+
+    return results
+
+
+def translate_batch(jobs):
+    """
+    Translate (custom_id, text, target_language) jobs through the Batch API.
+
+    Returns a dict of custom_id to translation. Jobs missing from the dict
+    failed or did not finish and should be translated some other way.
+    """
+    if not jobs:
+        return {}
+
+    fd, path = tempfile.mkstemp(prefix="translation-batch-", suffix=".jsonl")
+    os.close(fd)
+    batch_id = None
+    try:
+        write_batch_file(jobs, path)
+        print(f"[Batch] Wrote {len(jobs)} translation requests to {path}")
+        batch_id = submit_batch(path)
+        batch = wait_for_batch(batch_id)
+        if batch.get("status") not in BATCH_FINAL_STATUSES:
+            # The caller translates what is missing synchronously; don't pay for it twice
+            cancel_batch(batch_id)
+        elif batch.get("status") != "completed":
+            print(f"[Batch] Batch {batch_id} ended with status '{batch.get('status')}'")
+        return read_batch_results(batch)
+    except Exception as e:
+        print(f"[Batch] Error running batch: {e}")
+        if batch_id:
+            cancel_batch(batch_id)
+        return {}
+    finally:
+        os.remove(path)
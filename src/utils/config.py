@@ -0,0 +1,17 @@
+import os
+
+_loaded = False
+
+
+def load_config():
+    """Load a local .env file into the environment, once, the first time a setting is read."""
+    global _loaded
+    if not _loaded:
+        _loaded = True
+        from dotenv import load_dotenv
+        load_dotenv()
+
+
+def env(name, default=""):
+    load_config()
+    return os.getenv(name, default).strip()
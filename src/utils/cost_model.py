@@ -0,0 +1,178 @@
+import os
+import re
+import json
+
+from utils.config import env
+from utils.local_state import state_path
+
+# Prices are USD per million tokens; speeds are completion tokens per second.
+DEFAULT_MODEL_PROFILES = {
+    "gpt-4o-mini": {
+        "input_per_million": 0.15,
+        "output_per_million": 0.60,
+        "output_tokens_per_second": 80.0,
+        "base_latency_seconds": 0.5
+    },
+    "gpt-4": {
+        "input_per_million": 30.0,
+        "output_per_million": 60.0,
+        "output_tokens_per_second": 25.0,
+        "base_latency_seconds": 1.0
+    }
+}
+
+# How the options are weighed against each other, in USD.
+# A full retranslation rewrites lines the author did not touch, which shows
+# up as churn in the translated file that someone has to review again;
+# incremental mode leaves them alone. At about a cent per line, incremental
+# wins while less than roughly half of a document changed, as the old fixed
+# 50% diff threshold did.
+DEFAULT_WEIGHTS = {
+    "usd_per_second": 0.0005,
+    "usd_per_rewritten_line": 0.01
+}
+
+# Fixed prompt overhead of each strategy, in tokens: the shared system message
+# (about 385 tokens for ja, 345 for en, by estimate_tokens) and the task line,
+# plus for incremental updates its instructions (about 210) and section labels
+FULL_PROMPT_OVERHEAD = 400
+INCREMENTAL_PROMPT_OVERHEAD = 620
+
+LEARNING_RATE = 0.3
+MIN_LEARNING_COMPLETION_TOKENS = 50
+
+CJK_PATTERN = re.compile(r'[\u3040-\u30FF\u4E00-\u9FFF\uFF60-\uFF9F]')
+
+
+def estimate_tokens(text):
+    """Rough token count: about one token per CJK character and per four other characters."""
+    if not text:
+        return 0
+    cjk = len(CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+class CostModel:
+    """
+    Estimates what each translation strategy will cost and picks the cheaper one.
+
+    Model prices and speeds come from DEFAULT_MODEL_PROFILES, optionally
+    overridden by a YAML/JSON file named in TRANSLATION_COST_CONFIG. Speeds
+    are refined from the latency of earlier runs, stored locally.
+    """
+
+    def __init__(self, config_path=None, stats_path=None):
+        self.profiles = {model: dict(profile) for model, profile in DEFAULT_MODEL_PROFILES.items()}
+        self.weights = dict(DEFAULT_WEIGHTS)
+        self.stats_path = stats_path or state_path("strategy_stats.json")
+        self.learned = {}
+
+        config_path = config_path or env("TRANSLATION_COST_CONFIG")
+        if config_path:
+            try:
+                import yaml
+                with open(config_path, 'r', encoding='utf-8') as f:
+                    config = yaml.safe_load(f) or {}
+                for model, profile in (config.get("models") or {}).items():
+                    self.profiles.setdefault(model, dict(DEFAULT_MODEL_PROFILES["gpt-4o-mini"])).update(profile)
+                self.weights.update(config.get("weights") or {})
+            except Exception as e:
+                print(f"[Cost Model] Could not read {config_path}: {e}")
+
+        if os.path.exists(self.stats_path):
+            try:
+                with open(self.stats_path, 'r', encoding='utf-8') as f:
+                    self.learned = json.load(f).get("models", {})
+            except Exception as e:
+                print(f"[Cost Model] Could not read {self.stats_path}: {e}")
+
+    def profile(self, model):
+        profile = dict(self.profiles.get(model) or DEFAULT_MODEL_PROFILES["gpt-4o-mini"])
+        profile.update(self.learned.get(model, {}))
+        return profile
+
+    def estimate(self, model, prompt_tokens, completion_tokens, rewritten_lines=0):
+        profile = self.profile(model)
+        usd = (prompt_tokens * profile["input_per_million"] + completion_tokens * profile["output_per_million"]) / 1_000_000
+        latency = profile["base_latency_seconds"] + completion_tokens / profile["output_tokens_per_second"]
+        score = usd + latency * self.weights["usd_per_second"] + rewritten_lines * self.weights["usd_per_rewritten_line"]
+        return {
+            "model": model,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "usd": round(usd, 6),
+            "latency_seconds": round(latency, 2),
+            "rewritten_lines": rewritten_lines,
+            "score": round(score, 6)
+        }
+
+    def choose_strategy(self, content, base_content, existing_translation, line_count, changed_lines,
+                        full_model, incremental_model):
+        """
+        Compare full and incremental translation of one document.
+
+        Returns a decision dict with the chosen strategy, the reason and the
+        estimate for every option that was considered.
+        """
+        content_tokens = estimate_tokens(content)
+        output_tokens = estimate_tokens(existing_translation) if existing_translation else content_tokens
+        inputs = {
+            "content_tokens": content_tokens,
+            "line_count": line_count,
+            "changed_lines": changed_lines
+        }
+
+        unchanged_lines = max((line_count or 0) - (changed_lines or 0), 0)
+        full = self.estimate(full_model, content_tokens + FULL_PROMPT_OVERHEAD, output_tokens,
+                             rewritten_lines=unchanged_lines if existing_translation else 0)
+        options = {"full": full}
+
+        if base_content is None or existing_translation is None:
+            reason = "no base version" if base_content is None else "translated file does not exist"
+            return {"strategy": "full", "reason": reason, "inputs": inputs, "options": options}
+
+        prompt_tokens = (estimate_tokens(base_content) + content_tokens + estimate_tokens(existing_translation)
+                         + INCREMENTAL_PROMPT_OVERHEAD)
+        incremental = self.estimate(incremental_model, prompt_tokens, output_tokens)
+        options["incremental"] = incremental
+
+        if incremental["score"] < full["score"]:
+            strategy = "incremental"
+        else:
+            strategy = "full"
+        reason = f"estimated score full={full['score']:.4f} incremental={incremental['score']:.4f}"
+        return {"strategy": strategy, "reason": reason, "inputs": inputs, "options": options}
+
+    def learn_from_calls(self, call_stats):
+        """Fold the observed speed of this run's API calls into the stored profiles."""
+        for call in call_stats:
+            model = call.get("model")
+            completion_tokens = call.get("completion_tokens") or 0
+            elapsed = call.get("elapsed") or 0
+            if call.get("status") != 200 or completion_tokens < MIN_LEARNING_COMPLETION_TOKENS or elapsed <= 0:
+                continue
+            profile = self.profile(model)
+            observed = completion_tokens / max(elapsed - profile["base_latency_seconds"], 0.1)
+            learned = self.learned.setdefault(model, {})
+            previous = learned.get("output_tokens_per_second", profile["output_tokens_per_second"])
+            learned["output_tokens_per_second"] = round(previous + LEARNING_RATE * (observed - previous), 2)
+
+    def save(self):
+        if not self.learned:
+            return
+        try:
+            with open(self.stats_path, 'w', encoding='utf-8') as f:
+                json.dump({"models": self.learned}, f, indent=2)
+        except Exception as e:
+            print(f"[Cost Model] Could not save {self.stats_path}: {e}")
+
+
+_cost_model = None
+
+
+def get_cost_model():
+    """Return the process-wide cost model, loading config and stats on first use."""
+    global _cost_model
+    if _cost_model is None:
+        _cost_model = CostModel()
+    return _cost_model
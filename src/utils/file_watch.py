@@ -0,0 +1,139 @@
+import os
+import time
+import ctypes
+import ctypes.util
+import select
+import struct
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')
+READ_SIZE = 64 * 1024
+
+POLL_INTERVAL_SECONDS = 0.5
+
+
+def _walk(root, skip_dir):
+    """Yield every directory under root that should be watched"""
+    for directory, dirs, _ in os.walk(root):
+        dirs[:] = [d for d in dirs if not skip_dir(os.path.relpath(os.path.join(directory, d), root))]
+        yield directory
+
+
+class InotifyWatcher:
+    """Reports files written, moved in or deleted under a tree, using Linux inotify through libc."""
+
+    def __init__(self, root, skip_dir):
+        self.root = root
+        self.skip_dir = skip_dir
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._dirs = {}
+        for directory in _walk(root, skip_dir):
+            self._add(directory)
+
+    def _add(self, directory):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd >= 0:
+            self._dirs[wd] = directory
+
+    def poll(self, timeout):
+        """Wait up to `timeout` seconds and return the set of paths (relative to root) that changed."""
+        changed = set()
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return changed
+        try:
+            data = os.read(self._fd, READ_SIZE)
+        except BlockingIOError:
+            return changed
+
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b'\0')
+            offset += EVENT_HEADER.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                print("[Watch] Event queue overflowed, some saves may have been missed")
+                continue
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            relative = os.path.relpath(path, self.root)
+
+            if mask & IN_ISDIR:
+                # Watch new directories, and pick up files created in them before the watch existed
+                if mask & (IN_CREATE | IN_MOVED_TO) and not self.skip_dir(relative):
+                    for new_directory in _walk(path, self.skip_dir):
+                        self._add(new_directory)
+                        for entry in os.listdir(new_directory):
+                            changed.add(os.path.relpath(os.path.join(new_directory, entry), self.root))
+                continue
+            changed.add(relative)
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """Fallback for platforms without inotify: compares modification times every POLL_INTERVAL_SECONDS."""
+
+    def __init__(self, root, skip_dir, suffix='.md'):
+        self.root = root
+        self.skip_dir = skip_dir
+        self.suffix = suffix
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for directory in _walk(self.root, self.skip_dir):
+            for name in os.listdir(directory):
+                if not name.endswith(self.suffix):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                snapshot[os.path.relpath(path, self.root)] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def poll(self, timeout):
+        time.sleep(min(timeout, POLL_INTERVAL_SECONDS))
+        snapshot = self._scan()
+        changed = {path for path, stat in snapshot.items() if self._snapshot.get(path) != stat}
+        changed.update(path for path in self._snapshot if path not in snapshot)
+        self._snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+def create_watcher(root, skip_dir):
+    """inotify where available, polling otherwise. `skip_dir` gets a path relative to root."""
+    try:
+        return InotifyWatcher(root, skip_dir)
+    except (OSError, AttributeError) as e:
+        print(f"[Watch] inotify unavailable ({e}), polling every {POLL_INTERVAL_SECONDS}s")
+        return PollingWatcher(root, skip_dir)
@@ -0,0 +1,159 @@
+import threading
+import time
+
+from utils.tracing import span
+
+# GitHub asks integrations to wait at least one second between mutative
+# requests and to stay under 80 content-creating requests per minute.
+MIN_WRITE_INTERVAL_SECONDS = 1.0
+MAX_WRITES_PER_MINUTE = 80
+
+MAX_WRITE_ATTEMPTS = 5
+DEFAULT_BACKOFF_SECONDS = 60
+MAX_BACKOFF_SECONDS = 15 * 60
+
+RETRYABLE_STATUSES = (403, 429, 500, 502, 503, 504)
+
+
+class WritePacer:
+    """Spaces out mutative GitHub requests so they stay under the secondary rate limits.
+
+    A single pacer is shared by every queue in the process, so concurrent
+    callers are paced together against the same token.
+    """
+
+    def __init__(self, min_interval=MIN_WRITE_INTERVAL_SECONDS, per_minute=MAX_WRITES_PER_MINUTE):
+        self.min_interval = min_interval
+        self.per_minute = per_minute
+        self._lock = threading.Lock()
+        self._recent = []
+        self._blocked_until = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            self._recent = [t for t in self._recent if now - t < 60]
+
+            ready_at = self._blocked_until
+            if self._recent:
+                ready_at = max(ready_at, self._recent[-1] + self.min_interval)
+            if len(self._recent) >= self.per_minute:
+                ready_at = max(ready_at, self._recent[-self.per_minute] + 60)
+
+            if ready_at > now:
+                time.sleep(ready_at - now)
+                now = time.monotonic()
+            self._recent.append(now)
+
+    def block_for(self, seconds):
+        """Hold back every writer sharing this pacer for the given number of seconds."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+DEFAULT_PACER = WritePacer()
+
+
+def _header(headers, name):
+    if not headers:
+        return None
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def get_retry_delay(exception, attempt):
+    """Work out how long to wait before retrying a failed write, or None if it should not be retried."""
+    if exception.status not in RETRYABLE_STATUSES:
+        return None
+
+    retry_after = _header(exception.headers, "retry-after")
+    if retry_after:
+        try:
+            return min(float(retry_after), MAX_BACKOFF_SECONDS)
+        except ValueError:
+            pass
+
+    remaining = _header(exception.headers, "x-ratelimit-remaining")
+    reset = _header(exception.headers, "x-ratelimit-reset")
+    if remaining == "0" and reset:
+        try:
+            return min(max(float(reset) - time.time(), 0) + 1, MAX_BACKOFF_SECONDS)
+        except ValueError:
+            pass
+
+    if exception.status == 403:
+        message = str(exception.data).lower()
+        if "rate limit" not in message and "abuse" not in message:
+            # A plain permission error will not get better by waiting
+            return None
+        return DEFAULT_BACKOFF_SECONDS
+
+    return min(DEFAULT_BACKOFF_SECONDS * (2 ** (attempt - 1)) / 4, MAX_BACKOFF_SECONDS)
+
+
+class GitHubWriteQueue:
+    """Collects GitHub edits produced during a translation run and applies them at a safe pace.
+
+    Edits whose new body matches the current one are dropped, rate limited
+    writes are retried according to the response headers, and a failed write
+    is recorded without stopping the rest of the queue.
+    """
+
+    def __init__(self, pacer=None):
+        self.pacer = pacer or DEFAULT_PACER
+        self.pending = []
+        self.succeeded = []
+        self.failed = []
+
+    def enqueue_edit(self, target, body, description):
+        if (target.body or "") == body:
+            print(f"Skipping no-op edit of {description}")
+            return False
+        self.pending.append((description, lambda: target.edit(body=body)))
+        return True
+
+    def enqueue_label(self, issue, label, description):
+        if any(existing.name.lower() == label.lower() for existing in issue.labels):
+            return False
+        self.pending.append((description, lambda: issue.add_to_labels(label)))
+        return True
+
+    def _apply(self, description, write):
+        from github import GithubException
+        for attempt in range(1, MAX_WRITE_ATTEMPTS + 1):
+            with span("github.pacing", "github"):
+                self.pacer.wait()
+            try:
+                with span("github.write", "github", target=description, attempt=attempt):
+                    write()
+                return True
+            except GithubException as e:
+                delay = get_retry_delay(e, attempt)
+                if delay is None or attempt == MAX_WRITE_ATTEMPTS:
+                    print(f"Failed to write {description}: {e.status} {e.data}")
+                    return False
+                print(f"GitHub rate limited write of {description} (status {e.status}), retrying in {delay:.0f}s")
+                self.pacer.block_for(delay)
+            except Exception as e:
+                print(f"Failed to write {description}: {e}")
+                return False
+        return False
+
+    def flush(self):
+        """Apply every pending write in order. Returns the number of successful writes."""
+        pending, self.pending = self.pending, []
+        written = 0
+        # self.failed accumulates over the queue's lifetime; report only this flush's failures
+        failed = []
+        for description, write in pending:
+            if self._apply(description, write):
+                self.succeeded.append(description)
+                written += 1
+            else:
+                failed.append(description)
+        self.failed.extend(failed)
+        if failed:
+            print(f"{len(failed)} GitHub write(s) failed: {', '.join(failed)}")
+        return written
@@ -0,0 +1,36 @@
+import os
+import subprocess
+
+STATE_DIR_NAME = "bilingual"
+FALLBACK_STATE_DIR = ".bilingual"
+
+_state_dir = None
+
+
+def state_dir():
+    """
+    Directory for local bookkeeping files that must never be committed.
+
+    Lives inside the repository's git directory (.git/bilingual) so it
+    survives between runs on the same checkout but is invisible to
+    `git add`. Falls back to .bilingual outside a git repository.
+    """
+    global _state_dir
+    if _state_dir is None:
+        try:
+            result = subprocess.run(
+                ['git', 'rev-parse', '--git-dir'],
+                capture_output=True,
+                text=True,
+                encoding='utf-8'
+            )
+            git_dir = result.stdout.strip() if result.returncode == 0 else ""
+        except OSError:
+            git_dir = ""
+        _state_dir = os.path.join(git_dir, STATE_DIR_NAME) if git_dir else FALLBACK_STATE_DIR
+    os.makedirs(_state_dir, exist_ok=True)
+    return _state_dir
+
+
+def state_path(name):
+    return os.path.join(state_dir(), name)
@@ -0,0 +1,18 @@
+import re
+
+ORIGINAL_CONTENT_MARKER = "Original Content:"
+
+# The closing </b> of the marker and any <br> spacing left after it
+MARKER_TRAILER_PATTERN = re.compile(r'^(</b>\s*)?(<br>\s*)*')
+
+
+def get_original_content(content):
+    """
+    The untranslated part of an issue, PR or comment body, whether or not it
+    has been translated already. Only the first marker counts, so an original
+    that quotes "Original Content:" itself is kept whole.
+    """
+    if ORIGINAL_CONTENT_MARKER in content:
+        original = content.split(ORIGINAL_CONTENT_MARKER, 1)[1].lstrip()
+        return MARKER_TRAILER_PATTERN.sub('', original).strip()
+    return content.strip()
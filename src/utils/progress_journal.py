@@ -0,0 +1,74 @@
+import os
+import json
+import hashlib
+from pathlib import Path
+
+from utils.local_state import state_path
+
+JOURNAL_FILE = "journal.jsonl"
+
+
+def _key(path):
+    return Path(os.path.relpath(str(path), '.')).as_posix()
+
+
+def content_hash(content):
+    """Hash of `content` as UTF-8, in git's blob format; only identifies the output, no filters are applied"""
+    data = content.encode('utf-8')
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class ProgressJournal:
+    """
+    Append-only record of every translation a run finished.
+
+    Each line holds the source's blob hash, the target path, and the hash and
+    text of the output, and is flushed to disk before the run moves on. If a
+    long run is cancelled, the next run reuses every entry whose source is
+    unchanged instead of translating it again, even when the output files
+    themselves were lost with the runner. A torn last line from a crash is
+    ignored.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or state_path(JOURNAL_FILE)
+        # (source key, target key) -> latest entry
+        self.entries = {}
+        self.resumed = 0
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self.entries[(entry["source"], entry["target"])] = entry
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        if self.entries:
+            print(f"[Journal] {len(self.entries)} finished translations from an earlier run in {self.path}")
+
+    def finished(self, source_path, source_blob, target_path):
+        """The output recorded for translating this version of the source to `target_path`, or None"""
+        entry = self.entries.get((_key(source_path), _key(target_path)))
+        if not entry or entry.get("source_blob") != source_blob:
+            return None
+        return entry.get("content")
+
+    def record(self, source_path, source_blob, target_path, content):
+        entry = {
+            "source": _key(source_path),
+            "source_blob": source_blob,
+            "target": _key(target_path),
+            "output_blob": content_hash(content),
+            "content": content,
+        }
+        self.entries[(entry["source"], entry["target"])] = entry
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def clear(self):
+        """Forget everything once a run has finished all its work and written the lockfile"""
+        self.entries = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
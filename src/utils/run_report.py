@@ -0,0 +1,92 @@
+import json
+
+# Usage fields that are totals; the average latencies are recombined from them when merging
+USAGE_TOTALS = ("calls", "prompt_tokens", "cached_tokens", "completion_tokens", "cache_hit_calls", "hedged_calls")
+
+
+def merge_usage(usages):
+    """Combine the summarize_calls() output of several runs"""
+    usages = [u for u in usages if u]
+    merged = {field: sum(u.get(field, 0) for u in usages) for field in USAGE_TOTALS}
+    for field, weight in (("avg_seconds_cache_hit", lambda u: u.get("cache_hit_calls", 0)),
+                          ("avg_seconds_cache_miss", lambda u: u.get("calls", 0) - u.get("cache_hit_calls", 0))):
+        weighted = [(u[field], weight(u)) for u in usages if u.get(field) is not None and weight(u)]
+        total = sum(w for _, w in weighted)
+        merged[field] = round(sum(v * w for v, w in weighted) / total, 3) if total else None
+    return merged
+
+
+class RunReport:
+    """Records what a markdown translation run actually changed on disk."""
+
+    def __init__(self):
+        self.written = []
+        self.unchanged = []
+        self.deleted = []
+        self.renamed = []
+        self.decisions = []
+        self.deferred = []
+        self.usage = {}
+        self.lock_updates = {}
+
+    def record_write(self, path, changed):
+        (self.written if changed else self.unchanged).append(str(path))
+
+    def record_delete(self, path):
+        self.deleted.append(str(path))
+
+    def record_rename(self, old_path, new_path):
+        self.renamed.append((str(old_path), str(new_path)))
+
+    def record_decision(self, path, target_language, decision):
+        self.decisions.append(dict(decision, path=str(path), target_language=target_language))
+
+    def record_defer(self, path, reason):
+        self.deferred.append({"path": str(path), "reason": reason})
+
+    def record_usage(self, usage):
+        self.usage = usage
+
+    def record_lock_updates(self, updates):
+        """Lockfile entries this run set, or removed (None), keyed by source path"""
+        self.lock_updates = dict(updates)
+
+    def changed_paths(self):
+        """Every path the commit step needs to stage, including removals."""
+        paths = list(self.written) + list(self.deleted)
+        for old_path, new_path in self.renamed:
+            paths.extend([old_path, new_path])
+        return sorted(set(paths))
+
+    def to_dict(self):
+        return {
+            "written": self.written,
+            "unchanged": self.unchanged,
+            "deleted": self.deleted,
+            "renamed": [{"from": old, "to": new} for old, new in self.renamed],
+            "changed_paths": self.changed_paths(),
+            "decisions": self.decisions,
+            "deferred": self.deferred,
+            "usage": self.usage,
+            "lock_updates": self.lock_updates
+        }
+
+    def absorb(self, data):
+        """Add another run's report (its to_dict() output), e.g. one shard of a sharded run"""
+        self.written.extend(data.get("written", []))
+        self.unchanged.extend(data.get("unchanged", []))
+        self.deleted.extend(data.get("deleted", []))
+        self.renamed.extend((r["from"], r["to"]) for r in data.get("renamed", []))
+        self.decisions.extend(data.get("decisions", []))
+        self.deferred.extend(data.get("deferred", []))
+        self.lock_updates.update(data.get("lock_updates", {}))
+        self.usage = merge_usage([self.usage, data.get("usage")])
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def write_changed_list(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for changed_path in self.changed_paths():
+                f.write(changed_path + "\n")
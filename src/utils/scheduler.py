@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import subprocess
+from pathlib import Path
+
+from utils.local_state import state_path
+
+# Lower runs first
+PRIORITY_PENDING = 0
+PRIORITY_TOP = 1
+PRIORITY_RECENT = 2
+PRIORITY_NORMAL = 3
+PRIORITY_LOW = 4
+
+ARCHIVE_DIR_NAMES = {"archive", "archives", "archived", "legacy", "deprecated", "obsolete", "old"}
+
+# How far back "recently changed" looks
+RECENT_COMMITS = 50
+
+
+def _env_number(name):
+    value = os.getenv(name, "").strip()
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        print(f"[Scheduler] Ignoring {name}={value!r}: not a number")
+        return None
+
+
+def _normalize(file_path):
+    return Path(os.path.normpath(str(file_path))).as_posix()
+
+
+def recently_changed_files(commits=RECENT_COMMITS):
+    """Paths touched by the last `commits` commits"""
+    result = subprocess.run(
+        ['git', 'log', f'-{commits}', '--name-only', '--pretty=format:'],
+        capture_output=True,
+        text=True,
+        encoding='utf-8'
+    )
+    if result.returncode != 0:
+        return set()
+    return {_normalize(line) for line in result.stdout.splitlines() if line.strip()}
+
+
+def _ignore_pattern_dirs(ignore_patterns):
+    """Literal directory prefix of every ignore pattern, e.g. docs/internal for docs/internal/*.md"""
+    dirs = set()
+    for pattern in ignore_patterns:
+        literal = []
+        for part in pattern.replace('\\', '/').split('/')[:-1]:
+            if any(c in part for c in '*?['):
+                break
+            literal.append(part)
+        if literal:
+            dirs.add("/".join(literal))
+    return dirs
+
+
+def file_priority(file_path, recent, ignore_dirs):
+    path = Path(_normalize(file_path))
+    directories = [part.lower() for part in path.parts[:-1]]
+    parent = path.parent.as_posix()
+
+    if any(part in ARCHIVE_DIR_NAMES for part in directories):
+        return PRIORITY_LOW
+    # Sits next to content the repository chose not to translate
+    if any(parent == d or parent.startswith(d + '/') for d in ignore_dirs):
+        return PRIORITY_LOW
+    if path.name.upper().startswith("README") or len(path.parts) == 1:
+        return PRIORITY_TOP
+    if path.as_posix() in recent:
+        return PRIORITY_RECENT
+    return PRIORITY_NORMAL
+
+
+class RunScheduler:
+    """
+    Orders markdown work by priority and stops admitting it once the run's budget is spent.
+
+    Limits on wall time, tokens and USD are optional; with none set every
+    file is admitted. Files that do not fit are saved to a pending list in
+    the local state directory and run first next time.
+    """
+
+    def __init__(self, pending_path=None):
+        self.pending_path = pending_path or state_path("pending.json")
+        self.max_seconds = None
+        self.max_tokens = None
+        self.max_cost = None
+        self.started = time.monotonic()
+        self.reserved_tokens = 0
+        self.reserved_cost = 0.0
+        self.deferred = []
+        self.completed = set()
+        self.pending = []
+        if os.path.exists(self.pending_path):
+            try:
+                with open(self.pending_path, 'r', encoding='utf-8') as f:
+                    self.pending = json.load(f).get("files", [])
+            except Exception as e:
+                print(f"[Scheduler] Could not read {self.pending_path}: {e}")
+
+    def set_limits(self, max_seconds=None, max_tokens=None, max_cost=None):
+        self.max_seconds = max_seconds if max_seconds is not None else _env_number("TRANSLATION_MAX_SECONDS")
+        self.max_tokens = max_tokens if max_tokens is not None else _env_number("TRANSLATION_MAX_TOKENS")
+        self.max_cost = max_cost if max_cost is not None else _env_number("TRANSLATION_MAX_COST")
+        self.started = time.monotonic()
+        limits = [f"{name}={value:g}" for name, value in
+                  (("seconds", self.max_seconds), ("tokens", self.max_tokens), ("usd", self.max_cost))
+                  if value is not None]
+        if limits:
+            print(f"[Scheduler] Budget: {', '.join(limits)}")
+
+    def restrict(self, files):
+        """Only carry over pending files among `files`, for runs that handle one slice of the repository"""
+        keep = {_normalize(f) for f in files}
+        self.pending = [f for f in self.pending if _normalize(f) in keep]
+
+    @property
+    def limited(self):
+        return any(value is not None for value in (self.max_seconds, self.max_tokens, self.max_cost))
+
+    def order(self, files, ignore_patterns):
+        """Pending files from earlier runs first, then README/top-level, recently changed, the rest, archives last"""
+        files = list(dict.fromkeys(files))
+        known = {_normalize(f) for f in files}
+        carried = [f for f in self.pending if _normalize(f) not in known and os.path.exists(f)]
+        if carried:
+            print(f"[Scheduler] Picking up {len(carried)} files deferred by an earlier run")
+        pending = {_normalize(f) for f in self.pending}
+        recent = recently_changed_files()
+        ignore_dirs = _ignore_pattern_dirs(ignore_patterns)
+
+        def rank(file_path):
+            if _normalize(file_path) in pending:
+                return PRIORITY_PENDING
+            return file_priority(file_path, recent, ignore_dirs)
+
+        return sorted(carried + files, key=rank)
+
+    def spent(self, call_stats, cost_model):
+        tokens = sum(c.get("prompt_tokens", 0) + c.get("completion_tokens", 0) for c in call_stats)
+        cost = sum(cost_model.estimate(c.get("model"), c.get("prompt_tokens", 0), c.get("completion_tokens", 0))["usd"]
+                   for c in call_stats)
+        return tokens + self.reserved_tokens, cost + self.reserved_cost
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def out_of_time(self):
+        return self.max_seconds is not None and self.elapsed() >= self.max_seconds
+
+    def admit(self, file_path, estimate, call_stats, cost_model, reserve=False):
+        """
+        Whether `file_path` fits in what is left of the budget.
+
+        `estimate` is a cost model estimate for the work. With `reserve`,
+        the estimate is counted as spent right away, for work (like a batch)
+        whose real usage is not known until later.
+        """
+        if not self.limited:
+            return True
+        tokens, cost = self.spent(call_stats, cost_model)
+        needed_tokens = estimate["prompt_tokens"] + estimate["completion_tokens"]
+        reason = None
+        if self.max_seconds is not None and self.elapsed() + estimate["latency_seconds"] > self.max_seconds:
+            reason = f"time ({self.elapsed():.0f}s used, ~{estimate['latency_seconds']:.0f}s needed)"
+        elif self.max_tokens is not None and tokens + needed_tokens > self.max_tokens:
+            reason = f"tokens ({tokens} used, ~{needed_tokens} needed)"
+        elif self.max_cost is not None and cost + estimate["usd"] > self.max_cost:
+            reason = f"cost (${cost:.4f} used, ~${estimate['usd']:.4f} needed)"
+        if reason:
+            self.defer(file_path, reason)
+            return False
+        if reserve:
+            self.reserved_tokens += needed_tokens
+            self.reserved_cost += estimate["usd"]
+        return True
+
+    def defer(self, file_path, reason):
+        print(f"⏸️  Deferring {file_path}: budget exhausted on {reason}")
+        if _normalize(file_path) not in {_normalize(f) for f, _ in self.deferred}:
+            self.deferred.append((str(file_path), reason))
+
+    def complete(self, file_path):
+        """Mark a file as handled by this run, unless it was deferred"""
+        key = _normalize(file_path)
+        if key not in {_normalize(f) for f, _ in self.deferred}:
+            self.completed.add(key)
+
+    def save(self):
+        """Replace the pending list with what this run deferred"""
+        deferred = [f for f, _ in self.deferred if _normalize(f) not in self.completed]
+        # Pending files this run never got to stay pending
+        for file_path in self.pending:
+            if _normalize(file_path) not in self.completed and os.path.exists(file_path):
+                deferred.append(file_path)
+        deferred = list(dict.fromkeys(deferred))
+        try:
+            if deferred:
+                with open(self.pending_path, 'w', encoding='utf-8') as f:
+                    json.dump({"files": deferred}, f, ensure_ascii=False, indent=2)
+                print(f"[Scheduler] {len(deferred)} files left for the next run ({self.pending_path})")
+            elif os.path.exists(self.pending_path):
+                os.remove(self.pending_path)
+        except Exception as e:
+            print(f"[Scheduler] Could not save {self.pending_path}: {e}")
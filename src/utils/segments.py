@@ -0,0 +1,108 @@
+import re
+import hashlib
+
+from utils.translation import translate_text, translate_segments
+
+SEGMENT_MAP_PATTERN = re.compile(r'\n*<!-- bilingual-segments:([0-9a-f,]*) -->\s*$')
+DETAILS_PATTERN = re.compile(r'<details>\n<summary><b>(.+?)</b></summary>\n\n(.*?)\n</details>', re.DOTALL)
+FENCE_PATTERN = re.compile(r'^[ \t]*(```|~~~)')
+
+
+def split_paragraphs(text):
+    """Split markdown into blank-line separated paragraphs, keeping fenced code blocks whole."""
+    paragraphs = []
+    current = []
+    in_fence = False
+    for line in text.strip().splitlines():
+        if FENCE_PATTERN.match(line):
+            in_fence = not in_fence
+        if not line.strip() and not in_fence:
+            if current:
+                paragraphs.append("\n".join(current))
+                current = []
+            continue
+        current.append(line)
+    if current:
+        paragraphs.append("\n".join(current))
+    return paragraphs
+
+
+def paragraph_hash(paragraph):
+    normalized = " ".join(paragraph.split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12]
+
+
+def attach_segment_map(translation, source_paragraphs):
+    """
+    Append a hidden map of source paragraph hashes to a translation.
+
+    The map is only written when the translation has one paragraph per
+    source paragraph, so every hash lines up with the paragraph that
+    translates it.
+    """
+    if len(split_paragraphs(translation)) != len(source_paragraphs):
+        return translation
+    hashes = ",".join(paragraph_hash(p) for p in source_paragraphs)
+    return f"{translation.strip()}\n\n<!-- bilingual-segments:{hashes} -->"
+
+
+def extract_previous_translations(body, language_names):
+    """
+    Find translations left in a previously formatted body.
+
+    Returns {language: (translated_paragraphs, source_hashes)} for every
+    <details> block that carries a usable segment map.
+    """
+    previous = {}
+    if not body:
+        return previous
+    languages_by_name = {name: language for language, name in language_names.items()}
+    for name, block in DETAILS_PATTERN.findall(body):
+        language = languages_by_name.get(name)
+        match = SEGMENT_MAP_PATTERN.search(block)
+        if not language or not match:
+            continue
+        hashes = match.group(1).split(",") if match.group(1) else []
+        paragraphs = split_paragraphs(block[:match.start()])
+        if len(paragraphs) == len(hashes):
+            previous[language] = (paragraphs, hashes)
+    return previous
+
+
+def translate_with_reuse(content, target_language, previous=None, attach_map=True):
+    """
+    Translate content, reusing paragraphs that were already translated.
+
+    `previous` is (translated_paragraphs, source_hashes) from an earlier
+    translation. Unchanged paragraphs are taken from it as they are and only
+    new or edited paragraphs are sent to the model, in a single request.
+    Falls back to a full translation when nothing can be reused. With
+    `attach_map` off, the hidden segment map is left out.
+    """
+    paragraphs = split_paragraphs(content)
+    finish = (lambda translation: attach_segment_map(translation, paragraphs)) if attach_map else (lambda translation: translation)
+
+    if previous and paragraphs:
+        reusable = {}
+        for translated, source_hash in zip(*previous):
+            reusable.setdefault(source_hash, translated)
+        result = [reusable.get(paragraph_hash(p)) for p in paragraphs]
+        missing = [i for i, translated in enumerate(result) if translated is None]
+
+        if not missing:
+            print(f"[Delta Translation] All {len(paragraphs)} paragraphs unchanged, reusing translation")
+            return finish("\n\n".join(result))
+
+        if len(missing) < len(paragraphs):
+            print(f"[Delta Translation] Retranslating {len(missing)} of {len(paragraphs)} paragraphs")
+            translated = translate_segments([paragraphs[i] for i in missing], target_language)
+            if translated:
+                for i, text in zip(missing, translated):
+                    result[i] = text
+                return finish("\n\n".join(result))
+            print("[Delta Translation] Segment translation failed, falling back to full translation")
+
+    translation = translate_text(content, target_language)
+    if not translation:
+        return None
+    return finish(translation)
@@ -0,0 +1,79 @@
+import os
+import heapq
+from pathlib import Path
+
+from utils.cost_model import estimate_tokens, FULL_PROMPT_OVERHEAD
+
+LANGUAGE_SUFFIXES = ('.en.md', '.ja.md', '.md')
+
+
+def parse_shard(value):
+    """'2/4' -> (2, 4). Shards are numbered from 1, like a CI matrix."""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise ValueError(f"expected INDEX/COUNT, e.g. 1/4, got {value!r}")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"shard index must be between 1 and {count}, got {value!r}")
+    return index, count
+
+
+def pair_key(file_path):
+    """
+    The document a file belongs to, shared by a source and its translations:
+    docs/guide.md, docs/guide.en.md and docs/guide.ja.md all map to docs/guide.
+    """
+    path = Path(os.path.normpath(str(file_path)))
+    name = path.name
+    for suffix in LANGUAGE_SUFFIXES:
+        if name.lower().endswith(suffix):
+            name = name[:-len(suffix)]
+            break
+    return (path.parent / name).as_posix()
+
+
+def file_weight(file_path):
+    """Estimated prompt tokens to translate a file once"""
+    try:
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+            return estimate_tokens(f.read()) + FULL_PROMPT_OVERHEAD
+    except OSError:
+        return FULL_PROMPT_OVERHEAD
+
+
+def assign_shards(files, count, weight=file_weight):
+    """
+    Split files into `count` shards of similar estimated token weight.
+
+    Files of one language pair always land on the same shard. Pairs are
+    placed heaviest first on the lightest shard so far (longest processing
+    time first); ties are broken by path and shard number, so every runner
+    that sees the same checkout computes the same assignment.
+    Returns a list of `count` file lists, each in the input order.
+    """
+    groups = {}
+    for file_path in dict.fromkeys(files):
+        groups.setdefault(pair_key(file_path), []).append(file_path)
+    weights = {key: sum(weight(f) for f in members) for key, members in groups.items()}
+
+    shard_of = {}
+    loads = [(0, shard) for shard in range(count)]
+    for key in sorted(groups, key=lambda k: (-weights[k], k)):
+        load, shard = heapq.heappop(loads)
+        shard_of[key] = shard
+        heapq.heappush(loads, (load + weights[key], shard))
+
+    shards = [[] for _ in range(count)]
+    for file_path in dict.fromkeys(files):
+        shards[shard_of[pair_key(file_path)]].append(file_path)
+    return shards
+
+
+def select_shard(files, index, count, weight=file_weight):
+    """The files shard `index` of `count` (numbered from 1) is responsible for"""
+    shards = assign_shards(files, count, weight)
+    selected = shards[index - 1]
+    total = len(list(dict.fromkeys(files)))
+    print(f"[Shard {index}/{count}] {len(selected)} of {total} markdown files "
+          f"(shard sizes: {', '.join(str(len(s)) for s in shards)})")
+    return selected
@@ -0,0 +1,254 @@
+import re
+from collections import Counter
+
+from utils.translation import translate_segments, remember
+from utils.segments import split_paragraphs, FENCE_PATTERN
+
+HEADING_PATTERN = re.compile(r'^ {0,3}(#{1,6})(?:[ \t]+|$)')
+LINK_TARGET_PATTERN = re.compile(r'\]\(\s*<?([^)\s>]+)>?(?:\s+"[^"]*")?\s*\)')
+AUTOLINK_PATTERN = re.compile(r'<(https?://[^>\s]+)>|(?<![(<\w])(https?://[^\s)>\]]+)')
+LIST_ITEM_PATTERN = re.compile(r'^([ \t]*)(?:([-*+])|(\d+)[.)])[ \t]+\S')
+TABLE_ROW_PATTERN = re.compile(r'^ {0,3}\|')
+TABLE_CELL_SEPARATOR = re.compile(r'(?<!\\)\|')
+FRONT_MATTER_KEY_PATTERN = re.compile(r'^([A-Za-z0-9_-]+):')
+
+# Remarks about the translation that the model sometimes adds around it
+CHATTER_PATTERNS = [
+    re.compile(p, re.IGNORECASE) for p in (
+        r'^(since|as) there (are|were) no changes',
+        r'^no changes (were|are) (needed|made|required)',
+        r'^here (is|are) the (updated |complete )?translat',
+        r'^(the )?(updated |complete )?translation( is)?( as follows)?:?$',
+        r'^(note|translator\'?s? note):',
+        r'^i (have|\'ve) (translated|updated|kept)',
+        r'^(以下|下記)(は|が|に).*(翻訳|訳)',
+        r'^(翻訳|訳文)(は以下|結果)',
+        r'^変更(点)?(は|が)(ありません|ない)',
+    )
+]
+
+# Allowed output/source character ratio per target language; Japanese needs far fewer characters
+LENGTH_RATIO_BOUNDS = {"ja": (0.15, 1.5), "en": (0.6, 6.0)}
+# Shorter texts vary too much in length to judge by it
+LENGTH_CHECK_MIN_CHARS = 200
+# When only the document as a whole is too short or long, parts down to this size are compared
+PART_LENGTH_MIN_CHARS = 20
+
+
+def _table_columns(line):
+    """Number of cells in a markdown table row; escaped pipes do not separate cells"""
+    return len(TABLE_CELL_SEPARATOR.split(line.strip().strip('|')))
+
+
+def _front_matter(lines):
+    """Keys of a leading YAML front matter block and the number of lines it spans"""
+    if not lines or lines[0].strip() != '---':
+        return [], 0
+    for end in range(1, len(lines)):
+        if lines[end].strip() in ('---', '...'):
+            keys = [m.group(1) for m in map(FRONT_MATTER_KEY_PATTERN.match, lines[1:end]) if m]
+            return keys, end + 1
+    return [], 0
+
+
+def _structure(text):
+    """
+    Headings, fences, code, link targets, list and table shape, and front
+    matter keys of a markdown text; only the shape of code blocks is read
+    """
+    lines = text.strip().splitlines()
+    front_matter, start = _front_matter(lines)
+    shape = {
+        "headings": [],
+        "fences": 0,
+        "code": [],
+        "links": Counter(),
+        "lists": Counter(),
+        "tables": [],
+        "front_matter": front_matter,
+    }
+    code = None
+    for line in lines[start:]:
+        if FENCE_PATTERN.match(line):
+            shape["fences"] += 1
+            if code is None:
+                code = []
+            else:
+                shape["code"].append("\n".join(code))
+                code = None
+            continue
+        if code is not None:
+            code.append(line.rstrip())
+            continue
+        heading = HEADING_PATTERN.match(line)
+        if heading:
+            shape["headings"].append(len(heading.group(1)))
+        item = LIST_ITEM_PATTERN.match(line)
+        if item:
+            depth = len(item.group(1).expandtabs(4)) // 2
+            shape["lists"][(depth, "ordered" if item.group(3) else "bullet")] += 1
+        if TABLE_ROW_PATTERN.match(line):
+            shape["tables"].append(_table_columns(line))
+        for target in LINK_TARGET_PATTERN.findall(line):
+            shape["links"][target] += 1
+        for bracketed, bare in AUTOLINK_PATTERN.findall(line):
+            shape["links"][bracketed or bare.rstrip('.,;:')] += 1
+    return shape
+
+
+def is_chatter(paragraph):
+    first_line = paragraph.strip().splitlines()[0].strip() if paragraph.strip() else ""
+    return any(p.search(first_line) for p in CHATTER_PATTERNS)
+
+
+def length_problem(source, translation, target_language, min_chars=LENGTH_CHECK_MIN_CHARS):
+    """Why the translation is implausibly short or long for its source, or None"""
+    low, high = LENGTH_RATIO_BOUNDS.get(target_language, (0.15, 6.0))
+    source_chars = len(source.strip())
+    if source_chars < min_chars:
+        return None
+    ratio = len(translation.strip()) / source_chars
+    if low <= ratio <= high:
+        return None
+    return f"length ratio {ratio:.2f} outside {low}-{high}"
+
+
+def find_problems(source, translation, target_language):
+    """
+    Structural differences between a markdown source and its translation,
+    as short descriptions; an empty list means the translation looks sound.
+    """
+    problems = []
+    src = _structure(source)
+    out = _structure(translation)
+
+    if src["front_matter"] != out["front_matter"]:
+        problems.append(f"front matter keys {src['front_matter']} became {out['front_matter']}")
+    if src["headings"] != out["headings"]:
+        problems.append(f"headings {src['headings']} became {out['headings']}")
+    if out["fences"] % 2:
+        problems.append("unclosed code fence")
+    elif src["fences"] != out["fences"]:
+        problems.append(f"{src['fences'] // 2} code blocks became {out['fences'] // 2}")
+    elif src["code"] != out["code"]:
+        changed = sum(1 for a, b in zip(src["code"], out["code"]) if a != b)
+        problems.append(f"contents of {changed} code blocks changed")
+    if src["links"] != out["links"]:
+        lost = sorted((src["links"] - out["links"]).elements())
+        added = sorted((out["links"] - src["links"]).elements())
+        problems.append(f"link targets changed (lost {lost[:3]}, added {added[:3]})")
+    if src["lists"] != out["lists"]:
+        problems.append(f"list shape changed ({sum(src['lists'].values())} items became {sum(out['lists'].values())})")
+    if src["tables"] != out["tables"]:
+        problems.append(f"table shape changed ({len(src['tables'])} rows became {len(out['tables'])})")
+
+    length = length_problem(source, translation, target_language)
+    if length:
+        problems.append(length)
+
+    source_paragraphs = split_paragraphs(source)
+    if any(is_chatter(p) for p in split_paragraphs(translation)) and not any(is_chatter(p) for p in source_paragraphs):
+        problems.append("remarks about the translation were added")
+    return problems
+
+
+def strip_chatter(source, translation):
+    """Drop leading and trailing paragraphs that only talk about the translation"""
+    if any(is_chatter(p) for p in split_paragraphs(source)):
+        return translation
+    paragraphs = split_paragraphs(translation)
+    start, end = 0, len(paragraphs)
+    while start < end and is_chatter(paragraphs[start]):
+        start += 1
+    while end > start and is_chatter(paragraphs[end - 1]):
+        end -= 1
+    if (start, end) == (0, len(paragraphs)) or start == end:
+        return translation
+    print(f"[Structure Check] Removed {start + len(paragraphs) - end} paragraphs of remarks about the translation")
+    return "\n\n".join(paragraphs[start:end])
+
+
+def split_sections(text):
+    """Split markdown at its headings (outside code blocks); each section starts with its heading"""
+    sections = []
+    current = []
+    in_fence = False
+    for line in text.strip().splitlines():
+        if FENCE_PATTERN.match(line):
+            in_fence = not in_fence
+        elif not in_fence and HEADING_PATTERN.match(line) and current:
+            sections.append("\n".join(current).strip())
+            current = []
+        current.append(line)
+    if current:
+        sections.append("\n".join(current).strip())
+    return sections
+
+
+def _retranslate_broken(source_parts, translated_parts, target_language, unit):
+    """
+    Retranslate the parts whose structure does not match their source, in one
+    request that bypasses the translation memory (it may hold the bad output).
+    Returns None when no part can be blamed.
+    """
+    pairs = list(zip(source_parts, translated_parts))
+    broken = [i for i, (src, out) in enumerate(pairs) if find_problems(src, out, target_language)]
+    if not broken:
+        # A document-level length problem: blame the parts that are short or long themselves
+        broken = [i for i, (src, out) in enumerate(pairs)
+                  if length_problem(src, out, target_language, PART_LENGTH_MIN_CHARS)]
+    if not broken:
+        return None
+    print(f"[Structure Check] Retranslating {len(broken)} of {len(source_parts)} {unit}")
+    retranslated = translate_segments([source_parts[i] for i in broken], target_language, use_memory=False)
+    if not retranslated:
+        return None
+    parts = list(translated_parts)
+    for i, text in zip(broken, retranslated):
+        parts[i] = text
+        remember(source_parts[i], text, target_language)
+    return "\n\n".join(parts)
+
+
+def repair_translation(source, translation, target_language):
+    """
+    Check a translation against its source and repair what is broken.
+
+    Remarks around the translation are removed locally. Other problems are
+    fixed by retranslating only the paragraphs, or failing that the
+    sections, that differ from their source. When neither lines up with the
+    source, nothing is retranslated and the problems are reported. Redone
+    parts bypass the translation memory. Returns whichever version has the
+    fewest problems.
+    """
+    if not translation:
+        return translation
+    problems = find_problems(source, translation, target_language)
+    if not problems:
+        return translation
+    print(f"[Structure Check] {'; '.join(problems)}")
+
+    candidate = strip_chatter(source, translation)
+    candidate_problems = find_problems(source, candidate, target_language)
+    if candidate_problems:
+        repaired = None
+        aligned = False
+        for split, unit in ((split_paragraphs, "paragraphs"), (split_sections, "sections")):
+            source_parts, translated_parts = split(source), split(candidate)
+            if len(source_parts) == len(translated_parts) and len(source_parts) > 1:
+                aligned = True
+                repaired = _retranslate_broken(source_parts, translated_parts, target_language, unit)
+                if repaired:
+                    break
+        if not aligned:
+            print("[Structure Check] Could not line up the translation with its source block by block, leaving it for review")
+        if repaired:
+            repaired_problems = find_problems(source, repaired, target_language)
+            if len(repaired_problems) < len(candidate_problems):
+                candidate, candidate_problems = repaired, repaired_problems
+
+    if candidate_problems:
+        print(f"[Structure Check] Still differs from the source: {'; '.join(candidate_problems)}")
+    else:
+        print("[Structure Check] Repaired")
+    return candidate if len(candidate_problems) < len(problems) else translation
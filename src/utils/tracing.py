@@ -0,0 +1,131 @@
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+import functools
+
+TRACE_ENV = "BILINGUAL_TRACE"
+
+# Recorded events while tracing is on; None keeps every span a no-op
+_events = None
+_trace_path = None
+_origin = 0.0
+_thread_names = {}
+
+
+class _Span:
+    __slots__ = ("name", "category", "args", "start")
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def set(self, **args):
+        """Attach more arguments to the span, e.g. a result only known at the end"""
+        self.args.update(args)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        thread = threading.current_thread()
+        _thread_names.setdefault(thread.ident, thread.name)
+        event = {
+            "name": self.name,
+            "cat": self.category,
+            "ph": "X",
+            "ts": round((self.start - _origin) * 1e6, 1),
+            "dur": round((end - self.start) * 1e6, 1),
+            "pid": os.getpid(),
+            "tid": thread.ident,
+        }
+        if self.args:
+            event["args"] = {key: value if isinstance(value, (int, float, bool)) or value is None else str(value)
+                             for key, value in self.args.items()}
+        _events.append(event)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set(self, **args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+def span(name, category="phase", **args):
+    """
+    Time a block as one trace event:
+
+        with span("translation", file=path, lang=lang):
+            ...
+
+    Returns a shared no-op when tracing is off, so leaving spans in hot code costs next to nothing.
+    """
+    if _events is None:
+        return NULL_SPAN
+    return _Span(name, category, args)
+
+
+def traced(name, category="phase"):
+    """Decorator form of span() for functions that are one phase as a whole"""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _events is None:
+                return function(*args, **kwargs)
+            with _Span(name, category, {}):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def enabled():
+    return _events is not None
+
+
+def enable(path=None):
+    """
+    Start recording spans and write them to `path` (or $BILINGUAL_TRACE) when the process exits.
+    Does nothing when neither is set.
+    """
+    global _events, _trace_path, _origin
+    path = path or os.getenv(TRACE_ENV, "").strip()
+    if not path or _events is not None:
+        return False
+    _events = []
+    _trace_path = path
+    _origin = time.perf_counter()
+    atexit.register(write_trace)
+    return True
+
+
+def write_trace(path=None):
+    """Write the recorded spans as Chrome trace JSON, which Perfetto and chrome://tracing open directly"""
+    path = path or _trace_path
+    if _events is None or not path:
+        return
+    pid = os.getpid()
+    process_name = os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else "bilingual"
+    metadata = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": process_name}}]
+    metadata += [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                 for tid, name in _thread_names.items()]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"traceEvents": metadata + sorted(_events, key=lambda e: e["ts"]), "displayTimeUnit": "ms"}, f)
+    print(f"[Trace] Wrote {len(_events)} spans to {path} (open in https://ui.perfetto.dev)")
@@ -1,13 +1,410 @@
 import os
 import re
-from dotenv import load_dotenv
-import requests
+import json
+import time
+import queue
+import hashlib
+import threading
+
+from utils.config import env
+from utils.translation_memory import get_translation_memory
+from utils.tracing import span
+
+DEFAULT_OPENAI_BASE_URL = "https://api.openai.com/v1"
+TRANSLATION_MODEL = "gpt-4o-mini"
+INCREMENTAL_MODEL = "gpt-4"
+DETECTION_MODEL = "gpt-4o-mini"
+
+# Shared so long-running callers reuse warm connections to the API; created on first use
+_session = None
+
+# One entry per chat completion made by this process: model, latency and token usage
+CALL_STATS = []
+
+# Every request gets both; the read timeout is shortened further to fit the deadline
+CONNECT_TIMEOUT_SECONDS = 10
+READ_TIMEOUT_SECONDS = 300
+
+# Seconds from start-up after which no request is sent or waited for; set_deadline() overrides it
+DEADLINE_ENV = "TRANSLATION_DEADLINE_SECONDS"
+# "p95" duplicates a request still running after the model's observed p95 latency,
+# a number after that many seconds; unset or "off" disables hedging
+HEDGE_ENV = "TRANSLATION_HEDGE"
+HEDGE_MIN_SAMPLES = 10
+HEDGE_FALLBACK_SECONDS = 20.0
+
+_started = time.monotonic()
+_deadline = None
+_deadline_loaded = False
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+def require_api_key():
+    """Checked when a request is about to be made, so offline commands work without a key."""
+    api_key = env("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY is not set. Please ensure it is defined in the environment.")
+    return api_key
+
+
+def openai_base_url():
+    """Overridable so the batch and chat endpoints can be pointed at a local stand-in"""
+    return env("OPENAI_BASE_URL", DEFAULT_OPENAI_BASE_URL).rstrip("/")
+
+
+def http_session():
+    global _session
+    if _session is None:
+        import requests
+        _session = requests.Session()
+    return _session
+
+
+def set_deadline(seconds):
+    """No request is sent or waited for more than `seconds` from now (None: no deadline)"""
+    global _deadline, _deadline_loaded
+    _deadline = None if seconds is None else time.monotonic() + seconds
+    _deadline_loaded = True
+
+
+def remaining_seconds():
+    """Time left before the deadline, or None without one"""
+    global _deadline, _deadline_loaded
+    if not _deadline_loaded:
+        _deadline_loaded = True
+        value = env(DEADLINE_ENV)
+        try:
+            _deadline = _started + float(value) if value else None
+        except ValueError:
+            print(f"[Translation] Ignoring {DEADLINE_ENV}={value!r}: not a number")
+    if _deadline is None:
+        return None
+    return _deadline - time.monotonic()
+
+
+def request_timeout(read_timeout=None):
+    """(connect, read) timeout for one request, cut short by the deadline"""
+    read_timeout = read_timeout or READ_TIMEOUT_SECONDS
+    remaining = remaining_seconds()
+    if remaining is not None:
+        if remaining <= 0:
+            raise DeadlineExceeded("the run's deadline has passed")
+        read_timeout = min(read_timeout, remaining)
+    return (min(CONNECT_TIMEOUT_SECONDS, read_timeout), read_timeout)
+
+
+def hedge_delay(model):
+    """Seconds after which a slow request to `model` gets a duplicate, or None when hedging is off"""
+    setting = env(HEDGE_ENV).lower()
+    if setting in ("", "0", "off", "false", "no"):
+        return None
+    if setting not in ("p95", "1", "on", "true", "yes"):
+        try:
+            return float(setting)
+        except ValueError:
+            print(f"[Translation] Ignoring {HEDGE_ENV}={setting!r}: expected p95, off or a number of seconds")
+            return None
+    latencies = sorted(c["elapsed"] for c in CALL_STATS if c["model"] == model and c["status"] == 200)
+    if len(latencies) < HEDGE_MIN_SAMPLES:
+        return HEDGE_FALLBACK_SECONDS
+    return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+
+def _send_hedged(url, payload, headers, timeout, delay):
+    """
+    Send the request and, if it has not returned after `delay` seconds, the
+    same request again; the first response wins. Returns (response, whether a
+    duplicate was sent). The slower request is left to finish (or time out)
+    on a daemon thread and is recorded in CALL_STATS when it does, since its
+    tokens are billed too.
+    """
+    results = queue.Queue()
+
+    def send(request_timeout):
+        started = time.monotonic()
+        try:
+            response = http_session().post(url, json=payload, headers=headers, timeout=request_timeout)
+            results.put((response, None, time.monotonic() - started))
+        except Exception as e:
+            results.put((None, e, time.monotonic() - started))
+
+    threading.Thread(target=send, args=(timeout,), name="openai-request", daemon=True).start()
+    in_flight = 1
+    duplicated = False
+    try:
+        response, error, elapsed = results.get(timeout=delay)
+    except queue.Empty:
+        # The duplicate gives up when the original would, or at the deadline
+        try:
+            hedge_timeout = request_timeout(timeout[1] - delay)
+        except DeadlineExceeded:
+            hedge_timeout = None
+        if hedge_timeout:
+            print(f"[Translation] No response after {delay:.1f}s, sending a hedged request")
+            threading.Thread(target=send, args=(hedge_timeout,), name="openai-hedge", daemon=True).start()
+            in_flight = 2
+            duplicated = True
+        response, error, elapsed = results.get()
+    in_flight -= 1
+    # Prefer a response over an error while the other request may still succeed
+    while in_flight and (error is not None or response.status_code >= 500):
+        if response is not None:
+            _record_call(payload.get("model"), elapsed, response, hedge_extra=True)
+        response, error, elapsed = results.get()
+        in_flight -= 1
+
+    if in_flight:
+        def record_late():
+            late_response, _, late_elapsed = results.get()
+            if late_response is not None:
+                _record_call(payload.get("model"), late_elapsed, late_response, hedge_extra=True)
+        threading.Thread(target=record_late, name="openai-hedge-late", daemon=True).start()
+
+    if error is not None:
+        raise error
+    return response, duplicated
+
+
+def _record_call(model, elapsed, response, hedged=False, hedge_extra=False):
+    """Add one chat completion to CALL_STATS; `hedge_extra` marks the slower copy of a hedged request"""
+    usage = {}
+    if response.status_code == 200:
+        try:
+            usage = response.json().get("usage") or {}
+        except ValueError:
+            pass
+    CALL_STATS.append({
+        "model": model,
+        "elapsed": elapsed,
+        "status": response.status_code,
+        "hedged": hedged,
+        "hedge_extra": hedge_extra,
+        "prompt_tokens": usage.get("prompt_tokens", 0),
+        "cached_tokens": (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0),
+        "completion_tokens": usage.get("completion_tokens", 0)
+    })
+
+
+def _post_chat(payload, headers, timeout=None):
+    """
+    POST a chat completion request and record its latency and token usage.
+    `timeout` is the read timeout; every request also has a connect timeout and
+    is bounded by the deadline, and may be hedged (see HEDGE_ENV).
+    """
+    require_api_key()
+    model = payload.get("model")
+    timeout = request_timeout(timeout)
+    url = f"{openai_base_url()}/chat/completions"
+    with span("openai.chat", "api", model=model) as request_span:
+        started = time.monotonic()
+        delay = hedge_delay(model)
+        hedged = False
+        if delay is not None and delay < timeout[1]:
+            response, hedged = _send_hedged(url, payload, headers, timeout, delay)
+        else:
+            response = http_session().post(url, json=payload, headers=headers, timeout=timeout)
+        elapsed = time.monotonic() - started
+        request_span.set(status=response.status_code, hedged=hedged)
+
+    _record_call(model, elapsed, response, hedged=hedged)
+    return response
+
+
+def summarize_calls(calls=None):
+    """Token totals for a list of CALL_STATS entries, with latency split by whether the prompt hit the cache."""
+    calls = CALL_STATS if calls is None else calls
+    cached = [c for c in calls if c.get("cached_tokens")]
+    uncached = [c for c in calls if not c.get("cached_tokens")]
+    return {
+        "calls": len(calls),
+        "prompt_tokens": sum(c.get("prompt_tokens", 0) for c in calls),
+        "cached_tokens": sum(c.get("cached_tokens", 0) for c in calls),
+        "completion_tokens": sum(c.get("completion_tokens", 0) for c in calls),
+        "cache_hit_calls": len(cached),
+        "hedged_calls": sum(1 for c in calls if c.get("hedged")),
+        "avg_seconds_cache_hit": round(sum(c["elapsed"] for c in cached) / len(cached), 3) if cached else None,
+        "avg_seconds_cache_miss": round(sum(c["elapsed"] for c in uncached) / len(uncached), 3) if uncached else None
+    }
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Merges identical calls that overlap in time: the first caller for a key
+    does the work, and callers arriving while it runs wait for its result
+    instead of making the same request. Nothing is kept once the call ends.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.coalesced = 0
+
+    def do(self, key, function):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = function()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+
+_flights = SingleFlight()
+
+
+def coalesced_requests():
+    """How many calls joined an identical one already in flight instead of making a request"""
+    return _flights.coalesced
+
+
+def flight_key(kind, text, language, model):
+    """Identical work regardless of line endings and trailing whitespace"""
+    normalized = "\n".join(line.rstrip() for line in text.replace("\r\n", "\n").strip().split("\n"))
+    digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+    return (kind, digest, language, model)
+
+
+# Every translation request starts with the same system message for a given
+# target language; anything that varies per request (task details, memory
+# hints, the text) comes after it. At about 350-400 tokens the message is well
+# below OpenAI's 1024-token caching minimum, so it is not cached on its own.
+TRANSLATION_GUIDELINES = """You translate technical documentation, GitHub issues, pull requests and comments between English and Japanese for a software team.
+
+General rules:
+1. Translate the meaning faithfully. Do not summarize, shorten, expand or explain the text.
+2. Return only the translation. Never add greetings, notes, apologies or remarks about the translation.
+3. Preserve markdown structure exactly: headings, list markers and nesting, numbering, tables, blockquotes, emphasis, line breaks and blank lines.
+4. Never translate or change the contents of fenced code blocks, inline code, command lines, file paths, URLs, email addresses, HTML tags, HTML comments or template placeholders such as {name} or %s.
+5. Keep link targets unchanged and translate only the link text.
+6. Keep product names, library names, API names, identifiers and @mentions as written.
+7. Keep issue and PR references such as #123, commit hashes and version numbers as written.
+8. If a part of the text is already in the target language, keep it as it is.
+9. Keep emoji and punctuation-based markers such as checkboxes ([ ] and [x]) in place.
+"""
+
+TARGET_STYLE = {
+    "ja": """Style for Japanese output:
+- Write natural Japanese as used in software documentation, in です/ます form for prose.
+- Keep well-established English technical terms (for example API, commit, branch, pull request) in English or in their common katakana form; be consistent within a text.
+- Use full-width Japanese punctuation (、。) in Japanese sentences and keep half-width characters inside code and identifiers.
+""",
+    "en": """Style for English output:
+- Write natural, concise English as used in software documentation.
+- Use sentence case for headings unless the source clearly uses title case.
+- Romanize Japanese names only when they have no established English form.
+"""
+}
+
+# Optional YAML/JSON glossary: {target_language: {source term: translation}}, named by this variable
+GLOSSARY_FILE_ENV = "TRANSLATION_GLOSSARY_FILE"
+
+_glossary = None
+_system_prompts = {}
+
+
+def load_glossary():
+    global _glossary
+    if _glossary is None:
+        _glossary = {}
+        glossary_file = env(GLOSSARY_FILE_ENV)
+        if glossary_file:
+            try:
+                import yaml
+                with open(glossary_file, 'r', encoding='utf-8') as f:
+                    _glossary = yaml.safe_load(f) or {}
+                if not isinstance(_glossary, dict):
+                    raise ValueError("expected a mapping of target language to terms")
+            except Exception as e:
+                print(f"[Translation] Could not read glossary {glossary_file}: {e}")
+                _glossary = {}
+    return _glossary
+
+
+def translation_system_prompt(target_language):
+    """The stable, byte-identical prefix shared by every translation request to `target_language`."""
+    if target_language not in _system_prompts:
+        prompt = TRANSLATION_GUIDELINES + "\n" + TARGET_STYLE.get(target_language, "")
+        terms = load_glossary().get(target_language) or {}
+        if terms:
+            prompt += "\nGlossary (always use these translations):\n"
+            prompt += "\n".join(f"- {source} => {target}" for source, target in sorted(terms.items()))
+            prompt += "\n"
+        prompt += f"\nTarget language: {target_language}\n"
+        _system_prompts[target_language] = prompt
+    return _system_prompts[target_language]
+
+
+def _hint_message(hints):
+    return {"role": "system", "content": (
+        "Use these established translations for recurring sentences where they apply:\n"
+        + "\n".join(f"- {source} => {target}" for source, target in hints)
+    )}
+
+
+DETECTION_RULES = """You are a language detector. Your task is to identify the PRIMARY language of the text.
+
+Rules:
+1. Determine which language the author INTENDED to write in based on sentence structure and grammar
+2. If the text is written in English grammar/structure with a few foreign words mixed in, return 'en'
+3. If the text is written in Japanese grammar/structure with a few English words mixed in, return 'ja'
+4. For truly mixed content, identify which language dominates (>50% of meaningful content)
+5. For any other language (Chinese, Korean, French, etc.), return 'en'
+
+Examples:
+- "I am finding 間違い in the logic" → 'en' (English sentence with one Japanese word)
+- "Let's meet at 東京駅 tomorrow" → 'en' (English sentence with Japanese location)
+- "今日はgood dayですね" → 'ja' (Japanese sentence with English words)
+- "このcodeをreviewしてください" → 'ja' (Japanese sentence structure)
+- "Hello world" → 'en'
+- "こんにちは" → 'ja'
+
+"""
 
-load_dotenv()
+DETECTION_BATCH_SIZE = 50
+DETECTION_SAMPLE_CHARS = 500
+# Share of Japanese characters at or above which a text is treated as Japanese without asking the model
+CLEAR_JAPANESE_RATIO = 0.5
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "").strip()
-if not OPENAI_API_KEY:
-    raise ValueError("OPENAI_API_KEY is not set. Please ensure it is defined in the environment.")
+JP_RUN_PATTERN = re.compile(r'[\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF\uFF60-\uFF9F]+')
+LATIN_RUN_PATTERN = re.compile(r'[A-Za-z]+')
+
+FENCED_CODE_PATTERN = re.compile(r'```[\s\S]*?```')
+INLINE_CODE_PATTERN = re.compile(r'`[^`]*`')
+URL_PATTERN = re.compile(r'https?://\S+')
+BLOCKQUOTE_LINE_PATTERN = re.compile(r'(?m)^[ \t]*>.*$')
+EXTRA_BLANK_LINES_PATTERN = re.compile(r'\n{3,}')
+
+
+def _count_chars(pattern, text):
+    """Number of characters matched by a run pattern; removing whole runs is much faster than findall per character."""
+    return len(text) - len(pattern.sub('', text))
 
 
 def _detect_language_unicode(text):
@@ -17,16 +414,8 @@ def _detect_language_unicode(text):
     alphabetic/CJK content, 'en' otherwise.
     A single Japanese word in an English sentence will not flip detection.
     """
-    HIRAGANA = '\u3040-\u309F'
-    KATAKANA = '\u30A0-\u30FF'
-    KANJI = '\u4E00-\u9FFF'
-    HALF_WIDTH_KATAKANA = '\uFF60-\uFF9F'
-
-    jp_pattern = f'[{HIRAGANA}{KATAKANA}{KANJI}{HALF_WIDTH_KATAKANA}]'
-    latin_pattern = r'[A-Za-z]'
-
-    jp_chars = len(re.findall(jp_pattern, text))
-    latin_chars = len(re.findall(latin_pattern, text))
+    jp_chars = _count_chars(JP_RUN_PATTERN, text)
+    latin_chars = _count_chars(LATIN_RUN_PATTERN, text)
     total = jp_chars + latin_chars
 
     if total == 0:
@@ -35,27 +424,35 @@ def _detect_language_unicode(text):
     return "ja" if (jp_chars / total) >= 0.1 else "en"
 
 
-def _preprocess_for_detection(text):
+def strip_comment_noise(text):
     """
-    Remove noise from a GitHub comment before language detection:
+    Remove the parts of a GitHub comment that are not the author's own prose:
     - Blockquotes (lines starting with >) — these are quoted text from other
       people, not the author's own language
     - Fenced code blocks (``` ... ```)
     - Inline code (` ... `)
     - URLs
-
-    Falls back to the original text if stripping leaves too little content.
     """
     # Remove fenced code blocks
-    cleaned = re.sub(r'```[\s\S]*?```', '', text)
+    cleaned = FENCED_CODE_PATTERN.sub('', text)
     # Remove inline code
-    cleaned = re.sub(r'`[^`]*`', '', cleaned)
+    cleaned = INLINE_CODE_PATTERN.sub('', cleaned)
     # Remove URLs
-    cleaned = re.sub(r'https?://\S+', '', cleaned)
+    cleaned = URL_PATTERN.sub('', cleaned)
     # Remove blockquote lines (lines starting with optional whitespace then >)
-    cleaned = re.sub(r'(?m)^[ \t]*>.*$', '', cleaned)
+    cleaned = BLOCKQUOTE_LINE_PATTERN.sub('', cleaned)
     # Collapse blank lines
-    cleaned = re.sub(r'\n{3,}', '\n\n', cleaned).strip()
+    return EXTRA_BLANK_LINES_PATTERN.sub('\n\n', cleaned).strip()
+
+
+def _preprocess_for_detection(text):
+    """
+    Strip comment noise before language detection, so that quoted Japanese
+    text in an English reply doesn't skew the result.
+
+    Falls back to the original text if stripping leaves too little content.
+    """
+    cleaned = strip_comment_noise(text)
 
     # If stripping removed almost everything, fall back to original
     if len(cleaned) < 20:
@@ -66,8 +463,15 @@ def _preprocess_for_detection(text):
 def detect_language(text):
     """
     Detect language using LLM. Returns 'ja' for Japanese, 'en' for English.
-    Falls back to Unicode detection if API fails.
+    Falls back to Unicode detection if API fails. Identical detections
+    running at the same time share one request.
     """
+    if not text or not text.strip():
+        return _detect_language(text)
+    return _flights.do(flight_key("detect", text, None, DETECTION_MODEL), lambda: _detect_language(text))
+
+
+def _detect_language(text):
     if not text or not text.strip():
         print("[Language Detection] Empty text, defaulting to 'en'")
         return "en"
@@ -82,29 +486,10 @@ def detect_language(text):
     print(f"[Language Detection] Analyzing text ({len(sample_text)} chars): '{sample_text[:100]}...'")
 
     try:
-        url = "https://api.openai.com/v1/chat/completions"
-
-        system_prompt = """You are a language detector. Your task is to identify the PRIMARY language of the text.
-
-Rules:
-1. Determine which language the author INTENDED to write in based on sentence structure and grammar
-2. If the text is written in English grammar/structure with a few foreign words mixed in, return 'en'
-3. If the text is written in Japanese grammar/structure with a few English words mixed in, return 'ja'
-4. For truly mixed content, identify which language dominates (>50% of meaningful content)
-5. For any other language (Chinese, Korean, French, etc.), return 'en'
-
-Examples:
-- "I am finding 間違い in the logic" → 'en' (English sentence with one Japanese word)
-- "Let's meet at 東京駅 tomorrow" → 'en' (English sentence with Japanese location)
-- "今日はgood dayですね" → 'ja' (Japanese sentence with English words)
-- "このcodeをreviewしてください" → 'ja' (Japanese sentence structure)
-- "Hello world" → 'en'
-- "こんにちは" → 'ja'
-
-Respond with ONLY 'ja' or 'en'. Nothing else."""
+        system_prompt = DETECTION_RULES + "Respond with ONLY 'ja' or 'en'. Nothing else."
 
         payload = {
-            "model": "gpt-4o-mini",
+            "model": DETECTION_MODEL,
             "messages": [
                 {
                     "role": "system",
@@ -120,10 +505,10 @@ Respond with ONLY 'ja' or 'en'. Nothing else."""
         }
 
         headers = {
-            "Authorization": f"Bearer {os.getenv('OPENAI_API_KEY', '').strip()}"
+            "Authorization": f"Bearer {env('OPENAI_API_KEY')}"
         }
 
-        response = requests.post(url, json=payload, headers=headers, timeout=10)
+        response = _post_chat(payload, headers, timeout=10)
 
         if response.status_code == 200:
             result = response.json()
@@ -153,29 +538,134 @@ Respond with ONLY 'ja' or 'en'. Nothing else."""
         print(f"[Language Detection] Unicode fallback result: '{fallback_result}'")
         return fallback_result
 
-def translate_text(text, target_language):
-    try:
-        url = "https://api.openai.com/v1/chat/completions"
+def _classify_locally(preprocessed):
+    """Return 'ja' or 'en' when the script alone settles the language, None when the model is needed."""
+    jp_chars = _count_chars(JP_RUN_PATTERN, preprocessed)
+    latin_chars = _count_chars(LATIN_RUN_PATTERN, preprocessed)
+    if jp_chars == 0:
+        return "en"
+    if jp_chars / (jp_chars + latin_chars) >= CLEAR_JAPANESE_RATIO:
+        return "ja"
+    return None
+
 
+def detect_languages(texts):
+    """
+    Detect the language of many texts at once. Returns a list of 'ja'/'en' in input order.
+
+    Texts whose script makes the answer obvious are decided locally; the
+    rest are sent together in one structured request per
+    DETECTION_BATCH_SIZE items. Falls back to Unicode detection for any
+    item the model does not label.
+    """
+    results = [None] * len(texts)
+    samples = {}
+    for i, text in enumerate(texts):
+        if not text or not text.strip():
+            results[i] = "en"
+            continue
+        preprocessed = _preprocess_for_detection(text)
+        local = _classify_locally(preprocessed)
+        if local:
+            results[i] = local
+        else:
+            samples[i] = preprocessed[:DETECTION_SAMPLE_CHARS]
+
+    print(f"[Language Detection] {len(texts) - len(samples)} of {len(texts)} texts decided locally")
+
+    pending = sorted(samples)
+    for start in range(0, len(pending), DETECTION_BATCH_SIZE):
+        chunk = pending[start:start + DETECTION_BATCH_SIZE]
+        items = [{"id": n, "text": samples[i]} for n, i in enumerate(chunk)]
+        system_prompt = DETECTION_RULES + (
+            "You will receive a JSON array of items, each with an id and a text. "
+            "Apply the rules to every text independently and respond with a JSON object "
+            "of the form {\"labels\": {\"<id>\": \"ja\" or \"en\"}} covering every id."
+        )
         payload = {
-            "model": "gpt-4o-mini",  
+            "model": DETECTION_MODEL,
             "messages": [
-                {"role": "system", "content": f"Translate this text to {target_language}."},
-                {"role": "user", "content": text}
-            ]
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": json.dumps(items, ensure_ascii=False)}
+            ],
+            "temperature": 0,
+            "response_format": {"type": "json_object"},
+            "max_tokens": 10 * len(chunk) + 20
+        }
+        headers = {
+            "Authorization": f"Bearer {env('OPENAI_API_KEY')}"
         }
 
+        labels = {}
+        try:
+            response = _post_chat(payload, headers, timeout=30)
+            if response.status_code == 200:
+                content = response.json()["choices"][0]["message"]["content"]
+                parsed = json.loads(content)
+                labels = parsed.get("labels") if isinstance(parsed, dict) else None
+                if not isinstance(labels, dict):
+                    labels = {}
+            else:
+                print(f"[Language Detection] Batch API failed with status {response.status_code}: {response.text}")
+        except Exception as e:
+            print(f"[Language Detection] Batch error: {e}")
+
+        for n, i in enumerate(chunk):
+            label = str(labels.get(str(n), "")).strip().lower()
+            if label in ("ja", "en"):
+                results[i] = label
+            else:
+                results[i] = _detect_language_unicode(samples[i])
+
+    return results
+
+def build_translation_payload(text, target_language, hints=None):
+    """Build the chat completion request body used for a full translation.
+    `hints` are (source, translation) pairs from the translation memory."""
+    messages = [
+        {"role": "system", "content": translation_system_prompt(target_language)},
+        {"role": "system", "content": f"Translate the next message to {target_language}."}
+    ]
+    if hints:
+        messages.append(_hint_message(hints))
+    messages.append({"role": "user", "content": text})
+    return {
+        "model": TRANSLATION_MODEL,
+        "messages": messages
+    }
+
+def translate_text(text, target_language, use_memory=True):
+    """
+    Translate text with the translation model; identical translations running at the same time share one request.
+    With `use_memory` off the translation memory is neither consulted nor taught, e.g. when redoing a bad translation.
+    """
+    if not text:
+        return _translate_text(text, target_language, use_memory)
+    kind = "translate" if use_memory else "translate-fresh"
+    return _flights.do(flight_key(kind, text, target_language, TRANSLATION_MODEL),
+                       lambda: _translate_text(text, target_language, use_memory))
+
+def _translate_text(text, target_language, use_memory=True):
+    hints = get_translation_memory().hints(text, target_language) if use_memory else []
+    if hints:
+        print(f"[Translation Memory] Passing {len(hints)} remembered segments as hints")
+
+    try:
+        payload = build_translation_payload(text, target_language, hints)
+
         headers = {
-           "Authorization": f"Bearer {os.getenv('OPENAI_API_KEY', '').strip()}"
+           "Authorization": f"Bearer {env('OPENAI_API_KEY')}"
         }
         if "Bearer" not in headers["Authorization"]:
             print("Error: Authorization header is malformed.")
 
-        response = requests.post(url, json=payload, headers=headers)
+        response = _post_chat(payload, headers)
 
         if response.status_code == 200:
             result = response.json()
             translation = result["choices"][0]["message"]["content"]
+            if use_memory:
+                remember(text, translation, target_language)
             return translation
         else:
             print(f"Failed to connect to OpenAI API. Status code: {response.status_code}")
@@ -187,6 +677,94 @@ def translate_text(text, target_language):
         return None
 
 
+def remember(source, translation, target_language):
+    """Teach the translation memory a translation, but only once it passes the structure checks"""
+    # structure_check builds on this module, so it is imported when first needed
+    from utils.structure_check import find_problems
+    if not find_problems(source, translation, target_language):
+        get_translation_memory().learn(source, translation, target_language)
+
+
+SEGMENT_MARKER_PATTERN = re.compile(r'^\[\[(\d+)\]\][ \t]*$', re.MULTILINE)
+
+def translate_segments(segments, target_language, use_memory=True):
+    """
+    Translate several independent markdown segments in one request.
+
+    Each segment is sent behind a [[n]] marker line and the model is asked to
+    keep the markers, so the reply can be split back into one translation per
+    segment. Returns a list the same length as `segments`, or None on failure.
+    With `use_memory` off the translation memory is neither consulted nor taught.
+    """
+    if not segments:
+        return []
+
+    numbered = "\n\n".join(f"[[{n}]]\n{segment}" for n, segment in enumerate(segments, 1))
+    hints = get_translation_memory().hints("\n\n".join(segments), target_language) if use_memory else []
+
+    try:
+        messages = [
+            {"role": "system", "content": translation_system_prompt(target_language)},
+            {"role": "system", "content": (
+                f"Translate each numbered markdown segment to {target_language}. "
+                "Keep every [[n]] marker line exactly as it is, on its own line, and put the "
+                "translation of that segment after it. Preserve markdown formatting. "
+                "Return only the markers and translations."
+            )}
+        ]
+        if hints:
+            messages.append(_hint_message(hints))
+        messages.append({"role": "user", "content": numbered})
+        payload = {
+            "model": TRANSLATION_MODEL,
+            "messages": messages
+        }
+
+        headers = {
+            "Authorization": f"Bearer {env('OPENAI_API_KEY')}"
+        }
+
+        response = _post_chat(payload, headers)
+
+        if response.status_code != 200:
+            print(f"Failed to connect to OpenAI API. Status code: {response.status_code}")
+            print(f"Response: {response.text}")
+            return None
+
+        content = response.json()["choices"][0]["message"]["content"]
+        parts = SEGMENT_MARKER_PATTERN.split(content)
+        # parts = [preamble, "1", text1, "2", text2, ...]
+        translations = {int(number): text.strip() for number, text in zip(parts[1::2], parts[2::2])}
+        if sorted(translations) != list(range(1, len(segments) + 1)):
+            print(f"Segment translation returned {len(translations)} segments, expected {len(segments)}")
+            return None
+        results = [translations[n] for n in range(1, len(segments) + 1)]
+        if use_memory:
+            for segment, translation in zip(segments, results):
+                remember(segment, translation, target_language)
+        return results
+
+    except Exception as e:
+        print(f"Error in segment translation: {e}")
+        return None
+
+
+INCREMENTAL_INSTRUCTIONS = """You are updating an existing translation of a markdown document after its source changed.
+
+The next message contains three versions of the document:
+1. BASE VERSION: The previous version of the source document
+2. EXISTING TRANSLATION: The current translation of the base version
+3. CURRENT VERSION: The updated version of the source document (with changes)
+
+Your task:
+- Identify what changed between BASE and CURRENT versions
+- Update ONLY the changed portions in the EXISTING TRANSLATION
+- Preserve all unchanged parts of the EXISTING TRANSLATION exactly as they are
+- Maintain the same markdown structure and formatting
+
+CRITICAL: Return ONLY the complete updated translation. Do NOT include any explanations, notes, or comments. Do NOT say "Since there are no changes" or similar messages. Just return the translated document content."""
+
+
 def translate_incremental(base_content, current_content, existing_translation, target_lang):
     """
     Translate only the changed portions using GPT with three-file context.
@@ -206,55 +784,40 @@ def translate_incremental(base_content, current_content, existing_translation, t
     print(f"  - existing_translation: {len(existing_translation)} chars")
     print(f"  - target_lang: {target_lang}")
     
-    prompt = f"""You are translating a markdown document to {target_lang}.
-
-I will provide you with three versions of the document:
-1. BASE VERSION: The previous version of the source document
-2. CURRENT VERSION: The updated version of the source document (with changes)
-3. EXISTING TRANSLATION: The current translation of the base version
-
-Your task:
-- Identify what changed between BASE and CURRENT versions
-- Update ONLY the changed portions in the EXISTING TRANSLATION
-- Preserve all unchanged parts of the EXISTING TRANSLATION exactly as they are
-- Maintain the same markdown structure and formatting
-
-CRITICAL: Return ONLY the complete updated translation. Do NOT include any explanations, notes, or comments. Do NOT say "Since there are no changes" or similar messages. Just return the translated document content.
-
-BASE VERSION:
+    # The fixed instructions go first and the documents last, with the one that
+    # changes most often (CURRENT VERSION) at the very end
+    prompt = f"""BASE VERSION:
 {base_content}
 
-CURRENT VERSION:
-{current_content}
-
 EXISTING TRANSLATION:
 {existing_translation}
 
+CURRENT VERSION:
+{current_content}
+
 Updated translation:"""
 
     try:
-        url = "https://api.openai.com/v1/chat/completions"
-        
         payload = {
-            "model": "gpt-4",
+            "model": INCREMENTAL_MODEL,
             "messages": [
-                {"role": "system", "content": f"You are a precise translator. Return ONLY the translated content without any explanations or comments. Translate only the changed portions to {target_lang}."},
+                {"role": "system", "content": translation_system_prompt(target_lang)},
+                {"role": "system", "content": INCREMENTAL_INSTRUCTIONS},
                 {"role": "user", "content": prompt}
             ],
             "temperature": 0.1
         }
         
         print(f"\n[DEBUG] Sending request to OpenAI API:")
-        print(f"  - model: gpt-4")
+        print(f"  - model: {INCREMENTAL_MODEL}")
         print(f"  - prompt length: {len(prompt)} chars")
-        print(f"  - system message: 'You are a precise translator. Translate only the changed portions to {target_lang}.'")
         print(f"  - Prompt preview (first 200 chars): {prompt[:200]}...")
         
         headers = {
-            "Authorization": f"Bearer {os.getenv('OPENAI_API_KEY', '').strip()}"
+            "Authorization": f"Bearer {env('OPENAI_API_KEY')}"
         }
         
-        response = requests.post(url, json=payload, headers=headers)
+        response = _post_chat(payload, headers)
         
         print(f"\n[DEBUG] OpenAI API response:")
         print(f"  - status_code: {response.status_code}")
@@ -0,0 +1,146 @@
+import os
+import json
+import hashlib
+import subprocess
+from pathlib import Path
+
+LOCK_FILE = ".bilingual-lock.json"
+
+
+def _key(path):
+    return Path(os.path.relpath(str(path), '.')).as_posix()
+
+
+def blob_hash(path, write=False):
+    """
+    The blob hash git gives the file, with the repository's filters (autocrlf,
+    LFS) applied, so it matches what git would commit. With `write` the blob
+    is also stored, so it can be read back later. Outside a git repository
+    the raw content is hashed instead.
+    """
+    result = subprocess.run(
+        ['git', 'hash-object'] + (['-w'] if write else []) + ['--', str(path)],
+        capture_output=True,
+        text=True,
+        encoding='utf-8'
+    )
+    if result.returncode == 0:
+        return result.stdout.strip()
+    if write:
+        return None
+    with open(path, 'rb') as f:
+        data = f.read()
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def read_blob(blob):
+    result = subprocess.run(
+        ['git', 'cat-file', 'blob', blob],
+        capture_output=True,
+        text=True,
+        encoding='utf-8'
+    )
+    if result.returncode != 0:
+        return None
+    return result.stdout
+
+
+def blob_at(ref, path):
+    """Hash of the blob `path` had at `ref`, or None."""
+    result = subprocess.run(
+        ['git', 'rev-parse', '--verify', '--quiet', f'{ref}:{Path(path).as_posix()}'],
+        capture_output=True,
+        text=True,
+        encoding='utf-8'
+    )
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip()
+
+
+class TranslationLock:
+    """
+    Records, per source document, the git blob its translations were produced from.
+
+    The lockfile is committed alongside the translations so the next run can
+    diff a source against the exact version that was last translated,
+    instead of guessing with HEAD^.
+    """
+
+    def __init__(self, path=LOCK_FILE):
+        self.path = path
+        self.documents = {}
+        self.dirty = False
+        # Entries this run set (or removed, as None), so separate runs can be merged
+        self.updates = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.documents = json.load(f).get("documents", {})
+            except Exception as e:
+                print(f"Error reading {path}: {e}")
+
+    def get(self, source_path):
+        return self.documents.get(_key(source_path))
+
+    def base_blob(self, source_path):
+        entry = self.get(source_path)
+        return entry.get("source_blob") if entry else None
+
+    def record(self, source_path, source_lang, targets):
+        """Record that `targets` ({lang: path}) were translated from the current content of `source_path`."""
+        blob = blob_hash(source_path, write=True)
+        if not blob:
+            return
+        key = _key(source_path)
+        # A file that was just overwritten as a translation is no longer a source
+        for target in targets.values():
+            self.remove(target)
+        entry = {
+            "source_blob": blob,
+            "source_lang": source_lang,
+            "targets": {lang: _key(target) for lang, target in sorted(targets.items())}
+        }
+        if self.documents.get(key) != entry:
+            self._set(key, entry)
+
+    def move(self, old_source, new_source, source_lang, targets, fallback_blob=None, keep_old=False):
+        """
+        Carry a source's entry over to its new path after a rename (or, with
+        `keep_old`, a copy). The recorded blob is kept, so the next run diffs
+        the new path against the version the translation was made from.
+        """
+        entry = self.get(old_source)
+        if not keep_old:
+            self.remove(old_source)
+        blob = entry.get("source_blob") if entry else fallback_blob
+        if not blob:
+            return
+        self._set(_key(new_source), {
+            "source_blob": blob,
+            "source_lang": source_lang,
+            "targets": {lang: _key(target) for lang, target in sorted(targets.items())}
+        })
+
+    def _set(self, key, entry):
+        self.documents[key] = entry
+        self.updates[key] = entry
+        self.dirty = True
+
+    def remove(self, source_path):
+        key = _key(source_path)
+        if self.documents.pop(key, None) is not None:
+            self.updates[key] = None
+            self.dirty = True
+
+    def apply_updates(self, updates):
+        """Replay the `updates` of another run, e.g. one shard of a sharded run"""
+        for key, entry in updates.items():
+            if entry is None:
+                self.remove(key)
+            elif self.documents.get(key) != entry:
+                self._set(key, entry)
+
+    def dumps(self):
+        return json.dumps({"version": 1, "documents": dict(sorted(self.documents.items()))},
+                          ensure_ascii=False, indent=2) + "\n"
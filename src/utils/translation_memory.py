@@ -0,0 +1,215 @@
+import os
+import re
+import json
+import zlib
+import random
+import atexit
+import tempfile
+import threading
+
+from utils.config import env
+
+# Persist the memory across runs by pointing this variable at a JSON file; otherwise it lives for one process
+MEMORY_FILE_ENV = "TRANSLATION_MEMORY_FILE"
+
+FUZZY_THRESHOLD = 0.8
+MAX_HINTS = 30
+MIN_SEGMENT_CHARS = 4
+
+SHINGLE_SIZE = 3
+MINHASH_PERMUTATIONS = 32
+MINHASH_BANDS = 8
+MINHASH_ROWS = MINHASH_PERMUTATIONS // MINHASH_BANDS
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240601)
+_MINHASH_PARAMS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+                   for _ in range(MINHASH_PERMUTATIONS)]
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+(?=\S)|(?<=[。！？])')
+MARKDOWN_PREFIX = re.compile(r'^(\s*(?:#{1,6}\s+|[-*+]\s+(?:\[[ xX]\]\s+)?|\d+[.)]\s+|>\s*)*)')
+FENCE_LINE = re.compile(r'^\s*(```|~~~)')
+
+
+def split_sentences(text):
+    return [s.strip() for s in SENTENCE_BOUNDARY.split(text) if s.strip()]
+
+
+def normalize_segment(segment):
+    return " ".join(segment.split())
+
+
+def _shingles(text):
+    text = text.lower()
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def _minhash(shingles):
+    hashes = [zlib.crc32(s.encode("utf-8")) for s in shingles]
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _MINHASH_PARAMS]
+
+
+def _jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _iter_prose_lines(text):
+    """Yield (index, prefix, body) for every non-blank line outside fenced code blocks."""
+    in_fence = False
+    for i, line in enumerate(text.splitlines()):
+        if FENCE_LINE.match(line):
+            in_fence = not in_fence
+            continue
+        if in_fence or not line.strip():
+            continue
+        prefix = MARKDOWN_PREFIX.match(line).group(1)
+        yield i, prefix, line[len(prefix):].rstrip()
+
+
+class TranslationMemory:
+    """
+    Sentence-level store of earlier translations.
+
+    Exact repeats are found by their normalized text; near duplicates are
+    found through a MinHash LSH index over character trigrams, so lookups
+    stay fast as the memory grows.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = {}
+        self._shingles = {}
+        self._buckets = {}
+        self._dirty = False
+        self._lock = threading.RLock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                for target_language, pairs in data.get("entries", {}).items():
+                    for source, target in pairs.items():
+                        self._insert(source, target, target_language)
+                print(f"[Translation Memory] Loaded {sum(len(p) for p in self.entries.values())} segments from {path}")
+            except Exception as e:
+                print(f"[Translation Memory] Could not read {path}: {e}")
+
+    def _insert(self, source, target, target_language):
+        pairs = self.entries.setdefault(target_language, {})
+        is_new = source not in pairs
+        pairs[source] = target
+        if is_new:
+            shingles = _shingles(source)
+            self._shingles[(target_language, source)] = shingles
+            signature = _minhash(shingles)
+            for band in range(MINHASH_BANDS):
+                key = (target_language, band, tuple(signature[band * MINHASH_ROWS:(band + 1) * MINHASH_ROWS]))
+                self._buckets.setdefault(key, set()).add(source)
+
+    def add(self, source, target, target_language):
+        source = normalize_segment(source)
+        target = target.strip()
+        if len(source) < MIN_SEGMENT_CHARS or not target or source == normalize_segment(target):
+            return
+        with self._lock:
+            if self.entries.get(target_language, {}).get(source) != target:
+                self._insert(source, target, target_language)
+                self._dirty = True
+
+    def lookup(self, segment, target_language):
+        """Return (source, translation, similarity) for the closest stored segment, or None."""
+        source = normalize_segment(segment)
+        with self._lock:
+            pairs = self.entries.get(target_language)
+            if not pairs:
+                return None
+            if source in pairs:
+                return source, pairs[source], 1.0
+
+            shingles = _shingles(source)
+            signature = _minhash(shingles)
+            candidates = set()
+            for band in range(MINHASH_BANDS):
+                key = (target_language, band, tuple(signature[band * MINHASH_ROWS:(band + 1) * MINHASH_ROWS]))
+                candidates.update(self._buckets.get(key, ()))
+
+            best = None
+            for candidate in candidates:
+                similarity = _jaccard(shingles, self._shingles[(target_language, candidate)])
+                if similarity >= FUZZY_THRESHOLD and (best is None or similarity > best[2]):
+                    best = (candidate, pairs[candidate], similarity)
+            return best
+
+    def hints(self, text, target_language):
+        """
+        (source, translation) pairs of remembered segments that match the
+        sentences of `text`, exactly or nearly, to hand to the model. The
+        memory only ever informs a translation; it never replaces one.
+        """
+        hints = []
+        seen = set()
+        with self._lock:
+            if not self.entries.get(target_language):
+                return hints
+            for _, _, body in _iter_prose_lines(text):
+                for sentence in split_sentences(body):
+                    match = self.lookup(sentence, target_language)
+                    if match and match[0] not in seen and len(hints) < MAX_HINTS:
+                        seen.add(match[0])
+                        hints.append((match[0], match[1]))
+        return hints
+
+    def learn(self, source_text, translated_text, target_language):
+        """
+        Store sentence pairs from a finished translation.
+
+        Pairs are only recorded when the whole text lines up: the same number
+        of prose lines with the same markdown markers, and the same number of
+        sentences in every line. Otherwise merged or split sentences and
+        moved list items would pair sentences with the wrong translations,
+        so nothing is learned.
+        """
+        source_lines = list(_iter_prose_lines(source_text))
+        translated_lines = list(_iter_prose_lines(translated_text))
+        if not source_lines or len(source_lines) != len(translated_lines):
+            return 0
+
+        pairs = []
+        for (_, source_prefix, source_body), (_, translated_prefix, translated_body) in zip(source_lines, translated_lines):
+            source_sentences = split_sentences(source_body)
+            translated_sentences = split_sentences(translated_body)
+            if "".join(source_prefix.split()) != "".join(translated_prefix.split()):
+                return 0
+            if len(source_sentences) != len(translated_sentences):
+                return 0
+            pairs.extend(zip(source_sentences, translated_sentences))
+
+        for source, target in pairs:
+            self.add(source, target, target_language)
+        return len(pairs)
+
+    def save(self):
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".translation-memory-")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({"version": 1, "entries": self.entries}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+
+_memory = None
+
+
+def get_translation_memory():
+    """Return the process-wide translation memory, loading it on first use."""
+    global _memory
+    if _memory is None:
+        _memory = TranslationMemory(env(MEMORY_FILE_ENV) or None)
+        atexit.register(_memory.save)
+    return _memory
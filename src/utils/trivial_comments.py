@@ -0,0 +1,103 @@
+import re
+
+from utils.translation import strip_comment_noise
+
+MENTION_PATTERN = re.compile(r'(?<![\w@])@[A-Za-z0-9][A-Za-z0-9-]*(?:/[A-Za-z0-9._-]+)?')
+REFERENCE_PATTERN = re.compile(r'(?:\b[\w.-]+/[\w.-]+)?#\d+\b|\bGH-\d+\b')
+# At least one digit, so words spelled with hex letters only ("defaced", "effaced") are not taken for SHAs
+COMMIT_SHA_PATTERN = re.compile(r'\b(?=[a-f]*\d)[0-9a-f]{7,40}\b')
+EMOJI_SHORTCODE_PATTERN = re.compile(r':[a-z0-9_+-]+:')
+EMOJI_PATTERN = re.compile(r'[\U0001F000-\U0001FAFF\u2300-\u23FF\u2600-\u27BF\u2B00-\u2BFF\uFE0F\u200D\u20E3]')
+LINK_SYNTAX_PATTERN = re.compile(r'!?\[([^\]]*)\]\(\s*\)')
+HTML_TAG_PATTERN = re.compile(r'<[^>]+>')
+# Letters in any script; digits, punctuation and symbols are not worth translating on their own
+LETTER_PATTERN = re.compile(r'[^\W\d_]')
+PHRASE_TRAILER_PATTERN = re.compile(r'[\s.!?。！？~〜、,]+')
+
+# Common review phrases with fixed translations, keyed by the normalized phrase
+PHRASE_TABLE = {
+    "en": {
+        "lgtm": "LGTM（問題ないと思います）",
+        "looks good to me": "問題ないと思います",
+        "looks good": "良さそうです",
+        "sgtm": "良いと思います",
+        "sounds good": "良いと思います",
+        "thanks": "ありがとうございます",
+        "thank you": "ありがとうございます",
+        "thx": "ありがとうございます",
+        "done": "対応しました",
+        "fixed": "修正しました",
+        "addressed": "対応しました",
+        "approved": "承認しました",
+        "agreed": "同意します",
+        "same here": "同じく",
+        "will do": "対応します",
+        "good catch": "ご指摘ありがとうございます",
+        "nice catch": "ご指摘ありがとうございます",
+        "ship it": "マージして問題ありません",
+        "ptal": "確認をお願いします",
+        "please take a look": "確認をお願いします",
+        "rebased": "リベースしました",
+        "merged": "マージしました",
+        "nice": "いいですね",
+        "great": "素晴らしいです",
+    },
+    "ja": {
+        "ありがとうございます": "Thank you",
+        "ありがとう": "Thanks",
+        "確認しました": "Confirmed",
+        "対応しました": "Done",
+        "修正しました": "Fixed",
+        "承知しました": "Got it",
+        "了解です": "Got it",
+        "了解しました": "Got it",
+        "よろしくお願いします": "Thank you in advance",
+        "よろしくお願いいたします": "Thank you in advance",
+        "いいと思います": "Looks good to me",
+        "良いと思います": "Looks good to me",
+        "問題ないと思います": "Looks good to me",
+        "確認お願いします": "Please take a look",
+        "ご確認お願いします": "Please take a look",
+        "ご確認よろしくお願いします": "Please take a look",
+        "マージしました": "Merged",
+        "承認しました": "Approved",
+        "いいですね": "Nice",
+    },
+}
+
+
+def _normalize_phrase(text):
+    text = EMOJI_SHORTCODE_PATTERN.sub(' ', EMOJI_PATTERN.sub(' ', text.lower()))
+    return PHRASE_TRAILER_PATTERN.sub(' ', text).strip()
+
+
+def has_translatable_text(text):
+    """Whether anything but code, links, quotes, mentions, references, SHAs and emoji is left."""
+    cleaned = strip_comment_noise(text)
+    cleaned = LINK_SYNTAX_PATTERN.sub(r'\1', cleaned)
+    cleaned = HTML_TAG_PATTERN.sub(' ', cleaned)
+    for pattern in (MENTION_PATTERN, REFERENCE_PATTERN, COMMIT_SHA_PATTERN, EMOJI_SHORTCODE_PATTERN):
+        cleaned = pattern.sub(' ', cleaned)
+    return bool(LETTER_PATTERN.search(cleaned))
+
+
+def classify_comment(text):
+    """
+    Decide locally whether a comment needs the model at all.
+
+    Returns None when it does. Otherwise returns a dict with "kind":
+    "untranslatable" for content with nothing to translate (emoji, +1, a SHA,
+    a link, a code block), or "phrase" for a known review phrase, with its
+    "language" and fixed "translations" ({language: text}).
+    """
+    if not text or not text.strip():
+        return {"kind": "untranslatable"}
+    if not has_translatable_text(text):
+        return {"kind": "untranslatable"}
+
+    phrase = _normalize_phrase(text)
+    for language, phrases in PHRASE_TABLE.items():
+        if phrase in phrases:
+            target = "ja" if language == "en" else "en"
+            return {"kind": "phrase", "language": language, "translations": {target: phrases[phrase]}}
+    return None
@@ -0,0 +1,142 @@
+"""
+Runs the Batch API path against a local stand-in for the OpenAI file and
+batch endpoints:
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from utils import batch_translation
+
+
+class BatchStandIn(BaseHTTPRequestHandler):
+    """
+    Implements the endpoints batch_translation uses. Every request is
+    "translated" by upper-casing it, except texts containing FAIL, which get
+    a 500. Batches stay in_progress for `polls_until_done` polls.
+    """
+    polls_until_done = 1
+    files = {}
+    batches = {}
+    cancelled = []
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, obj=None, raw=None):
+        body = raw.encode('utf-8') if raw is not None else json.dumps(obj).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        data = self.rfile.read(int(self.headers['Content-Length'] or 0))
+        if self.path == '/v1/files':
+            # Pull the JSONL lines out of the multipart upload
+            lines = [line for line in data.decode('utf-8').splitlines() if line.startswith('{"custom_id"')]
+            file_id = f"file-{len(self.files)}"
+            self.files[file_id] = "\n".join(lines)
+            return self._send({"id": file_id})
+        if self.path == '/v1/batches':
+            request = json.loads(data)
+            batch_id = f"batch-{len(self.batches)}"
+            self.batches[batch_id] = {"id": batch_id, "status": "in_progress", "polls": 0,
+                                      "input_file_id": request["input_file_id"],
+                                      "request_counts": {"total": 0, "completed": 0}}
+            return self._send(self.batches[batch_id])
+        if self.path.startswith('/v1/batches/') and self.path.endswith('/cancel'):
+            batch_id = self.path.split('/')[-2]
+            self.cancelled.append(batch_id)
+            self.batches[batch_id]["status"] = "cancelling"
+            return self._send(self.batches[batch_id])
+        self.send_error(404)
+
+    def do_GET(self):
+        if self.path.startswith('/v1/batches/'):
+            batch = self.batches[self.path.split('/')[-1]]
+            batch["polls"] += 1
+            if batch["status"] == "in_progress" and batch["polls"] >= self.polls_until_done:
+                self._complete(batch)
+            return self._send(batch)
+        if self.path.startswith('/v1/files/') and self.path.endswith('/content'):
+            return self._send(raw=self.files[self.path.split('/')[-2]])
+        self.send_error(404)
+
+    def _complete(self, batch):
+        output = []
+        for line in self.files[batch["input_file_id"]].splitlines():
+            request = json.loads(line)
+            text = request["body"]["messages"][-1]["content"]
+            if "FAIL" in text:
+                response = {"status_code": 500, "body": {"error": {"message": "stand-in failure"}}}
+            else:
+                response = {"status_code": 200, "body": {"choices": [{"message": {"content": text.upper()}}]}}
+            output.append(json.dumps({"custom_id": request["custom_id"], "response": response}))
+        output_id = f"file-{len(self.files)}"
+        self.files[output_id] = "\n".join(output)
+        batch.update(status="completed", output_file_id=output_id,
+                     request_counts={"total": len(output), "completed": len(output)})
+
+
+class BatchTranslationTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), BatchStandIn)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.saved_env = {name: os.environ.get(name) for name in
+                         ("OPENAI_BASE_URL", "OPENAI_API_KEY", "BATCH_POLL_SECONDS", "BATCH_TIMEOUT_SECONDS")}
+        os.environ.update(OPENAI_BASE_URL=f"http://127.0.0.1:{cls.server.server_port}/v1",
+                          OPENAI_API_KEY="test", BATCH_POLL_SECONDS="0")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        for name, value in cls.saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+    def setUp(self):
+        BatchStandIn.polls_until_done = 2
+        BatchStandIn.cancelled = []
+        os.environ.pop("BATCH_TIMEOUT_SECONDS", None)
+
+    def test_results_are_mapped_back_by_custom_id(self):
+        results = batch_translation.translate_batch([
+            ("file-0", "Hello", "ja"),
+            ("file-1", "World", "ja"),
+        ])
+        self.assertEqual(results, {"file-0": "HELLO", "file-1": "WORLD"})
+
+    def test_failed_requests_are_left_out(self):
+        results = batch_translation.translate_batch([
+            ("file-0", "Hello", "ja"),
+            ("file-1", "FAIL here", "ja"),
+        ])
+        self.assertEqual(results, {"file-0": "HELLO"})
+
+    def test_unfinished_batch_is_cancelled(self):
+        BatchStandIn.polls_until_done = 1000
+        os.environ["BATCH_TIMEOUT_SECONDS"] = "0"
+        results = batch_translation.translate_batch([("file-0", "Hello", "ja")])
+        self.assertEqual(results, {})
+        self.assertEqual(len(BatchStandIn.cancelled), 1)
+
+    def test_no_jobs_makes_no_requests(self):
+        files_before = len(BatchStandIn.files)
+        self.assertEqual(batch_translation.translate_batch([]), {})
+        self.assertEqual(len(BatchStandIn.files), files_before)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+"""
+Checks the strategy the cost model picks for typical edits:
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from utils.cost_model import CostModel
+
+FULL_MODEL = "gpt-4o-mini"
+INCREMENTAL_MODEL = "gpt-4"
+
+
+def document(lines, edited=()):
+    return "\n".join(
+        f"Line {i} of the guide explains one step of the setup in plain words{' (edited)' if i in edited else ''}."
+        for i in range(lines)
+    )
+
+
+class ChooseStrategyTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        # An empty config keeps the built-in profiles and weights whatever the environment says
+        config_path = os.path.join(self.tmp.name, "cost.yml")
+        open(config_path, 'w').close()
+        self.model = CostModel(config_path=config_path,
+                               stats_path=os.path.join(self.tmp.name, "stats.json"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def choose(self, lines, changed):
+        base = document(lines)
+        current = document(lines, edited=set(range(changed)))
+        translation = base.replace("Line", "行")
+        return self.model.choose_strategy(current, base, translation, lines, changed,
+                                          FULL_MODEL, INCREMENTAL_MODEL)
+
+    def test_small_edit_to_large_document_is_incremental(self):
+        for lines in (50, 200, 1000):
+            with self.subTest(lines=lines):
+                self.assertEqual(self.choose(lines, 2)["strategy"], "incremental")
+
+    def test_rewritten_document_is_translated_in_full(self):
+        self.assertEqual(self.choose(200, 180)["strategy"], "full")
+
+    def test_missing_translation_is_translated_in_full(self):
+        content = document(200)
+        decision = self.model.choose_strategy(content, content, None, 200, 2, FULL_MODEL, INCREMENTAL_MODEL)
+        self.assertEqual(decision["strategy"], "full")
+        self.assertEqual(decision["reason"], "translated file does not exist")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+Checks the watch-mode file watchers against a temporary directory:
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from utils.file_watch import PollingWatcher, InotifyWatcher
+
+
+def skip_vendor(relative):
+    return relative.split(os.sep)[0] == 'vendor'
+
+
+class WatcherTests:
+    """Shared cases; subclasses say how to build the watcher"""
+
+    def make_watcher(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        os.makedirs(os.path.join(self.root, 'docs'))
+        os.makedirs(os.path.join(self.root, 'vendor'))
+        self.write('docs/guide.md', '# Guide\n')
+        self.watcher = self.make_watcher()
+
+    def tearDown(self):
+        self.watcher.close()
+        self.tmp.cleanup()
+
+    def write(self, relative, content):
+        path = os.path.join(self.root, relative)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def test_nothing_changed(self):
+        self.assertEqual(self.watcher.poll(0), set())
+
+    def test_new_and_edited_files(self):
+        self.write('docs/new.md', '# New\n')
+        self.write('docs/guide.md', '# Guide\n\nMore.\n')
+        self.assertEqual(self.watcher.poll(0.1), {os.path.join('docs', 'new.md'), os.path.join('docs', 'guide.md')})
+        self.assertEqual(self.watcher.poll(0), set())
+
+    def test_deleted_file(self):
+        os.remove(os.path.join(self.root, 'docs', 'guide.md'))
+        self.assertIn(os.path.join('docs', 'guide.md'), self.watcher.poll(0.1))
+
+    def test_skipped_directory(self):
+        self.write('vendor/lib.md', '# Lib\n')
+        self.assertEqual(self.watcher.poll(0.1), set())
+
+    def test_file_in_new_directory(self):
+        os.makedirs(os.path.join(self.root, 'docs', 'setup'))
+        self.write('docs/setup/install.md', '# Install\n')
+        self.assertIn(os.path.join('docs', 'setup', 'install.md'), self.watcher.poll(0.1))
+
+
+class PollingWatcherTest(WatcherTests, unittest.TestCase):
+    def make_watcher(self):
+        return PollingWatcher(self.root, skip_vendor)
+
+    def test_only_markdown_is_reported(self):
+        self.write('docs/notes.txt', 'notes\n')
+        self.assertEqual(self.watcher.poll(0), set())
+
+    def test_same_size_rewrite_is_seen_through_mtime(self):
+        path = self.write('docs/guide.md', '# Gvide\n')
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertEqual(self.watcher.poll(0), {os.path.join('docs', 'guide.md')})
+
+
+@unittest.skipUnless(sys.platform.startswith('linux'), "inotify is Linux only")
+class InotifyWatcherTest(WatcherTests, unittest.TestCase):
+    def make_watcher(self):
+        return InotifyWatcher(self.root, skip_vendor)
+
+
+if __name__ == "__main__":
+    unittest.main()
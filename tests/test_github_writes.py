@@ -0,0 +1,167 @@
+"""
+Checks the pacing and retry behaviour of queued GitHub writes, on a fake clock:
+
+    python -m unittest discover tests
+"""
+import io
+import os
+import sys
+import unittest
+import contextlib
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from github import GithubException
+
+from utils import github_writes
+from utils.github_writes import WritePacer, GitHubWriteQueue, get_retry_delay
+
+
+class FakeClock:
+    """Stands in for the time module: sleeping just moves the clock on"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeTarget:
+    def __init__(self, body="", labels=(), failures=()):
+        self.body = body
+        self.labels = list(labels)
+        self.failures = list(failures)
+        self.edits = []
+
+    def edit(self, body):
+        if self.failures:
+            raise self.failures.pop(0)
+        self.edits.append(body)
+        self.body = body
+
+
+class FakeLabel:
+    def __init__(self, name):
+        self.name = name
+
+
+class ClockTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.real_time = github_writes.time
+        github_writes.time = self.clock
+
+    def tearDown(self):
+        github_writes.time = self.real_time
+
+
+class WritePacerTest(ClockTestCase):
+    def test_first_write_goes_straight_out(self):
+        WritePacer().wait()
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_writes_are_spaced_by_the_minimum_interval(self):
+        pacer = WritePacer(min_interval=1.0)
+        pacer.wait()
+        self.clock.now += 0.25
+        pacer.wait()
+        self.assertEqual(self.clock.sleeps, [0.75])
+
+    def test_per_minute_cap(self):
+        pacer = WritePacer(min_interval=0, per_minute=3)
+        for _ in range(3):
+            pacer.wait()
+        pacer.wait()
+        self.assertEqual(self.clock.sleeps, [60])
+
+    def test_block_for_holds_back_the_next_write(self):
+        pacer = WritePacer(min_interval=0)
+        pacer.block_for(30)
+        pacer.wait()
+        self.assertEqual(self.clock.sleeps, [30])
+
+
+class RetryDelayTest(ClockTestCase):
+    def test_retry_after_header(self):
+        self.assertEqual(get_retry_delay(GithubException(403, {}, {"Retry-After": "12"}), 1), 12)
+
+    def test_exhausted_primary_limit_waits_for_reset(self):
+        headers = {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(self.clock.now + 40)}
+        self.assertEqual(get_retry_delay(GithubException(403, {}, headers), 1), 41)
+
+    def test_permission_error_is_not_retried(self):
+        self.assertIsNone(get_retry_delay(GithubException(403, {"message": "Resource not accessible"}, {}), 1))
+        self.assertIsNone(get_retry_delay(GithubException(404, {}, {}), 1))
+
+    def test_secondary_limit_without_headers(self):
+        exception = GithubException(403, {"message": "You have exceeded a secondary rate limit"}, {})
+        self.assertEqual(get_retry_delay(exception, 1), github_writes.DEFAULT_BACKOFF_SECONDS)
+
+
+class FlushTest(ClockTestCase):
+    def flush(self, queue):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return queue.flush()
+
+    def test_no_op_edit_is_dropped(self):
+        queue = GitHubWriteQueue(WritePacer())
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertFalse(queue.enqueue_edit(FakeTarget(body="same"), "same", "comment #1"))
+        self.assertEqual(queue.pending, [])
+
+    def test_existing_label_is_not_added_again(self):
+        queue = GitHubWriteQueue(WritePacer())
+        self.assertFalse(queue.enqueue_label(FakeTarget(labels=[FakeLabel("Translated")]), "translated", "label"))
+
+    def test_writes_apply_in_order(self):
+        queue = GitHubWriteQueue(WritePacer(min_interval=1.0))
+        first, second = FakeTarget(), FakeTarget()
+        queue.enqueue_edit(first, "one", "comment #1")
+        queue.enqueue_edit(second, "two", "comment #2")
+        self.assertEqual(self.flush(queue), 2)
+        self.assertEqual((first.body, second.body), ("one", "two"))
+        self.assertEqual(queue.succeeded, ["comment #1", "comment #2"])
+        self.assertEqual(queue.pending, [])
+        self.assertEqual(self.clock.sleeps, [1.0])
+
+    def test_rate_limited_write_is_retried(self):
+        target = FakeTarget(failures=[GithubException(429, {}, {"Retry-After": "5"})])
+        queue = GitHubWriteQueue(WritePacer(min_interval=0))
+        queue.enqueue_edit(target, "body", "comment #1")
+        self.assertEqual(self.flush(queue), 1)
+        self.assertEqual(target.edits, ["body"])
+        self.assertEqual(self.clock.sleeps, [5])
+
+    def test_failed_write_does_not_stop_the_queue(self):
+        broken = FakeTarget(failures=[GithubException(404, {"message": "Not Found"}, {})])
+        fine = FakeTarget()
+        queue = GitHubWriteQueue(WritePacer(min_interval=0))
+        queue.enqueue_edit(broken, "one", "comment #1")
+        queue.enqueue_edit(fine, "two", "comment #2")
+        self.assertEqual(self.flush(queue), 1)
+        self.assertEqual(queue.failed, ["comment #1"])
+        self.assertEqual(fine.body, "two")
+
+    def test_each_flush_reports_only_its_own_failures(self):
+        queue = GitHubWriteQueue(WritePacer(min_interval=0))
+        queue.enqueue_edit(FakeTarget(failures=[GithubException(404, {}, {})]), "one", "comment #1")
+        self.flush(queue)
+        queue.enqueue_edit(FakeTarget(), "two", "comment #2")
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(queue.flush(), 1)
+        self.assertNotIn("failed", output.getvalue())
+        self.assertEqual(queue.failed, ["comment #1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
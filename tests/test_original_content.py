@@ -0,0 +1,37 @@
+"""
+Checks how the untranslated part is read back out of a formatted body:
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from utils.original_content import get_original_content
+
+
+class GetOriginalContentTest(unittest.TestCase):
+    def test_untranslated_body(self):
+        self.assertEqual(get_original_content("  Hello\n\nworld \n"), "Hello\n\nworld")
+
+    def test_issue_and_comment_layout(self):
+        body = "<details>\n<summary><b>日本語</b></summary>\n\nこんにちは\n</details><br>\n\n<b>Original Content:</b>\nHello"
+        self.assertEqual(get_original_content(body), "Hello")
+
+    def test_pr_layout_with_br_spacing(self):
+        body = "## タイトル\n\n<b>Original Content:</b>\n\n<br>\n<br>\nHello\n\n> quoted"
+        self.assertEqual(get_original_content(body), "Hello\n\n> quoted")
+
+    def test_marker_quoted_in_the_original_is_kept(self):
+        body = "<b>Original Content:</b>\nThe bot adds an Original Content: heading."
+        self.assertEqual(get_original_content(body), "The bot adds an Original Content: heading.")
+
+    def test_br_inside_the_original_is_kept(self):
+        body = "<b>Original Content:</b>\nline one<br>line two"
+        self.assertEqual(get_original_content(body), "line one<br>line two")
+
+
+if __name__ == "__main__":
+    unittest.main()
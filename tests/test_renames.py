@@ -0,0 +1,104 @@
+"""
+Checks that renamed and copied markdown keeps its translations, in a
+throwaway git repository:
+
+    python -m unittest discover tests
+"""
+import io
+import os
+import sys
+import tempfile
+import subprocess
+import unittest
+import contextlib
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'hooks')))
+
+import post_commit
+from utils.run_report import RunReport
+from utils.translation_lock import TranslationLock
+
+GUIDE = "# Guide\n\n" + "".join(f"Step {i}: run the command and check the output.\n" for i in range(20))
+
+
+def git(*args):
+    return subprocess.run(['git'] + list(args), check=True, capture_output=True, text=True).stdout
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+class RenamesTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        git('init', '-q')
+        git('config', 'user.email', 'test@example.com')
+        git('config', 'user.name', 'Test')
+        write('docs/guide.en.md', GUIDE)
+        write('docs/guide.ja.md', "# ガイド\n")
+        write('notes.txt', "notes\n" * 20)
+        git('add', '-A')
+        git('commit', '-q', '-m', 'base')
+        self.base = git('rev-parse', 'HEAD').strip()
+
+        self.saved = post_commit.LOCK, post_commit.REPORT
+        post_commit.LOCK = TranslationLock()
+        post_commit.REPORT = RunReport()
+        self.output = contextlib.redirect_stdout(io.StringIO())
+        self.output.__enter__()
+
+    def tearDown(self):
+        self.output.__exit__(None, None, None)
+        post_commit.LOCK, post_commit.REPORT = self.saved
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def commit(self):
+        git('add', '-A')
+        git('commit', '-q', '-m', 'change')
+
+    def test_pure_rename(self):
+        git('mv', 'docs/guide.en.md', 'docs/setup.en.md')
+        self.commit()
+        self.assertEqual(post_commit.find_renames(self.base), [('R', 100, 'docs/guide.en.md', 'docs/setup.en.md')])
+
+    def test_edited_rename_and_copy(self):
+        os.makedirs('guides')
+        git('mv', 'docs/guide.en.md', 'guides/setup.en.md')
+        write('guides/setup.en.md', GUIDE + "Step 20: done.\n")
+        self.commit()
+        (kind, similarity, old_path, new_path), = post_commit.find_renames(self.base)
+        self.assertEqual((kind, old_path, new_path), ('R', 'docs/guide.en.md', 'guides/setup.en.md'))
+        self.assertLess(similarity, 100)
+
+        write('guides/copy.en.md', GUIDE)
+        write('guides/setup.en.md', GUIDE + "Step 20: done.\nStep 21: really done.\n")
+        self.commit()
+        base = git('rev-parse', 'HEAD~1').strip()
+        self.assertIn(('C', 'guides/setup.en.md', 'guides/copy.en.md'),
+                      [(kind, old, new) for kind, _, old, new in post_commit.find_renames(base)])
+
+    def test_non_markdown_renames_are_ignored(self):
+        git('mv', 'notes.txt', 'notes.md.txt')
+        self.commit()
+        self.assertEqual(post_commit.find_renames(self.base), [])
+
+    def test_unknown_base_ref(self):
+        self.assertEqual(post_commit.find_renames('no-such-ref'), [])
+
+    def test_pure_rename_moves_the_translation_and_needs_no_translation(self):
+        git('mv', 'docs/guide.en.md', 'docs/setup.en.md')
+        self.commit()
+        settled = post_commit.carry_translations_over(post_commit.find_renames(self.base), self.base, [])
+        self.assertEqual(settled, {os.path.normpath('docs/setup.en.md')})
+        self.assertTrue(os.path.exists('docs/setup.ja.md'))
+        self.assertFalse(os.path.exists('docs/guide.ja.md'))
+
+
+if __name__ == "__main__":
+    unittest.main()
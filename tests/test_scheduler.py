@@ -0,0 +1,147 @@
+"""
+Checks how markdown work is ordered and cut off by the run budget:
+
+    python -m unittest discover tests
+"""
+import io
+import os
+import sys
+import json
+import tempfile
+import unittest
+import contextlib
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from utils.scheduler import (RunScheduler, file_priority, _ignore_pattern_dirs,
+                             PRIORITY_TOP, PRIORITY_RECENT, PRIORITY_NORMAL, PRIORITY_LOW)
+
+BUDGET_VARIABLES = ("TRANSLATION_MAX_SECONDS", "TRANSLATION_MAX_TOKENS", "TRANSLATION_MAX_COST")
+
+
+class FlatCostModel:
+    """A dollar per thousand tokens, whatever the model"""
+
+    def estimate(self, model, prompt_tokens, completion_tokens):
+        return {"usd": (prompt_tokens + completion_tokens) / 1000}
+
+
+def estimate(tokens, seconds=1):
+    return {"prompt_tokens": tokens, "completion_tokens": 0, "usd": tokens / 1000, "latency_seconds": seconds}
+
+
+class FilePriorityTest(unittest.TestCase):
+    def test_ranks(self):
+        ignore_dirs = _ignore_pattern_dirs(["docs/internal/*.md", "**/generated/*.md"])
+        recent = {"docs/guide.md"}
+        cases = {
+            "README.md": PRIORITY_TOP,
+            "docs/README.ja.md": PRIORITY_TOP,
+            "CONTRIBUTING.md": PRIORITY_TOP,
+            "docs/guide.md": PRIORITY_RECENT,
+            "docs/other.md": PRIORITY_NORMAL,
+            "docs/archive/old.md": PRIORITY_LOW,
+            "docs/internal/notes.md": PRIORITY_LOW,
+        }
+        for path, priority in cases.items():
+            with self.subTest(path=path):
+                self.assertEqual(file_priority(path, recent, ignore_dirs), priority)
+
+    def test_ignore_pattern_dirs_stop_at_wildcards(self):
+        self.assertEqual(_ignore_pattern_dirs(["docs/internal/*.md", "**/generated/*.md", "*.draft.md"]), {"docs/internal"})
+
+
+class RunSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        os.makedirs("docs/archive")
+        for path in ("README.md", "docs/guide.md", "docs/other.md", "docs/archive/old.md"):
+            open(path, "w").close()
+        self.pending_path = os.path.join(self.tmp.name, "pending.json")
+        self.environ = mock.patch.dict(os.environ)
+        self.environ.start()
+        for name in BUDGET_VARIABLES:
+            os.environ.pop(name, None)
+        self.output = contextlib.redirect_stdout(io.StringIO())
+        self.output.__enter__()
+
+    def tearDown(self):
+        self.output.__exit__(None, None, None)
+        self.environ.stop()
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def scheduler(self, pending=None):
+        if pending is not None:
+            with open(self.pending_path, "w", encoding="utf-8") as f:
+                json.dump({"files": pending}, f)
+        return RunScheduler(self.pending_path)
+
+    def test_order(self):
+        files = ["docs/archive/old.md", "docs/other.md", "README.md"]
+        self.assertEqual(self.scheduler().order(files, []), ["README.md", "docs/other.md", "docs/archive/old.md"])
+
+    def test_pending_files_run_first_even_when_unchanged(self):
+        scheduler = self.scheduler(pending=["docs/guide.md", "docs/deleted.md"])
+        self.assertEqual(scheduler.order(["docs/other.md", "README.md"], []),
+                         ["docs/guide.md", "README.md", "docs/other.md"])
+
+    def test_no_limits_admits_everything(self):
+        scheduler = self.scheduler()
+        scheduler.set_limits()
+        self.assertTrue(scheduler.admit("README.md", estimate(10 ** 9), [], FlatCostModel()))
+
+    def test_limits_come_from_the_environment(self):
+        os.environ["TRANSLATION_MAX_TOKENS"] = "500"
+        scheduler = self.scheduler()
+        scheduler.set_limits()
+        self.assertEqual(scheduler.max_tokens, 500)
+        self.assertFalse(scheduler.admit("README.md", estimate(600), [], FlatCostModel()))
+
+    def test_token_budget_counts_calls_made_and_reserved(self):
+        scheduler = self.scheduler()
+        scheduler.set_limits(max_tokens=1000)
+        calls = [{"model": "m", "prompt_tokens": 300, "completion_tokens": 200}]
+        self.assertTrue(scheduler.admit("README.md", estimate(400), calls, FlatCostModel(), reserve=True))
+        self.assertFalse(scheduler.admit("docs/guide.md", estimate(200), calls, FlatCostModel()))
+        self.assertEqual([path for path, _ in scheduler.deferred], ["docs/guide.md"])
+
+    def test_cost_budget(self):
+        scheduler = self.scheduler()
+        scheduler.set_limits(max_cost=0.5)
+        self.assertTrue(scheduler.admit("README.md", estimate(400), [], FlatCostModel()))
+        self.assertFalse(scheduler.admit("docs/guide.md", estimate(600), [], FlatCostModel()))
+
+    def test_time_budget(self):
+        scheduler = self.scheduler()
+        scheduler.set_limits(max_seconds=10)
+        self.assertTrue(scheduler.admit("README.md", estimate(1, seconds=5), [], FlatCostModel()))
+        self.assertFalse(scheduler.admit("docs/guide.md", estimate(1, seconds=20), [], FlatCostModel()))
+
+    def test_save_keeps_deferred_and_untouched_pending_files(self):
+        scheduler = self.scheduler(pending=["docs/other.md", "docs/guide.md"])
+        scheduler.set_limits(max_tokens=10)
+        scheduler.admit("README.md", estimate(100), [], FlatCostModel())
+        scheduler.complete("README.md")
+        scheduler.complete("docs/guide.md")
+        scheduler.save()
+        with open(self.pending_path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f), {"files": ["README.md", "docs/other.md"]})
+
+    def test_save_removes_an_empty_pending_list(self):
+        scheduler = self.scheduler(pending=["docs/guide.md"])
+        scheduler.complete("docs/guide.md")
+        scheduler.save()
+        self.assertFalse(os.path.exists(self.pending_path))
+
+    def test_restrict_drops_pending_files_outside_the_slice(self):
+        scheduler = self.scheduler(pending=["docs/guide.md", "docs/other.md"])
+        scheduler.restrict(["docs/other.md"])
+        self.assertEqual(scheduler.pending, ["docs/other.md"])
+
+
+if __name__ == "__main__":
+    unittest.main()
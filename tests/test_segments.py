@@ -0,0 +1,106 @@
+"""
+Checks how unchanged paragraphs are carried over when a comment is retranslated:
+
+    python -m unittest discover tests
+"""
+import io
+import os
+import sys
+import unittest
+import contextlib
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from utils import segments
+from utils.segments import (split_paragraphs, paragraph_hash, attach_segment_map,
+                            extract_previous_translations, translate_with_reuse)
+
+LANGUAGE_NAMES = {"ja": "日本語", "en": "English"}
+SOURCE = "First paragraph.\n\n```python\nx = 1\n\ny = 2\n```\n\nLast paragraph."
+TRANSLATED = ["最初の段落。", "```python\nx = 1\n\ny = 2\n```", "最後の段落。"]
+
+
+def previous_for(source, translated):
+    return translated, [paragraph_hash(p) for p in split_paragraphs(source)]
+
+
+class SegmentMapTest(unittest.TestCase):
+    def test_fenced_code_stays_one_paragraph(self):
+        self.assertEqual(split_paragraphs(SOURCE), ["First paragraph.", "```python\nx = 1\n\ny = 2\n```", "Last paragraph."])
+
+    def test_hash_ignores_whitespace_changes(self):
+        self.assertEqual(paragraph_hash("one  two\nthree"), paragraph_hash("one two three"))
+        self.assertNotEqual(paragraph_hash("one two"), paragraph_hash("one three"))
+
+    def test_map_round_trips_through_a_formatted_body(self):
+        translation = attach_segment_map("\n\n".join(TRANSLATED), split_paragraphs(SOURCE))
+        body = f"<details>\n<summary><b>日本語</b></summary>\n\n{translation}\n</details><br>\n\n<b>Original Content:</b>\n\n{SOURCE}"
+        self.assertEqual(extract_previous_translations(body, LANGUAGE_NAMES), {"ja": previous_for(SOURCE, TRANSLATED)})
+
+    def test_no_map_when_paragraph_counts_differ(self):
+        merged = "最初の段落。最後の段落。"
+        self.assertEqual(attach_segment_map(merged, split_paragraphs(SOURCE)), merged)
+
+    def test_body_without_map_gives_nothing(self):
+        body = "<details>\n<summary><b>日本語</b></summary>\n\n最初の段落。\n</details><br>"
+        self.assertEqual(extract_previous_translations(body, LANGUAGE_NAMES), {})
+        self.assertEqual(extract_previous_translations("", LANGUAGE_NAMES), {})
+
+
+class TranslateWithReuseTest(unittest.TestCase):
+    def setUp(self):
+        self.saved = segments.translate_text, segments.translate_segments
+        self.calls = []
+
+        def translate_text(content, target_language):
+            self.calls.append(("text", content))
+            return f"[{target_language}] {content}"
+
+        def translate_segments(paragraphs, target_language):
+            self.calls.append(("segments", paragraphs))
+            return [f"[{target_language}] {p}" for p in paragraphs]
+
+        segments.translate_text, segments.translate_segments = translate_text, translate_segments
+
+    def tearDown(self):
+        segments.translate_text, segments.translate_segments = self.saved
+
+    def translate(self, *args, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return translate_with_reuse(*args, **kwargs)
+
+    def test_unchanged_content_makes_no_request(self):
+        result = self.translate(SOURCE, "ja", previous_for(SOURCE, TRANSLATED), attach_map=False)
+        self.assertEqual(result, "\n\n".join(TRANSLATED))
+        self.assertEqual(self.calls, [])
+
+    def test_only_the_edited_paragraph_is_sent(self):
+        edited = SOURCE.replace("Last paragraph.", "Last paragraph, edited.")
+        result = self.translate(edited, "ja", previous_for(SOURCE, TRANSLATED), attach_map=False)
+        self.assertEqual(self.calls, [("segments", ["Last paragraph, edited."])])
+        self.assertEqual(result, "\n\n".join(TRANSLATED[:2] + ["[ja] Last paragraph, edited."]))
+
+    def test_result_carries_a_fresh_map(self):
+        edited = SOURCE + "\n\nNew paragraph."
+        result = self.translate(edited, "ja", previous_for(SOURCE, TRANSLATED))
+        hashes = ",".join(paragraph_hash(p) for p in split_paragraphs(edited))
+        self.assertTrue(result.endswith(f"<!-- bilingual-segments:{hashes} -->"))
+
+    def test_everything_changed_falls_back_to_full_translation(self):
+        result = self.translate("Something else entirely.", "ja", previous_for(SOURCE, TRANSLATED), attach_map=False)
+        self.assertEqual(self.calls, [("text", "Something else entirely.")])
+        self.assertEqual(result, "[ja] Something else entirely.")
+
+    def test_failed_segment_request_falls_back_to_full_translation(self):
+        segments.translate_segments = lambda paragraphs, target_language: None
+        edited = SOURCE.replace("Last paragraph.", "Last paragraph, edited.")
+        result = self.translate(edited, "ja", previous_for(SOURCE, TRANSLATED), attach_map=False)
+        self.assertEqual(result, f"[ja] {edited}")
+
+    def test_failed_translation_returns_none(self):
+        segments.translate_text = lambda content, target_language: None
+        self.assertIsNone(self.translate(SOURCE, "ja"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+"""
+Checks how a full run is split across shards and how the shards' reports
+are merged back together:
+
+    python -m unittest discover tests
+"""
+import io
+import os
+import sys
+import json
+import tempfile
+import unittest
+import contextlib
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'hooks')))
+
+import post_commit
+from utils.run_report import RunReport
+from utils.translation_lock import TranslationLock, LOCK_FILE
+from utils.sharding import parse_shard, pair_key, assign_shards
+
+
+class ParseShardTest(unittest.TestCase):
+    def test_valid(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+
+    def test_invalid(self):
+        for value in ("0/4", "5/4", "1/0", "two/4", "1"):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    parse_shard(value)
+
+
+class AssignShardsTest(unittest.TestCase):
+    def test_pair_key(self):
+        for path in ("docs/guide.md", "docs/guide.en.md", "docs/guide.ja.md", "./docs/guide.JA.md"):
+            with self.subTest(path=path):
+                self.assertEqual(pair_key(path), "docs/guide")
+
+    def test_heaviest_first_on_the_lightest_shard(self):
+        weights = {"a.md": 7, "b.md": 5, "c.md": 4, "d.md": 3, "e.md": 1}
+        shards = assign_shards(list(weights), 2, weights.get)
+        self.assertEqual(shards, [["a.md", "d.md"], ["b.md", "c.md", "e.md"]])
+        self.assertEqual([sum(weights[f] for f in shard) for shard in shards], [10, 10])
+
+    def test_language_pairs_stay_together(self):
+        files = ["docs/guide.en.md", "docs/other.md", "docs/guide.ja.md", "README.md", "README.ja.md"]
+        shards = assign_shards(files, 3, lambda path: 1)
+        for shard in shards:
+            keys = {pair_key(f) for f in shard}
+            for key in keys:
+                self.assertEqual(sorted(f for f in shard if pair_key(f) == key),
+                                 sorted(f for f in files if pair_key(f) == key))
+
+    def test_every_file_exactly_once_and_stable(self):
+        files = [f"docs/page{i}.md" for i in range(25)]
+        weight = lambda path: len(path) * 10 + int(path[9:-3]) % 4
+        shards = assign_shards(files, 4, weight)
+        self.assertEqual(sorted(f for shard in shards for f in shard), sorted(files))
+        self.assertEqual(assign_shards(list(reversed(files)), 4, weight),
+                         [list(reversed(shard)) for shard in shards])
+
+    def test_more_shards_than_files(self):
+        self.assertEqual(assign_shards(["a.md"], 3, lambda path: 1), [["a.md"], [], []])
+
+
+class MergeShardReportsTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        for path in ("old.md", "old.ja.md", "gone.md"):
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write("# Title\n")
+        self.saved = post_commit.LOCK, post_commit.REPORT
+        post_commit.LOCK = TranslationLock()
+        post_commit.REPORT = RunReport()
+
+    def tearDown(self):
+        post_commit.LOCK, post_commit.REPORT = self.saved
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def shard_report(self, name, **fields):
+        report = RunReport()
+        for field, value in fields.items():
+            setattr(report, field, value)
+        report.write_json(name)
+        return name
+
+    def merge(self, paths):
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            post_commit.merge_shard_reports(paths)
+        return output.getvalue()
+
+    def test_reports_lockfile_and_removed_sources(self):
+        entry = {"source_blob": "abc1234", "source_lang": "en", "targets": {"ja": "new.ja.md"}}
+        first = self.shard_report(
+            "shard1.json", written=["new.ja.md"], renamed=[("old.md", "new.md"), ("old.ja.md", "new.ja.md")],
+            lock_updates={"new.md": entry, "old.md": None},
+            usage={"calls": 2, "prompt_tokens": 100, "completion_tokens": 50, "cache_hit_calls": 0, "avg_seconds_cache_miss": 1.0})
+        second = self.shard_report(
+            "shard2.json", written=["other.ja.md"], deleted=["gone.md"],
+            usage={"calls": 1, "prompt_tokens": 10, "completion_tokens": 5, "cache_hit_calls": 0, "avg_seconds_cache_miss": 4.0})
+
+        self.merge([first, second])
+
+        report = post_commit.REPORT
+        self.assertEqual(report.written, ["new.ja.md", "other.ja.md", LOCK_FILE])
+        self.assertEqual(report.usage["calls"], 3)
+        self.assertEqual(report.usage["prompt_tokens"], 110)
+        self.assertEqual(report.usage["avg_seconds_cache_miss"], 2.0)
+        for path in ("old.md", "old.ja.md", "gone.md"):
+            self.assertFalse(os.path.exists(path), path)
+        with open(LOCK_FILE, encoding='utf-8') as f:
+            self.assertEqual(json.load(f)["documents"], {"new.md": entry})
+
+    def test_unreadable_report_is_skipped(self):
+        with open("broken.json", 'w') as f:
+            f.write("{not json")
+        good = self.shard_report("shard1.json", written=["a.ja.md"])
+        output = self.merge(["broken.json", "missing.json", good])
+        self.assertIn("Could not read shard report broken.json", output)
+        self.assertIn("Could not read shard report missing.json", output)
+        self.assertEqual(post_commit.REPORT.written, ["a.ja.md"])
+        self.assertFalse(os.path.exists(LOCK_FILE))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+"""
+Checks that identical translation calls running at the same time share one request:
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import time
+import threading
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from utils import translation
+from utils.translation import SingleFlight, flight_key
+
+WAIT_SECONDS = 5
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, content):
+        self.content = content
+
+    def json(self):
+        return {"choices": [{"message": {"content": self.content}}]}
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + WAIT_SECONDS
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out waiting for the callers to line up")
+        time.sleep(0.001)
+
+
+def run_in_threads(count, target):
+    results, errors = [None] * count, [None] * count
+
+    def run(i):
+        try:
+            results[i] = target()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+class SingleFlightTest(unittest.TestCase):
+    def setUp(self):
+        self.flights = SingleFlight()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def slow(self, result="done"):
+        def work():
+            self.calls += 1
+            self.release.wait(WAIT_SECONDS)
+            if isinstance(result, Exception):
+                raise result
+            return result
+        return work
+
+    def finish(self, threads):
+        wait_for(lambda: self.flights.coalesced == len(threads) - 1)
+        self.release.set()
+        for thread in threads:
+            thread.join(WAIT_SECONDS)
+
+    def test_overlapping_calls_share_one_result(self):
+        threads, results, errors = run_in_threads(5, lambda: self.flights.do("key", self.slow()))
+        self.finish(threads)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, ["done"] * 5)
+        self.assertEqual(errors, [None] * 5)
+
+    def test_error_reaches_every_waiter(self):
+        threads, results, errors = run_in_threads(3, lambda: self.flights.do("key", self.slow(ValueError("boom"))))
+        self.finish(threads)
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(isinstance(e, ValueError) for e in errors))
+
+    def test_different_keys_run_separately(self):
+        self.release.set()
+        self.assertEqual(self.flights.do("a", self.slow("a")), "a")
+        self.assertEqual(self.flights.do("b", self.slow("b")), "b")
+        self.assertEqual(self.calls, 2)
+
+    def test_nothing_is_kept_after_the_call(self):
+        self.release.set()
+        self.flights.do("key", self.slow())
+        self.flights.do("key", self.slow())
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(self.flights.coalesced, 0)
+
+
+class FlightKeyTest(unittest.TestCase):
+    def test_line_endings_and_trailing_whitespace_do_not_matter(self):
+        self.assertEqual(flight_key("translate", "Hello  \r\nworld\n", "ja", "m"),
+                         flight_key("translate", "Hello\nworld", "ja", "m"))
+
+    def test_language_kind_and_model_do(self):
+        key = flight_key("translate", "Hello", "ja", "m")
+        self.assertNotEqual(key, flight_key("translate", "Hello", "en", "m"))
+        self.assertNotEqual(key, flight_key("translate-fresh", "Hello", "ja", "m"))
+        self.assertNotEqual(key, flight_key("translate", "Hello", "ja", "other"))
+
+
+class TranslateTextTest(unittest.TestCase):
+    def setUp(self):
+        self.saved = translation._post_chat, translation._flights
+        self.release = threading.Event()
+        self.requests = []
+        translation._flights = SingleFlight()
+
+        def post_chat(payload, headers, timeout=None):
+            self.requests.append(payload)
+            self.release.wait(WAIT_SECONDS)
+            return FakeResponse("こんにちは")
+        translation._post_chat = post_chat
+
+    def tearDown(self):
+        translation._post_chat, translation._flights = self.saved
+
+    def test_identical_translations_make_one_request(self):
+        threads, results, errors = run_in_threads(4, lambda: translation.translate_text("Hello", "ja", use_memory=False))
+        wait_for(lambda: translation.coalesced_requests() == 3)
+        self.release.set()
+        for thread in threads:
+            thread.join(WAIT_SECONDS)
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(results, ["こんにちは"] * 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+"""
+Checks how translated markdown is compared with its source and repaired:
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from utils import structure_check
+from utils.structure_check import find_problems, repair_translation
+
+SOURCE = """---
+title: Setup
+tags: [docs]
+---
+
+# Setup
+
+Install the tool first.
+
+```bash
+pip install tool  # installs the CLI
+```
+
+| Option | Default |
+|--------|---------|
+| `--fast` | off |
+
+See [the guide](docs/guide.md)."""
+
+TRANSLATION = """---
+title: セットアップ
+tags: [docs]
+---
+
+# セットアップ
+
+まずツールをインストールします。
+
+```bash
+pip install tool  # installs the CLI
+```
+
+| オプション | 既定値 |
+|--------|---------|
+| `--fast` | オフ |
+
+[ガイド](docs/guide.md)を参照してください。"""
+
+
+class FindProblemsTest(unittest.TestCase):
+    def test_sound_translation_has_no_problems(self):
+        self.assertEqual(find_problems(SOURCE, TRANSLATION, "ja"), [])
+
+    def test_translated_code_block_is_a_problem(self):
+        broken = TRANSLATION.replace("# installs the CLI", "# CLIをインストールします")
+        self.assertEqual(find_problems(SOURCE, broken, "ja"), ["contents of 1 code blocks changed"])
+
+    def test_lost_table_column_is_a_problem(self):
+        broken = TRANSLATION.replace("| `--fast` | オフ |", "| `--fast` オフ |")
+        self.assertEqual(find_problems(SOURCE, broken, "ja"), ["table shape changed (3 rows became 3)"])
+
+    def test_escaped_pipe_is_not_a_column(self):
+        source = "| Pattern | Meaning |\n|---|---|\n| `a\\|b` | either |"
+        translated = "| パターン | 意味 |\n|---|---|\n| `a\\|b` | どちらか |"
+        self.assertEqual(find_problems(source, translated, "ja"), [])
+
+    def test_translated_front_matter_key_is_a_problem(self):
+        broken = TRANSLATION.replace("title: セットアップ", "タイトル: セットアップ")
+        self.assertEqual(find_problems(SOURCE, broken, "ja"),
+                         ["front matter keys ['title', 'tags'] became ['tags']"])
+
+    def test_dropped_front_matter_is_a_problem(self):
+        broken = TRANSLATION.split("---\n", 2)[2].strip()
+        self.assertIn("front matter keys ['title', 'tags'] became []", find_problems(SOURCE, broken, "ja"))
+
+
+class RepairTranslationTest(unittest.TestCase):
+    def setUp(self):
+        self.saved = structure_check.translate_segments, structure_check.remember
+        self.requests = []
+        structure_check.remember = lambda source, translation, target_language: None
+
+    def tearDown(self):
+        structure_check.translate_segments, structure_check.remember = self.saved
+
+    def reply_with(self, translations):
+        def translate_segments(segments, target_language, use_memory=True):
+            self.requests.append(segments)
+            return [translations[segment] for segment in segments]
+        structure_check.translate_segments = translate_segments
+
+    def test_only_the_broken_code_block_is_retranslated(self):
+        code = "```bash\npip install tool  # installs the CLI\n```"
+        self.reply_with({code: code})
+        broken = TRANSLATION.replace("# installs the CLI", "# CLIをインストールします")
+        self.assertEqual(repair_translation(SOURCE, broken, "ja"), TRANSLATION)
+        self.assertEqual(self.requests, [[code]])
+
+    def test_only_the_broken_table_is_retranslated(self):
+        table = "| Option | Default |\n|--------|---------|\n| `--fast` | off |"
+        fixed = "| オプション | 既定値 |\n|--------|---------|\n| `--fast` | オフ |"
+        self.reply_with({table: fixed})
+        broken = TRANSLATION.replace("| `--fast` | オフ |", "| `--fast` オフ |")
+        self.assertEqual(repair_translation(SOURCE, broken, "ja"), TRANSLATION)
+        self.assertEqual(self.requests, [[table]])
+
+    def test_only_the_front_matter_is_retranslated(self):
+        front_matter = "---\ntitle: Setup\ntags: [docs]\n---"
+        self.reply_with({front_matter: "---\ntitle: セットアップ\ntags: [docs]\n---"})
+        broken = TRANSLATION.replace("title: セットアップ", "タイトル: セットアップ")
+        self.assertEqual(repair_translation(SOURCE, broken, "ja"), TRANSLATION)
+        self.assertEqual(self.requests, [[front_matter]])
+
+    def test_misaligned_translation_is_left_alone(self):
+        self.reply_with({})
+        # Paragraphs merged and a heading lost: nothing lines up block by block
+        broken = TRANSLATION.replace("# セットアップ\n\nまず", "まず")
+        self.assertEqual(repair_translation(SOURCE, broken, "ja"), broken)
+        self.assertEqual(self.requests, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+Checks that the lockfile and --check agree on a source's blob, in a
+throwaway git repository:
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import tempfile
+import subprocess
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from utils.translation_lock import TranslationLock, blob_hash
+
+POST_COMMIT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'hooks', 'post_commit.py'))
+
+
+def git(*args):
+    subprocess.run(['git'] + list(args), check=True, capture_output=True)
+
+
+class LockHashTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        git('init', '-q')
+        git('config', 'core.autocrlf', 'true')
+        with open('guide.md', 'wb') as f:
+            f.write(b'# Guide\r\n\r\nHello world.\r\n')
+        with open('guide.ja.md', 'wb') as f:
+            f.write('# ガイド\r\n\r\nこんにちは。\r\n'.encode('utf-8'))
+        lock = TranslationLock()
+        lock.record('guide.md', 'en', {'ja': 'guide.ja.md'})
+        with open('.bilingual-lock.json', 'w', encoding='utf-8') as f:
+            f.write(lock.dumps())
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_recorded_blob_matches_the_filtered_hash(self):
+        self.assertEqual(TranslationLock().base_blob('guide.md'), blob_hash('guide.md'))
+
+    def test_check_passes_and_writes_nothing(self):
+        objects = subprocess.run(['git', 'count-objects', '-v'], capture_output=True, text=True).stdout
+        result = subprocess.run([sys.executable, POST_COMMIT, '--check'], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertFalse(os.path.exists(os.path.join('.git', 'bilingual')))
+        self.assertEqual(subprocess.run(['git', 'count-objects', '-v'], capture_output=True, text=True).stdout, objects)
+
+    def test_edited_source_is_stale(self):
+        with open('guide.md', 'ab') as f:
+            f.write(b'More text.\r\n')
+        result = subprocess.run([sys.executable, POST_COMMIT, '--check'], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 1)
+        self.assertIn('Stale', result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
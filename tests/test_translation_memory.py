@@ -0,0 +1,91 @@
+"""
+Checks what the translation memory learns and how translations use it:
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from utils import translation, translation_memory
+from utils.translation_memory import TranslationMemory
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, content):
+        self.content = content
+
+    def json(self):
+        return {"choices": [{"message": {"content": self.content}}]}
+
+
+class LearnTest(unittest.TestCase):
+    def setUp(self):
+        self.memory = TranslationMemory()
+
+    def test_aligned_sentences_are_learned(self):
+        learned = self.memory.learn("Install it. Run the tests.", "インストールします。テストを実行します。", "ja")
+        self.assertEqual(learned, 2)
+        self.assertEqual(self.memory.lookup("Run the tests.", "ja")[1], "テストを実行します。")
+
+    def test_merged_sentences_are_not_learned(self):
+        learned = self.memory.learn("Install it. Run the tests.", "インストールしてテストを実行します。", "ja")
+        self.assertEqual(learned, 0)
+        self.assertEqual(self.memory.entries, {})
+
+    def test_sentence_count_mismatch_anywhere_learns_nothing(self):
+        source = "First line here.\nSecond line. With two sentences."
+        translated = "最初の行です。\n二番目の行で、二つの文があります。"
+        self.assertEqual(self.memory.learn(source, translated, "ja"), 0)
+        self.assertIsNone(self.memory.lookup("First line here.", "ja"))
+
+    def test_moved_list_items_are_not_learned(self):
+        source = "- Build the image.\nThen deploy it."
+        translated = "イメージをビルドします。\n- その後デプロイします。"
+        self.assertEqual(self.memory.learn(source, translated, "ja"), 0)
+
+    def test_hints_come_from_exact_and_near_matches(self):
+        self.memory.learn("Run the unit tests before pushing.", "プッシュする前に単体テストを実行します。", "ja")
+        hints = self.memory.hints("Run the unit tests before pushing!", "ja")
+        self.assertEqual(hints, [("Run the unit tests before pushing.", "プッシュする前に単体テストを実行します。")])
+
+
+class TranslateWithMemoryTest(unittest.TestCase):
+    def setUp(self):
+        self.saved = (translation_memory._memory, translation._post_chat)
+        translation_memory._memory = TranslationMemory()
+        self.sent = []
+
+    def tearDown(self):
+        translation_memory._memory, translation._post_chat = self.saved
+
+    def reply_with(self, content):
+        def post_chat(payload, headers, timeout=None):
+            self.sent.append(payload)
+            return FakeResponse(content)
+        translation._post_chat = post_chat
+
+    def test_remembered_text_is_still_translated_with_hints(self):
+        translation_memory._memory.learn("Hello there.", "こんにちは。", "ja")
+        self.reply_with("やあ、こんにちは。")
+        self.assertEqual(translation.translate_text("Hello there.", "ja"), "やあ、こんにちは。")
+        self.assertEqual(len(self.sent), 1)
+        self.assertIn("Hello there. => こんにちは。", self.sent[0]["messages"][-2]["content"])
+
+    def test_translation_with_broken_structure_is_not_learned(self):
+        self.reply_with("見出しが消えました。")
+        translation.translate_text("# Setup guide", "ja")
+        self.assertEqual(translation_memory._memory.entries, {})
+
+    def test_sound_translation_is_learned(self):
+        self.reply_with("# セットアップガイド")
+        translation.translate_text("# Setup guide", "ja")
+        self.assertEqual(translation_memory._memory.lookup("Setup guide", "ja")[1], "セットアップガイド")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+Checks which comments are answered locally instead of by the model:
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from utils.trivial_comments import classify_comment
+
+UNTRANSLATABLE = {"kind": "untranslatable"}
+
+
+class PhraseTableTest(unittest.TestCase):
+    def test_english_phrases_with_punctuation_and_emoji(self):
+        for text in ("LGTM", "lgtm!", "LGTM :+1:", "LGTM 👍"):
+            with self.subTest(text=text):
+                self.assertEqual(classify_comment(text), {
+                    "kind": "phrase", "language": "en", "translations": {"ja": "LGTM（問題ないと思います）"}})
+
+    def test_japanese_phrase(self):
+        self.assertEqual(classify_comment("ありがとうございます！"), {
+            "kind": "phrase", "language": "ja", "translations": {"en": "Thank you"}})
+
+    def test_phrase_inside_a_sentence_goes_to_the_model(self):
+        self.assertIsNone(classify_comment("Thanks, but the second test still fails on Windows."))
+
+
+class UntranslatableTest(unittest.TestCase):
+    def test_emoji_and_reactions(self):
+        for text in ("👍", "+1", ":tada: :rocket:", "🎉🎉", "   "):
+            with self.subTest(text=text):
+                self.assertEqual(classify_comment(text), UNTRANSLATABLE)
+
+    def test_links(self):
+        for text in ("https://example.com/build/123", "[](https://example.com)", "<https://example.com>"):
+            with self.subTest(text=text):
+                self.assertEqual(classify_comment(text), UNTRANSLATABLE)
+
+    def test_code(self):
+        for text in ("```\nnpm run build\n```", "`make test`"):
+            with self.subTest(text=text):
+                self.assertEqual(classify_comment(text), UNTRANSLATABLE)
+
+    def test_mentions_references_and_shas(self):
+        for text in ("@octocat", "#123", "octo/repo#45", "a1b2c3d", "@octocat 3f9e2a1c0b"):
+            with self.subTest(text=text):
+                self.assertEqual(classify_comment(text), UNTRANSLATABLE)
+
+    def test_words_made_of_hex_letters_are_translated(self):
+        for text in ("defaced", "effaced", "the page was defaced"):
+            with self.subTest(text=text):
+                self.assertIsNone(classify_comment(text))
+
+    def test_link_text_is_translated(self):
+        self.assertIsNone(classify_comment("[see the design doc](https://example.com/doc)"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+"""
+Checks webhook verification, event coalescing and replays of recorded
+deliveries, without GitHub or the OpenAI API:
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import hmac
+import json
+import time
+import hashlib
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from actions import webhook_worker
+from actions.webhook_worker import CoalescingQueue, TranslationWorker, verify_signature
+
+LABELS = [{"name": "need translation"}]
+
+
+def issue_event(action="opened", number=5, sender="alice"):
+    return {"action": action, "repository": {"full_name": "octo/repo"}, "sender": {"login": sender},
+            "issue": {"number": number, "labels": LABELS, "body": "Hello"}}
+
+
+def comment_event(comment_id, number=5):
+    return {"action": "created", "repository": {"full_name": "octo/repo"}, "sender": {"login": "alice"},
+            "issue": {"number": number, "labels": LABELS}, "comment": {"id": comment_id, "body": "Hi"}}
+
+
+def pr_event(action):
+    return {"action": action, "repository": {"full_name": "octo/repo"}, "sender": {"login": "alice"},
+            "pull_request": {"number": 7, "labels": LABELS, "body": "Fix"}}
+
+
+class VerifySignatureTest(unittest.TestCase):
+    body = b'{"action": "opened"}'
+
+    def sign(self, secret):
+        return "sha256=" + hmac.new(secret.encode("utf-8"), self.body, hashlib.sha256).hexdigest()
+
+    def test_valid_signature(self):
+        self.assertTrue(verify_signature("s3cret", self.body, self.sign("s3cret")))
+
+    def test_signature_with_another_secret(self):
+        self.assertFalse(verify_signature("s3cret", self.body, self.sign("other")))
+
+    def test_missing_or_malformed_header(self):
+        self.assertFalse(verify_signature("s3cret", self.body, None))
+        self.assertFalse(verify_signature("s3cret", self.body, self.sign("s3cret")[len("sha256="):]))
+
+    def test_nothing_verifies_without_a_secret(self):
+        self.assertFalse(verify_signature("", self.body, self.sign("")))
+
+
+class CoalescingQueueTest(unittest.TestCase):
+    def test_comment_jobs_for_one_thread_are_merged(self):
+        queue = CoalescingQueue(0)
+        queue.put(("octo/repo", 5), {"kind": "issue", "full": False, "comments": {("issue_comment", 1)}})
+        queue.put(("octo/repo", 5), {"kind": "issue", "full": False, "comments": {("issue_comment", 2)}})
+        key, job = queue.get()
+        self.assertEqual(key, ("octo/repo", 5))
+        self.assertEqual(job["comments"], {("issue_comment", 1), ("issue_comment", 2)})
+        queue.done(key)
+        self.assertEqual(queue.size(), 0)
+
+    def test_full_thread_job_absorbs_comment_jobs(self):
+        queue = CoalescingQueue(0)
+        queue.put(("octo/repo", 5), {"kind": "issue", "full": False, "comments": {("issue_comment", 1)}})
+        queue.put(("octo/repo", 5), {"kind": "issue", "full": True, "comments": set()})
+        self.assertEqual(queue.get()[1], {"kind": "issue", "full": True, "comments": set()})
+
+    def test_job_waits_for_the_quiet_period(self):
+        queue = CoalescingQueue(0.2)
+        queue.put(("octo/repo", 5), {"kind": "issue", "full": True, "comments": set()})
+        started = time.monotonic()
+        queue.get()
+        self.assertGreaterEqual(time.monotonic() - started, 0.15)
+
+    def test_thread_in_progress_is_not_handed_out_twice(self):
+        queue = CoalescingQueue(0)
+        queue.put(("octo/repo", 5), {"kind": "issue", "full": True, "comments": set()})
+        key, _ = queue.get()
+        queue.put(("octo/repo", 5), {"kind": "issue", "full": True, "comments": set()})
+        second = []
+        getter = threading.Thread(target=lambda: second.append(queue.get()), daemon=True)
+        getter.start()
+        getter.join(0.1)
+        self.assertEqual(second, [])
+        queue.done(key)
+        getter.join(1)
+        self.assertEqual(second[0][0], key)
+
+
+class SubmitTest(unittest.TestCase):
+    def setUp(self):
+        self.worker = TranslationWorker(github=None, coalesce_seconds=0, bot_login="translation-bot")
+
+    def test_burst_of_comments_becomes_one_job(self):
+        for comment_id in (1, 2, 3):
+            self.assertTrue(self.worker.submit("issue_comment", comment_event(comment_id)))
+        self.assertEqual(self.worker.queue.size(), 1)
+        self.assertEqual(len(self.worker.queue.get()[1]["comments"]), 3)
+
+    def test_pushes_to_a_pr_are_ignored(self):
+        self.assertFalse(self.worker.submit("pull_request", pr_event("synchronize")))
+        self.assertTrue(self.worker.submit("pull_request", pr_event("edited")))
+
+    def test_events_from_the_bot_are_ignored(self):
+        self.assertFalse(self.worker.submit("issues", issue_event(sender="translation-bot")))
+        self.assertEqual(self.worker.queue.size(), 0)
+
+
+class ReplayTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.saved = os.environ.get("GITHUB_TOKEN"), TranslationWorker.process
+        os.environ["GITHUB_TOKEN"] = "test-token"
+        self.processed = []
+        TranslationWorker.process = lambda worker, key, job: self.processed.append((key, job))
+
+    def tearDown(self):
+        token, TranslationWorker.process = self.saved
+        if token is None:
+            os.environ.pop("GITHUB_TOKEN", None)
+        else:
+            os.environ["GITHUB_TOKEN"] = token
+        self.tmp.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(content, f)
+        return path
+
+    def test_recorded_deliveries_are_processed_together(self):
+        recorded = self.write("recorded.json", {"event": "issue_comment", "payload": comment_event(1)})
+        bare = self.write("bare.json", comment_event(2))
+        self.assertEqual(webhook_worker.main(["--replay", recorded, bare, "--event", "issue_comment"]), 0)
+        self.assertEqual(self.processed, [(("octo/repo", 5), {
+            "kind": "issue", "full": False, "comments": {("issue_comment", 1), ("issue_comment", 2)}})])
+
+    def test_bare_payload_needs_an_event_name(self):
+        bare = self.write("bare.json", issue_event())
+        with self.assertRaises(ValueError):
+            webhook_worker.main(["--replay", bare])
+
+
+if __name__ == "__main__":
+    unittest.main()